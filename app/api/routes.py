@@ -11,15 +11,23 @@ import time
 from importlib.metadata import version, PackageNotFoundError
 from pathlib import Path
 from typing import Any, AsyncGenerator
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from urllib.parse import urlparse, parse_qs
 
+from app.clients.fanjiao import get_fetch_stats
+from app.clients.image_upload import get_upload_stats
+from app.clients.notion import get_notion_stats
+from app.services.cover_sweeper import cover_sweeper
 from app.services.fanjiao_album_service import FanjiaoService
-from app.services.fanjiao_audio_service import FanjiaoAudioService
-from app.services.notion_service import NotionService
+from app.services.fanjiao_audio_service import FanjiaoAudioService, get_audio_cache
+from app.services.job_queue import JobFn, JobQueueFullError, job_queue
+from app.services.notion_outbox import notion_outbox
+from app.services.notion_service import NotionService, get_write_coalescer
 from app.utils.log_broadcaster import get_broadcaster
+from app.utils.property_ledger import get_property_ledger
+from app.utils.upload_index import get_upload_index
 from app.api.middlewares import verify_api_key
 from app.constants.notion_fields import AlbumField, AudioField
 from app.utils.logger import setup_logger
@@ -99,6 +107,43 @@ async def health_check(request: Request) -> dict[str, Any]:
     }
 
 
+@router.get("/stats", dependencies=[Depends(verify_api_key)])
+async def stats() -> dict[str, Any]:
+    """
+    运行时统计端点
+    返回各缓存的命中/未命中计数等信息
+    """
+    return {
+        "fanjiao_audio_cache": get_audio_cache().stats(),
+        "fanjiao_fetch": get_fetch_stats(),
+        "notion": get_notion_stats(),
+        "cover_upload": get_upload_stats(),
+        "upload_index": get_upload_index().stats(),
+        "cover_sweeper": cover_sweeper.stats(),
+        "property_ledger": get_property_ledger().stats(),
+        "jobs": job_queue.stats(),
+        "notion_outbox": await notion_outbox.stats(),
+        "write_coalescer": get_write_coalescer().stats(),
+    }
+
+
+@router.delete("/ledger/{page_id}", dependencies=[Depends(verify_api_key)])
+async def invalidate_page_ledger(page_id: str) -> dict[str, Any]:
+    """
+    使某个页面的属性写入账本失效
+    页面在 Notion 中被手动修改后调用，下次同步时会重新发送全部属性
+    """
+    count = await get_property_ledger().invalidate(page_id)
+    return {"status": "success", "invalidated": count}
+
+
+@router.delete("/ledger", dependencies=[Depends(verify_api_key)])
+async def invalidate_ledger() -> dict[str, Any]:
+    """清空属性写入账本"""
+    count = await get_property_ledger().invalidate()
+    return {"status": "success", "invalidated": count}
+
+
 @router.get("/logs/stream", dependencies=[Depends(verify_api_key)])
 async def logs_stream() -> StreamingResponse:
     """
@@ -158,8 +203,105 @@ def _parse_audio_ids(
     return album_id, audio_id, page_id
 
 
+async def _dispatch(
+    response: Response,
+    kind: str,
+    fn: JobFn,
+    params: dict[str, Any],
+    success_message: str,
+) -> WebhookResponse:
+    """
+    执行或提交 webhook 处理流程
+
+    WEBHOOK_ASYNC 开启时将流程放入任务队列，立即返回 202 与任务 ID；
+    否则同步执行，失败时由流程抛出 HTTPException。
+    """
+    if not config.WEBHOOK_ASYNC:
+        await fn()
+        return WebhookResponse(status="success", message=success_message)
+
+    try:
+        job = job_queue.submit(kind, fn, params)
+    except JobQueueFullError as e:
+        logger.warning(f"Rejected {kind} request: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
+    response.status_code = 202
+    return WebhookResponse(
+        status="accepted",
+        message="Webhook received, processing in background",
+        data={"job_id": job.id, "status_url": f"/jobs/{job.id}"},
+    )
+
+
+async def _process_album(album_id: str, page_id: str) -> None:
+    """抓取专辑数据并写入 Notion 页面"""
+    fanjiao = FanjiaoService()
+    album_data = await fanjiao.fetch_album_data(album_id)
+    if not album_data:
+        raise HTTPException(status_code=500, detail="Failed to fetch album data")
+
+    notion = NotionService()
+    success = await notion.upload_album_data(album_data, page_id)
+    if not success:
+        raise HTTPException(status_code=500, detail="Failed to process album data")
+
+
+async def _process_album_update(
+    album_id: str, page_id: str, update_fields: list[AlbumField]
+) -> None:
+    """抓取专辑数据并部分更新 Notion 页面"""
+    fanjiao = FanjiaoService()
+    album_data = await fanjiao.fetch_album_data(album_id)
+    if not album_data:
+        raise HTTPException(status_code=500, detail="Failed to fetch album data")
+
+    notion = NotionService()
+    success = await notion.update_partial_album_data(album_data, page_id, update_fields)
+    if not success:
+        raise HTTPException(status_code=500, detail="Failed to update album data")
+
+
+async def _process_audio(album_id: str, audio_id: str, page_id: str) -> None:
+    """抓取音频数据并写入 Notion 页面"""
+    fanjiao = FanjiaoAudioService()
+    audio_data = await fanjiao.fetch_audio_data(album_id, audio_id)
+    if not audio_data:
+        raise HTTPException(status_code=500, detail="Failed to fetch audio data")
+
+    notion = NotionService()
+    success = await notion.upload_audio_data(audio_data, page_id)
+    if not success:
+        raise HTTPException(status_code=500, detail="Failed to process audio data")
+
+
+async def _process_audio_update(
+    album_id: str, audio_id: str, page_id: str, update_fields: list[AudioField]
+) -> None:
+    """抓取音频数据并部分更新 Notion 页面"""
+    fanjiao = FanjiaoAudioService()
+    audio_data = await fanjiao.fetch_audio_data(album_id, audio_id)
+    if not audio_data:
+        raise HTTPException(status_code=500, detail="Failed to fetch audio data")
+
+    notion = NotionService()
+    success = await notion.update_partial_audio_data(audio_data, page_id, update_fields)
+    if not success:
+        raise HTTPException(status_code=500, detail="Failed to update audio data")
+
+
+@router.get("/jobs/{job_id}", dependencies=[Depends(verify_api_key)])
+async def get_job(job_id: str) -> dict[str, Any]:
+    """查询异步任务的状态与耗时"""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
 @router.post("/webhook-album", dependencies=[Depends(verify_api_key)])
-async def webhook_album(request: WebhookDataSourceRequest) -> WebhookResponse:
+async def webhook_album(
+    request: WebhookDataSourceRequest, response: Response
+) -> WebhookResponse:
     """
     处理来自Notion数据库的webhook请求
     适用于在某个data source中专门设置一个空白page，在里面填写album id，
@@ -182,18 +324,12 @@ async def webhook_album(request: WebhookDataSourceRequest) -> WebhookResponse:
         # 获取页面信息
         page_id = request.data["id"]
 
-        fanjiao = FanjiaoService()
-        album_data = await fanjiao.fetch_album_data(album_id)
-        if not album_data:
-            raise HTTPException(status_code=500, detail="Failed to fetch album data")
-
-        notion = NotionService()
-        success = await notion.upload_album_data(album_data, page_id)
-        if not success:
-            raise HTTPException(status_code=500, detail="Failed to process album data")
-
-        return WebhookResponse(
-            status="success", message="Webhook received and data processed!"
+        return await _dispatch(
+            response,
+            "webhook-album",
+            lambda: _process_album(album_id, page_id),
+            {"album_id": album_id, "page_id": page_id},
+            "Webhook received and data processed!",
         )
 
     except KeyError as e:
@@ -213,7 +349,7 @@ async def webhook_album(request: WebhookDataSourceRequest) -> WebhookResponse:
 
 @router.post("/webhook-audio", dependencies=[Depends(verify_api_key)])
 async def webhook_audio(
-    request: WebhookDataSourceRequest,
+    request: WebhookDataSourceRequest, response: Response
 ) -> WebhookResponse:
     """
     对音乐进行抓取
@@ -229,18 +365,12 @@ async def webhook_audio(
             return result
         album_id, audio_id, page_id = result
 
-        fanjiao = FanjiaoAudioService()
-        audio_data = await fanjiao.fetch_audio_data(album_id, audio_id)
-        if not audio_data:
-            raise HTTPException(status_code=500, detail="Failed to fetch audio data")
-
-        notion = NotionService()
-        success = await notion.upload_audio_data(audio_data, page_id)
-        if not success:
-            raise HTTPException(status_code=500, detail="Failed to process audio data")
-
-        return WebhookResponse(
-            status="success", message="Webhook received and audio data processed!"
+        return await _dispatch(
+            response,
+            "webhook-audio",
+            lambda: _process_audio(album_id, audio_id, page_id),
+            {"album_id": album_id, "audio_id": audio_id, "page_id": page_id},
+            "Webhook received and audio data processed!",
         )
     except KeyError as e:
         logger.error(f"Missing key in request data: {e}")
@@ -256,7 +386,7 @@ async def webhook_audio(
 
 @router.post("/webhook-audio-update", dependencies=[Depends(verify_api_key)])
 async def webhook_audio_update(
-    request: WebhookDataSourceRequest,
+    request: WebhookDataSourceRequest, response: Response
 ) -> WebhookResponse:
     """
     对已有音频数据进行部分字段更新
@@ -283,20 +413,17 @@ async def webhook_audio_update(
         update_fields = [AudioField(item["name"]) for item in update_selection]
         logger.info(f"Fields to update: {update_fields}")
 
-        fanjiao = FanjiaoAudioService()
-        audio_data = await fanjiao.fetch_audio_data(album_id, audio_id)
-        if not audio_data:
-            raise HTTPException(status_code=500, detail="Failed to fetch audio data")
-
-        notion = NotionService()
-        success = await notion.update_partial_audio_data(
-            audio_data, page_id, update_fields
-        )
-        if not success:
-            raise HTTPException(status_code=500, detail="Failed to update audio data")
-
-        return WebhookResponse(
-            status="success", message="Webhook received and data updated!"
+        return await _dispatch(
+            response,
+            "webhook-audio-update",
+            lambda: _process_audio_update(album_id, audio_id, page_id, update_fields),
+            {
+                "album_id": album_id,
+                "audio_id": audio_id,
+                "page_id": page_id,
+                "fields": update_fields,
+            },
+            "Webhook received and data updated!",
         )
 
     except KeyError as e:
@@ -316,7 +443,7 @@ async def webhook_audio_update(
 
 @router.post("/webhook-album-update", dependencies=[Depends(verify_api_key)])
 async def webhook_album_update(
-    request: WebhookDataSourceRequest,
+    request: WebhookDataSourceRequest, response: Response
 ) -> WebhookResponse:
     """
     对data source中的某些property进行更新时触发的webhook端点
@@ -351,20 +478,12 @@ async def webhook_album_update(
         update_fields = [AlbumField(item["name"]) for item in update_selection]
         logger.info(f"Fields to update: {update_fields}")
 
-        fanjiao = FanjiaoService()
-        album_data = await fanjiao.fetch_album_data(album_id)
-        if not album_data:
-            raise HTTPException(status_code=500, detail="Failed to fetch album data")
-
-        notion = NotionService()
-        success = await notion.update_partial_album_data(
-            album_data, page_id, update_fields
-        )
-        if not success:
-            raise HTTPException(status_code=500, detail="Failed to update album data")
-
-        return WebhookResponse(
-            status="success", message="Webhook received and data updated!"
+        return await _dispatch(
+            response,
+            "webhook-album-update",
+            lambda: _process_album_update(album_id, page_id, update_fields),
+            {"album_id": album_id, "page_id": page_id, "fields": update_fields},
+            "Webhook received and data updated!",
         )
 
     except KeyError as e:
@@ -6,26 +6,63 @@ Fanjiao API客户端
 负责与Fanjiao API进行HTTP通信（异步版本）
 """
 
+import asyncio
 import hashlib
+import importlib.util
+import random
 import httpx
 from typing import Dict, Any
 from urllib.parse import urlparse, parse_qs
 
+from app.utils.circuit_breaker import CircuitBreaker, CircuitOpenError
 from app.utils.config import config
 from app.utils.logger import setup_logger
+from app.utils.rate_limiter import AsyncTokenBucket
+from app.utils.singleflight import SingleFlight
 
 logger = setup_logger(__name__)
 
 # 延迟初始化的 httpx 异步客户端
 _http_client: httpx.AsyncClient | None = None
 
+# 按 (base_url, query) 合并并发的相同请求
+_fetch_flight: SingleFlight[tuple[str, str], Dict[str, Any]] = SingleFlight()
+
+# 按 base_url 区分的熔断器
+_breakers: Dict[str, CircuitBreaker] = {}
+
+# 按 base_url 区分的令牌桶限流器
+_rate_limiters: Dict[str, AsyncTokenBucket] = {}
+
+
+def _http2_available() -> bool:
+    """HTTP/2 依赖 h2 包，未安装时回退到 HTTP/1.1"""
+    if importlib.util.find_spec("h2") is None:
+        logger.warning(
+            "FANJIAO_HTTP2 is enabled but 'h2' is not installed "
+            "(run uv sync to install httpx[http2]), using HTTP/1.1"
+        )
+        return False
+    return True
+
 
 def get_http_client() -> httpx.AsyncClient:
     """获取 httpx 异步客户端（延迟初始化）"""
     global _http_client
     if _http_client is None:
         _http_client = httpx.AsyncClient(
-            timeout=10.0,
+            http2=config.FANJIAO_HTTP2 and _http2_available(),
+            limits=httpx.Limits(
+                max_connections=config.FANJIAO_MAX_CONNECTIONS,
+                max_keepalive_connections=config.FANJIAO_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=config.FANJIAO_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(
+                connect=config.FANJIAO_CONNECT_TIMEOUT,
+                read=config.FANJIAO_READ_TIMEOUT,
+                write=config.FANJIAO_READ_TIMEOUT,
+                pool=config.FANJIAO_POOL_TIMEOUT,
+            ),
             headers={
                 "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
                 "Origin": "https://www.rela.me",
@@ -42,6 +79,69 @@ async def close_http_client() -> None:
         _http_client = None
 
 
+def get_circuit_breaker(base_url: str) -> CircuitBreaker:
+    """获取 base_url 对应的熔断器（延迟初始化）"""
+    breaker = _breakers.get(base_url)
+    if breaker is None:
+        breaker = CircuitBreaker(
+            name=urlparse(base_url).path or base_url,
+            failure_threshold=config.FANJIAO_BREAKER_THRESHOLD,
+            reset_timeout=config.FANJIAO_BREAKER_RESET_TIMEOUT,
+        )
+        _breakers[base_url] = breaker
+    return breaker
+
+
+def get_rate_limiter(base_url: str) -> AsyncTokenBucket:
+    """获取 base_url 对应的限流器（延迟初始化）"""
+    limiter = _rate_limiters.get(base_url)
+    if limiter is None:
+        rates = {
+            config.FANJIAO_BASE_URL: config.FANJIAO_ALBUM_RATE_LIMIT,
+            config.FANJIAO_CV_BASE_URL: config.FANJIAO_CV_RATE_LIMIT,
+            config.FANJIAO_AUDIO_BASE_URL: config.FANJIAO_AUDIO_RATE_LIMIT,
+        }
+        limiter = AsyncTokenBucket(
+            name=urlparse(base_url).path or base_url,
+            rate=rates.get(base_url, config.FANJIAO_RATE_LIMIT),
+            capacity=config.FANJIAO_RATE_BURST,
+        )
+        _rate_limiters[base_url] = limiter
+    return limiter
+
+
+def get_fetch_stats() -> Dict[str, Any]:
+    """Fanjiao 请求统计（用于 /stats）"""
+    return {
+        "singleflight": _fetch_flight.stats(),
+        "circuit_breakers": {b.name: b.stats() for b in _breakers.values()},
+        "rate_limiters": {r.name: r.stats() for r in _rate_limiters.values()},
+    }
+
+
+def _is_retryable(error: httpx.HTTPError) -> bool:
+    """判断错误是否可安全重试（GET 请求：传输层错误、5xx、429）"""
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(error, httpx.TransportError)
+
+
+def _retry_delay(attempt: int, error: httpx.HTTPError) -> float:
+    """
+    计算第 attempt 次失败后的等待时间
+
+    429 响应带 Retry-After 时优先遵循，否则使用 full-jitter 指数退避
+    """
+    cap = config.FANJIAO_RETRY_BACKOFF_MAX
+    if isinstance(error, httpx.HTTPStatusError):
+        retry_after = error.response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return min(float(retry_after), cap)
+    backoff = config.FANJIAO_RETRY_BACKOFF * (2 ** (attempt - 1))
+    return random.uniform(0, min(backoff, cap))
+
+
 class FanjiaoSigner:
     """签名生成器"""
 
@@ -97,6 +197,8 @@ class BaseFanjiaoClient:
         """
         执行API请求（异步）
 
+        相同 (base_url, query) 的并发请求只会发出一次，调用者共享解析后的 JSON
+
         Args:
             base_url: API基础URL
             query: 查询参数
@@ -107,17 +209,76 @@ class BaseFanjiaoClient:
         Raises:
             RuntimeError: API请求失败
         """
+        return await _fetch_flight.do(
+            (base_url, query), lambda: self._request(base_url, query)
+        )
+
+    async def _request(self, base_url: str, query: str) -> Dict[str, Any]:
+        """
+        发出签名的GET请求并解析JSON
+
+        每次尝试（含重试）都需先从该 base_url 的令牌桶获取令牌。
+        连接错误、超时、5xx 和 429 按指数退避（带抖动）重试；
+        同一 base_url 连续失败达到阈值后熔断，冷却期内直接失败。
+
+        Args:
+            base_url: API基础URL
+            query: 查询参数
+
+        Returns:
+            API响应JSON数据
+
+        Raises:
+            RuntimeError: API请求失败或熔断器打开
+        """
         api_url = f"{base_url}?{query}"
         headers = {"signature": FanjiaoSigner.generate(query)}
+        breaker = get_circuit_breaker(base_url)
+        limiter = get_rate_limiter(base_url)
+
+        try:
+            probe = breaker.before_request()
+        except CircuitOpenError as e:
+            logger.warning(f"API request rejected: {e}")
+            raise RuntimeError(f"API请求失败: {e}") from e
 
+        attempts = max(1, config.FANJIAO_RETRY_ATTEMPTS)
+        attempt = 0
         try:
-            response = await self.client.get(api_url, headers=headers)
-            response.raise_for_status()
-            logger.debug(f"API request successful: {api_url}")
-            return response.json()
-        except httpx.HTTPError as e:
-            logger.error(f"API request failed: {str(e)}")
-            raise RuntimeError(f"API请求失败: {str(e)}") from e
+            while True:
+                attempt += 1
+                waited = await limiter.acquire()
+                if waited > 0.001:
+                    logger.debug(f"Rate limited {limiter.name}, waited {waited:.2f}s")
+                try:
+                    response = await self.client.get(api_url, headers=headers)
+                    response.raise_for_status()
+                    breaker.record_success()
+                    logger.debug(f"API request successful: {api_url}")
+                    return response.json()
+                except httpx.HTTPError as e:
+                    if not _is_retryable(e):
+                        # 4xx 等非临时错误说明上游可达，不计入熔断
+                        breaker.record_success()
+                        logger.error(f"API request failed: {str(e)}")
+                        raise RuntimeError(f"API请求失败: {str(e)}") from e
+                    if attempt == attempts:
+                        breaker.record_failure()
+                        logger.error(
+                            f"API request failed after {attempts} attempts: {str(e)}"
+                        )
+                        raise RuntimeError(f"API请求失败: {str(e)}") from e
+
+                    delay = _retry_delay(attempt, e)
+                    logger.warning(
+                        f"API request failed ({str(e)}), "
+                        f"retry {attempt}/{attempts - 1} in {delay:.2f}s"
+                    )
+                    await asyncio.sleep(delay)
+        finally:
+            # 只释放本次请求占用的探测名额，不影响其他请求持有的探测
+            if probe:
+                breaker.release()
 
 
 class FanjiaoAlbumClient(BaseFanjiaoClient):
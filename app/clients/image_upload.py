@@ -8,87 +8,493 @@ external图片链接上传
 """
 
 import asyncio
+import hashlib
+import math
+import statistics
 import time
+import uuid
 import httpx
-from typing import Optional
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Dict, Optional, Tuple
 from notion_client import AsyncClient
+from app.clients.notion import get_notion_client
 from app.utils.config import config
 from app.utils.logger import setup_logger
 from app.utils.cache import cover_cache
+from app.utils.image_store import ImageDiskCache, ImageWriter, get_image_store
+from app.utils.priority_limiter import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    PriorityLimiter,
+)
+from app.utils.singleflight import SingleFlight
+from app.utils.ttl_cache import TTLCache
+from app.utils.upload_index import get_upload_index
 
 logger = setup_logger(__name__)
 
+# 最近的 external_url 导入耗时估计（秒），用于调整首次轮询延迟
+# 只记录经过至少一次 pending 轮询的导入：完成时间位于上一次与本次检查之间，取中点
+_import_durations: deque[float] = deque(maxlen=50)
+
+# 首次轮询即已完成时只知道耗时上限，据此逐步降低首次轮询延迟（None 表示无上限）
+_poll_delay_cap: Optional[float] = None
+
+# 首次轮询即已完成时，下次首次轮询延迟缩小的比例
+_POLL_DELAY_SHRINK = 0.75
+
+# 封面缓存命中情况：信任窗口内命中 / 校验后命中 / 已过期 / 未命中 / 内容哈希命中
+_cache_stats: Dict[str, int] = {
+    "trusted_hits": 0,
+    "validated_hits": 0,
+    "expired": 0,
+    "misses": 0,
+    "content_hits": 0,
+}
+
+# 按规范化图片 URL 合并并发的封面上传
+_upload_flight: SingleFlight[str, str] = SingleFlight()
+
+# 进行中的上传任务（规范化图片 URL -> 执行该任务的 CoverUploader），
+# 更高优先级的调用方加入时据此提升任务优先级
+_flight_uploaders: Dict[str, "CoverUploader"] = {}
+
+# 进程级封面上传并发限制（延迟初始化）
+_upload_scheduler: Optional[PriorityLimiter] = None
+
+# 下载封面图片用的共享 httpx 客户端（延迟初始化）
+_image_client: Optional[httpx.AsyncClient] = None
+
+# 最近的 direct 模式上传耗时（秒，下载 + 发送），用于与 external_url 模式对比
+_direct_durations: deque[float] = deque(maxlen=50)
+
+# 首次轮询延迟下限（秒）
+_MIN_POLL_DELAY = 0.2
+
+# 图片格式魔数：(偏移, 魔数, 扩展名)
+_MAGIC_NUMBERS = (
+    (0, b"\x89PNG\r\n\x1a\n", "png"),
+    (0, b"\xff\xd8\xff", "jpg"),
+    (0, b"GIF87a", "gif"),
+    (0, b"GIF89a", "gif"),
+    (8, b"WEBP", "webp"),  # RIFF....WEBP
+    (4, b"ftypavif", "avif"),
+    (4, b"ftypavis", "avif"),
+)
+
+# 识别格式需要读取的文件头长度
+_HEADER_SIZE = 16
+
+# 图片扩展名对应的 Content-Type
+_CONTENT_TYPES = {
+    "png": "image/png",
+    "jpg": "image/jpeg",
+    "gif": "image/gif",
+    "webp": "image/webp",
+    "avif": "image/avif",
+}
+
+# Content-Type 对应的扩展名（魔数无法识别时的后备）
+_FORMATS_BY_CONTENT_TYPE = {
+    **{content_type: fmt for fmt, content_type in _CONTENT_TYPES.items()},
+    "image/jpg": "jpg",
+}
+
+# 图片 URL -> 扩展名，重复上传同一 URL 时无需再次识别（延迟初始化）
+_format_cache: Optional[TTLCache[str, str]] = None
+
+# Notion 单次发送（single_part）上限 20MB；超过时按 10MB 分片（multi_part）
+_SINGLE_PART_LIMIT = 20 * 1024 * 1024
+_MULTI_PART_SIZE = 10 * 1024 * 1024
+
+
+def detect_image_format(header: bytes) -> Optional[str]:
+    """
+    根据文件头魔数识别图片格式
+
+    Args:
+        header: 文件开头的若干字节
+
+    Returns:
+        扩展名（如 "png"），无法识别时返回 None
+    """
+    for offset, magic, fmt in _MAGIC_NUMBERS:
+        if header[offset : offset + len(magic)] == magic:
+            return fmt
+    return None
+
+
+async def _tee(
+    chunks: AsyncIterator[bytes], writer: Optional[ImageWriter]
+) -> AsyncIterator[bytes]:
+    """转发数据块，同时写入磁盘缓存（writer 为 None 时只转发）"""
+    async for chunk in chunks:
+        if writer is not None:
+            await writer.write(chunk)
+        yield chunk
+
+
+async def _hashed(chunks: AsyncIterator[bytes], digest: Any) -> AsyncIterator[bytes]:
+    """转发数据块，同时更新内容哈希"""
+    async for chunk in chunks:
+        digest.update(chunk)
+        yield chunk
+
+
+def get_format_cache() -> TTLCache[str, str]:
+    """获取图片格式识别结果缓存（延迟初始化）"""
+    global _format_cache
+    if _format_cache is None:
+        _format_cache = TTLCache(
+            maxsize=config.COVER_FORMAT_CACHE_SIZE,
+            ttl=config.COVER_FORMAT_CACHE_TTL,
+        )
+    return _format_cache
+
+
+class _ChunkReader:
+    """将流式响应的数据块重新切分为指定长度的分段（仅缓冲一个数据块）"""
+
+    def __init__(self, chunks: AsyncIterator[bytes]):
+        self._chunks = chunks.__aiter__()
+        self._buffer = b""
+        self._exhausted = False
+
+    async def _fill(self) -> bool:
+        """读取下一个数据块到缓冲区，数据已读完时返回 False"""
+        if self._exhausted:
+            return False
+        try:
+            self._buffer += await self._chunks.__anext__()
+            return True
+        except StopAsyncIteration:
+            self._exhausted = True
+            return False
+
+    async def peek(self, size: int) -> bytes:
+        """查看开头 size 个字节（不消耗数据）"""
+        while len(self._buffer) < size and await self._fill():
+            pass
+        return self._buffer[:size]
+
+    async def iter_part(self, size: Optional[int] = None) -> AsyncIterator[bytes]:
+        """
+        依次产出接下来的 size 个字节
+
+        Args:
+            size: 分段长度，None 表示读到数据结束
+        """
+        remaining = size
+        while remaining is None or remaining > 0:
+            if not self._buffer and not await self._fill():
+                return
+            if remaining is None:
+                piece, self._buffer = self._buffer, b""
+            else:
+                piece = self._buffer[:remaining]
+                self._buffer = self._buffer[remaining:]
+                remaining -= len(piece)
+            yield piece
+
+
+def _initial_poll_delay() -> float:
+    """
+    首次轮询延迟
+
+    有历史数据时取最近导入耗时估计的中位数，否则使用配置的初始值；
+    连续出现首次轮询即完成的导入时，再受 _poll_delay_cap 限制（逐步降低）。
+    结果限制在 [_MIN_POLL_DELAY, 最大轮询间隔] 内。
+    """
+    if _import_durations:
+        delay = statistics.median(_import_durations)
+    else:
+        delay = config.COVER_POLL_INITIAL_DELAY
+    if _poll_delay_cap is not None:
+        delay = min(delay, _poll_delay_cap)
+    return min(max(delay, _MIN_POLL_DELAY), config.COVER_POLL_MAX_INTERVAL)
+
+
+def normalize_image_url(image_url: str) -> str:
+    """
+    规范化图片 URL：去除查询参数并升级为 HTTPS（用作缓存与合并键）
+
+    Args:
+        image_url: 原始图片 URL
+
+    Returns:
+        规范化后的 URL
+    """
+    image_url = image_url.split("?")[0]
+    if image_url.startswith("http://"):
+        image_url = "https://" + image_url[len("http://") :]
+        logger.warning(f"Upgraded image URL from HTTP to HTTPS: {image_url}")
+    return image_url
+
+
+def get_upload_scheduler() -> PriorityLimiter:
+    """获取进程级封面上传调度器（按优先级分配并发名额）"""
+    global _upload_scheduler
+    if _upload_scheduler is None:
+        _upload_scheduler = PriorityLimiter(
+            "cover_upload", config.COVER_UPLOAD_CONCURRENCY
+        )
+    return _upload_scheduler
+
+
+def get_image_http_client() -> httpx.AsyncClient:
+    """获取下载封面图片用的共享 httpx 客户端（连接池复用）"""
+    global _image_client
+    if _image_client is None:
+        _image_client = httpx.AsyncClient(timeout=10.0, follow_redirects=True)
+    return _image_client
+
+
+async def close_image_http_client() -> None:
+    """关闭封面图片下载客户端（由 lifespan 调用）"""
+    global _image_client
+    if _image_client is not None:
+        await _image_client.aclose()
+        _image_client = None
+
+
+def parse_expiry_time(upload: Dict[str, Any]) -> Optional[float]:
+    """解析 file upload 对象的 expiry_time（ISO 8601）为 epoch 秒"""
+    expiry_time = upload.get("expiry_time")
+    if not expiry_time:
+        return None
+    try:
+        return datetime.fromisoformat(expiry_time).timestamp()
+    except ValueError:
+        logger.warning(f"Unrecognized expiry_time: {expiry_time}")
+        return None
+
+
+def get_upload_stats() -> Dict[str, Any]:
+    """封面上传统计（用于 /stats）"""
+    durations = list(_import_durations)
+    return {
+        "cache": dict(_cache_stats),
+        "recent_imports": len(durations),
+        "median_import_seconds": (
+            round(statistics.median(durations), 3) if durations else None
+        ),
+        "max_import_seconds": round(max(durations), 3) if durations else None,
+        "mode": config.COVER_UPLOAD_MODE,
+        "recent_direct_uploads": len(_direct_durations),
+        "median_direct_upload_seconds": (
+            round(statistics.median(_direct_durations), 3)
+            if _direct_durations
+            else None
+        ),
+        "next_initial_poll_delay": round(_initial_poll_delay(), 3),
+        "initial_poll_delay_cap": (
+            round(_poll_delay_cap, 3) if _poll_delay_cap is not None else None
+        ),
+        "singleflight": _upload_flight.stats(),
+        "format_cache": get_format_cache().stats(),
+        "scheduler": get_upload_scheduler().stats(),
+        "image_store": get_image_store().stats(),
+    }
+
 
 class CoverUploader:
     """封面文件上传，生成file_upload_id"""
 
-    def __init__(self, image_url: str, image_name: str, token: Optional[str] = None):
-        """同步初始化"""
-        self.token = token or config.NOTION_TOKEN
-        self.client = AsyncClient(auth=self.token)
-        image_url = image_url.split("?")[0]
-        if image_url.startswith("http://"):
-            image_url = "https://" + image_url[len("http://") :]
-            logger.warning(f"Upgraded image URL from HTTP to HTTPS: {image_url}")
-        self.image_url = image_url
+    def __init__(
+        self,
+        image_url: str,
+        image_name: str,
+        token: Optional[str] = None,
+        client: Optional[AsyncClient] = None,
+        priority: int = PRIORITY_INTERACTIVE,
+    ):
+        """
+        同步初始化
+
+        Args:
+            image_url: 图片URL
+            image_name: 上传文件名前缀
+            token: Notion API Token，仅在需要使用其他 Token 时传入
+            client: 注入的 Notion 异步客户端，默认使用进程级共享客户端
+            priority: 上传调度优先级（webhook 为 interactive，后台任务为 background）
+        """
+        # 仅关闭自己创建的客户端，注入/共享的客户端由 lifespan 管理
+        self._owns_client = client is None and token is not None
+        if client is None:
+            client = get_notion_client() if token is None else AsyncClient(auth=token)
+        self.client = client
+        self.image_url = normalize_image_url(image_url)
         self.image_name = image_name
+        self.priority = priority
+        # 本次上传开始前磁盘缓存中是否已有该图片（即过期后重新上传）
+        self._cached_locally = False
+        # direct 模式边下载边发送时顺带计算的内容哈希
+        self._streamed_hash: Optional[str] = None
         # 延迟初始化，先设为 None
         self.image_name_ext: Optional[str] = None
         self.image_name_all: Optional[str] = None
 
+    def escalate(self, priority: int) -> None:
+        """
+        提升上传优先级（高优先级调用方加入同一上传任务时调用）
+
+        尚未排队时之后按新优先级排队，已在调度器中排队时直接提升
+
+        Args:
+            priority: 新的优先级（只升不降）
+        """
+        if priority >= self.priority:
+            return
+        self.priority = priority
+        if get_upload_scheduler().promote(self, priority):
+            logger.info(f"Cover upload for {self.image_name} promoted to {priority}")
+
     async def __aenter__(self):
-        """进入上下文时完成异步初始化"""
-        self.image_name_ext = await self._detect_image_format()
-        self.image_name_all = f"{self.image_name}_cover.{self.image_name_ext}"
+        """进入上下文（文件名在缓存未命中、需要时才确定，见 _ensure_image_name）"""
         return self
 
     async def __aexit__(self, exc_type, exc, tb):
-        await self.client.aclose()
+        if self._owns_client:
+            await self.client.aclose()
+
+    def _set_image_format(self, fmt: str) -> None:
+        """设置扩展名及完整上传文件名，并记入格式缓存"""
+        self.image_name_ext = fmt
+        self.image_name_all = f"{self.image_name}_cover.{fmt}"
+        get_format_cache().set(self.image_url, fmt)
+
+    async def _ensure_image_name(self) -> None:
+        """确定上传文件名（扩展名优先取格式缓存，未命中时探测）"""
+        if self.image_name_all is not None:
+            return
+        fmt = get_format_cache().get(self.image_url)
+        if fmt is None:
+            fmt = await self._detect_image_format()
+        self._set_image_format(fmt)
 
     async def _detect_image_format(self) -> str:
-        """Detect the image format by reading the magic number from the image URL."""
-        MAGIC_NUMBERS = {
-            b"\x89PNG\r\n\x1a\n": "png",
-            b"\xff\xd8\xff": "jpg",
-        }
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            async with client.stream("GET", self.image_url) as resp:
-                try:
-                    resp.raise_for_status()
-                except httpx.HTTPStatusError as e:
-                    logger.error(
-                        f"Failed to fetch image from URL {self.image_url} with status code {resp.status_code}: {e}"
-                    )
-                    raise Exception(
-                        f"Failed to fetch image from URL {self.image_url} with status code {resp.status_code}"
-                    ) from e
+        """
+        Detect the image format from the first bytes of the image.
+
+        Only the first 16 bytes are requested (Range) on the pooled image
+        client; servers that ignore Range are read no further than that.
+        Falls back to the response Content-Type, then to png.
+        """
+        client = get_image_http_client()
+        headers = {"Range": f"bytes=0-{_HEADER_SIZE - 1}"}
+        async with client.stream("GET", self.image_url, headers=headers) as resp:
+            try:
+                resp.raise_for_status()
+            except httpx.HTTPStatusError as e:
+                logger.error(
+                    f"Failed to fetch image from URL {self.image_url} with status code {resp.status_code}: {e}"
+                )
+                raise Exception(
+                    f"Failed to fetch image from URL {self.image_url} with status code {resp.status_code}"
+                ) from e
 
-                # 使用 aiter_bytes 读取前8个字节, 指定 chunk_size=8, 第一个 chunk 就足够
-                header = b""
-                async for chunk in resp.aiter_bytes(chunk_size=8):
-                    header = chunk[:8]
+            header = b""
+            async for chunk in resp.aiter_bytes():
+                header += chunk
+                if len(header) >= _HEADER_SIZE:
                     break
+            content_type = resp.headers.get("content-type", "")
+
+        fmt = detect_image_format(header)
+        if fmt is None:
+            fmt = _FORMATS_BY_CONTENT_TYPE.get(
+                content_type.split(";")[0].strip().lower()
+            )
+        if fmt is None:
+            logger.warning(f"Unknown image format, defaulting to png: {self.image_url}")
+            return "png"
+        return fmt
+
+    async def _hash_image(self) -> Optional[str]:
+        """
+        获取图片内容哈希，不额外增加图片传输
+
+        磁盘缓存中已有该 URL 时直接返回已知哈希；否则仅在 direct 模式且磁盘缓存
+        可用时预先下载一次（写入磁盘缓存），未命中去重时 direct 上传直接读取
+        本地文件。external_url 模式由 Notion 下载图片，预先下载会多一次完整
+        传输，因此不计算哈希。
+
+        Returns:
+            SHA-256 十六进制摘要，无法零额外传输获得或下载失败时返回 None
+        """
+        store = get_image_store()
+        content_hash = store.get_hash(self.image_url)
+        if content_hash is not None:
+            return content_hash
+        if config.COVER_UPLOAD_MODE != "direct" or not store.enabled:
+            return None
 
-        for magic, fmt in MAGIC_NUMBERS.items():
-            if header.startswith(magic):
-                return fmt
+        writer = store.writer(self.image_url)
+        assert writer is not None
+        try:
+            client = get_image_http_client()
+            async with client.stream("GET", self.image_url) as resp:
+                resp.raise_for_status()
+                async for chunk in resp.aiter_bytes():
+                    await writer.write(chunk)
+        except BaseException as e:
+            await writer.abort()
+            if isinstance(e, httpx.HTTPError):
+                logger.warning(f"Failed to hash image {self.image_url}: {e}")
+                return None
+            raise
+        return await writer.commit()
 
-        return "png"  # Default to png if unknown
+    async def _find_by_content(
+        self, content_hash: str
+    ) -> Optional[Tuple[str, Optional[float]]]:
+        """
+        按内容哈希查找已上传的相同图片，并确认该上传仍然有效
+
+        Returns:
+            (file_upload_id, 过期时间 epoch 秒或 None)，未找到或已失效时返回 None
+        """
+        file_upload_id = cover_cache.get_by_hash(content_hash)
+        if not file_upload_id:
+            return None
+        upload = await self._check_upload(file_upload_id)
+        if upload is None:
+            await cover_cache.discard_hash_id(file_upload_id)
+            return None
+        logger.info(
+            f"Found identical image by content hash: {self.image_name} -> {file_upload_id}"
+        )
+        return file_upload_id, parse_expiry_time(upload)
 
     async def _wait_for_upload_completion(
-        self, file_upload_id: str, poll_interval: int = 5, max_wait_time: int = 300
-    ) -> None:
+        self, file_upload_id: str, max_wait_time: int = 300
+    ) -> Dict[str, Any]:
         """
         Wait for file upload/import to complete.
 
+        Polls adaptively: the first check happens after a delay tuned from
+        recently observed import durations, then the interval doubles up to
+        COVER_POLL_MAX_INTERVAL.
+
         Args:
             file_upload_id: The file upload ID.
-            poll_interval: Polling interval in seconds.
             max_wait_time: Maximum wait time in seconds.
+
+        Returns:
+            The final file upload object (status "uploaded").
         """
+        global _poll_delay_cap
         start_time = time.monotonic()
+        max_interval = config.COVER_POLL_MAX_INTERVAL
+        delay = _initial_poll_delay()
+        first_delay = delay
+        # 上一次检查到 pending 的时间（相对 start_time），None 表示尚未检查
+        last_pending: Optional[float] = None
 
         while time.monotonic() - start_time < max_wait_time:
+            await asyncio.sleep(delay)
             upload_status = await self.client.file_uploads.retrieve(
                 file_upload_id=file_upload_id
             )
@@ -97,8 +503,18 @@ class CoverUploader:
             logger.info(f"Current status: {status}")
 
             if status == "uploaded":
-                logger.info("File uploaded successfully!")
-                return
+                elapsed = time.monotonic() - start_time
+                if last_pending is None:
+                    # 首次检查即已完成：elapsed 只是上限（含等待时间），
+                    # 不计入中位数，改为降低下次首次轮询延迟
+                    _poll_delay_cap = max(
+                        _MIN_POLL_DELAY, first_delay * _POLL_DELAY_SHRINK
+                    )
+                else:
+                    _import_durations.append((last_pending + elapsed) / 2)
+                    _poll_delay_cap = None
+                logger.info(f"File uploaded successfully in {elapsed:.2f}s!")
+                return upload_status
 
             elif status == "failed":
                 error_msg = f"File upload failed for '{self.image_name}'"
@@ -114,35 +530,59 @@ class CoverUploader:
                 raise Exception(error_msg)
 
             elif status == "pending":
-                logger.debug(
-                    f"File is processing, retrying in {poll_interval} seconds..."
-                )
-                await asyncio.sleep(poll_interval)
+                last_pending = time.monotonic() - start_time
+                delay = min(delay * 2, max_interval)
+                logger.debug(f"File is processing, retrying in {delay:.2f} seconds...")
 
             else:
+                last_pending = time.monotonic() - start_time
+                delay = min(delay * 2, max_interval)
                 logger.warning(f"Unknown status: {status}, continuing to wait...")
-                await asyncio.sleep(poll_interval)
 
         raise TimeoutError(
             f"File upload timed out for {self.image_name} ({self.image_url}) after {max_wait_time} seconds"
         )
 
-    async def _find_in_notion_uploads(
-        self, start_cursor: Optional[str] = None
-    ) -> Optional[str]:
+    async def _find_in_notion_uploads(self) -> Optional[Tuple[str, Optional[float]]]:
         """
-        从 Notion 的 file uploads 列表中查找已上传的文件
+        从 Notion 已上传文件中查找同名文件
 
-        Args:
-            start_cursor: 分页游标
+        优先使用本地文件名索引（O(1)）：已知过期时间且距过期超过
+        COVER_CACHE_EXPIRY_MARGIN 的条目直接使用（与 CoverCache.is_trusted 一致，
+        无网络请求）；过期时间未知的条目先向 Notion 校验，失效时从索引移除。
+        索引尚未完成首次同步时，回退为查询 Notion 最近 100 条上传记录。
 
         Returns:
-            file_upload_id 或 None
+            (file_upload_id, 过期时间) 或 None
         """
+        index = get_upload_index()
+        if index.ready:
+            entry = index.get_entry(self.image_name_all)
+            if entry is None:
+                return None
+            file_upload_id = entry["id"]
+            if entry["expires_at"] is not None:
+                # 临近过期的条目已被索引淘汰，剩下的可以直接信任
+                logger.info(
+                    f"Found existing upload in index: {self.image_name_all} -> {file_upload_id}"
+                )
+                return file_upload_id, entry["expires_at"]
+            upload = await self._check_upload(file_upload_id)
+            if upload is None:
+                logger.info(
+                    f"Indexed upload {file_upload_id} for {self.image_name_all} is no longer valid"
+                )
+                await index.discard_id(file_upload_id)
+                return None
+            logger.info(
+                f"Found existing upload in index: {self.image_name_all} -> {file_upload_id}"
+            )
+            return file_upload_id, parse_expiry_time(upload)
+
         try:
             # 调用 Notion API 获取 file uploads 列表
             response = await self.client.file_uploads.list(
-                status="uploaded", page_size=100, start_cursor=start_cursor
+                status="uploaded", page_size=100
             )
 
             for file_info in response.get("results", []):
@@ -151,11 +591,8 @@ class CoverUploader:
                     logger.info(
                         f"Found existing upload in Notion: {self.image_name_all} -> {file_upload_id}"
                     )
-                    return file_upload_id
+                    return file_upload_id, parse_expiry_time(file_info)
 
-            # 如果还有更多页，继续查找
-            # if response.get("has_more") and response.get("next_cursor"):
-            #     return await self._find_in_notion_uploads(response["next_cursor"])
             logger.debug(f"File not found in recent 100 uploads: {self.image_name_all}")
             return None
 
@@ -163,15 +600,36 @@ class CoverUploader:
             logger.warning(f"Failed to query Notion file uploads: {e}")
             return None
 
-    async def _do_upload(self) -> str:
+    async def _do_upload(self) -> Tuple[str, Optional[float]]:
         """
         执行实际的上传操作
 
         Returns:
-            file_upload_id
+            (file_upload_id, 过期时间 epoch 秒或 None)
         """
         logger.info(f"Uploading image: {self.image_name_all}")
 
+        # 过期后重新上传（此前已下载过该图片）或 direct 模式下，优先直接发送磁盘缓存中的文件
+        local_path = None
+        if self._cached_locally or config.COVER_UPLOAD_MODE == "direct":
+            local_path = get_image_store().get_path(self.image_url)
+        if local_path is not None or config.COVER_UPLOAD_MODE == "direct":
+            upload = await self._direct_upload(local_path)
+        else:
+            upload = await self._import_external_url()
+        file_upload_id = upload["id"]
+        expires_at = parse_expiry_time(upload)
+        await get_upload_index().add(self.image_name_all, file_upload_id, expires_at)
+
+        return file_upload_id, expires_at
+
+    async def _import_external_url(self) -> Dict[str, Any]:
+        """
+        external_url 模式：由 Notion 从图片 URL 导入，轮询直到完成
+
+        Returns:
+            完成后的 file upload 对象
+        """
         # 创建文件上传
         response = await self.client.file_uploads.create(
             mode="external_url",
@@ -182,63 +640,404 @@ class CoverUploader:
         logger.info(f"File upload created with ID: {file_upload_id}")
 
         # Wait for file upload to complete
-        await self._wait_for_upload_completion(file_upload_id)
+        return await self._wait_for_upload_completion(file_upload_id)
 
-        return file_upload_id
+    async def _direct_upload(self, local_path: Optional[Path] = None) -> Dict[str, Any]:
+        """
+        direct 模式：流式读取图片并直接发送到 Notion
+
+        本地磁盘缓存中已有图片时直接读取本地文件（mmap），否则只下载一次，
+        数据块边下载边转发（同时写入磁盘缓存），不在内存中缓冲整个文件。
 
-    async def _is_upload_valid(self, file_upload_id: str) -> bool:
-        """检查 file_upload_id 是否仍然有效（状态为 uploaded）"""
+        Args:
+            local_path: 磁盘缓存中的图片文件，None 表示从图片 URL 下载
+
+        Returns:
+            完成后的 file upload 对象（status 为 uploaded）
+        """
+        start_time = time.monotonic()
+        if local_path is not None:
+            size = local_path.stat().st_size
+            reader = _ChunkReader(ImageDiskCache.iter_file(local_path))
+            upload = await self._send_image(reader, size)
+        else:
+            upload = await self._download_and_send()
+
+        if upload.get("status") != "uploaded":
+            raise Exception(
+                f"File upload failed for '{self.image_name}': status {upload.get('status')} (URL: {self.image_url})"
+            )
+        elapsed = time.monotonic() - start_time
+        _direct_durations.append(elapsed)
+        source = "local cache" if local_path is not None else "source"
+        logger.info(
+            f"File uploaded directly from {source} in {elapsed:.2f}s: {upload['id']}"
+        )
+        return upload
+
+    async def _download_and_send(self) -> Dict[str, Any]:
+        """流式下载图片并转发到 Notion，同时计算内容哈希，完整读取后归档到磁盘缓存"""
+        writer = get_image_store().writer(self.image_url)
+        digest = hashlib.sha256()
+        try:
+            async with get_image_http_client().stream("GET", self.image_url) as resp:
+                if resp.is_error:
+                    raise Exception(
+                        f"Failed to fetch image from URL {self.image_url} with status code {resp.status_code}"
+                    )
+                reader = _ChunkReader(_hashed(_tee(resp.aiter_bytes(), writer), digest))
+
+                # 有内容编码时 Content-Length 是编码后的长度，不能作为文件大小
+                size: Optional[int] = None
+                if "content-encoding" not in resp.headers:
+                    try:
+                        size = int(resp.headers["content-length"])
+                    except (KeyError, ValueError):
+                        size = None
+
+                upload = await self._send_image(reader, size)
+                complete = await reader.peek(1) == b""
+        except BaseException:
+            if writer is not None:
+                await writer.abort()
+            raise
+
+        if complete:
+            self._streamed_hash = digest.hexdigest()
+        if writer is not None:
+            if complete:
+                await writer.commit()
+            else:
+                await writer.abort()
+        return upload
+
+    async def _send_image(
+        self, reader: "_ChunkReader", size: Optional[int]
+    ) -> Dict[str, Any]:
+        """
+        创建 file upload 并发送图片内容
+
+        不超过 20MB（或大小未知）时使用 single_part，否则按 10MB 分片
+        使用 multi_part 并在最后调用 complete。
+
+        Args:
+            reader: 图片数据
+            size: 图片字节数，未知为 None
+
+        Returns:
+            send / complete 接口返回的 file upload 对象
+        """
+        # 以实际内容为准修正扩展名
+        detected = detect_image_format(await reader.peek(_HEADER_SIZE))
+        if detected and detected != self.image_name_ext:
+            logger.info(
+                f"Image format corrected from {self.image_name_ext} to {detected}: {self.image_url}"
+            )
+            self._set_image_format(detected)
+        content_type = _CONTENT_TYPES.get(
+            self.image_name_ext or "", "application/octet-stream"
+        )
+
+        if size is None or size <= _SINGLE_PART_LIMIT:
+            response = await self.client.file_uploads.create(
+                mode="single_part",
+                filename=self.image_name_all,
+                content_type=content_type,
+            )
+            return await self._send(
+                response["id"], reader.iter_part(), content_type, size
+            )
+
+        number_of_parts = math.ceil(size / _MULTI_PART_SIZE)
+        response = await self.client.file_uploads.create(
+            mode="multi_part",
+            filename=self.image_name_all,
+            content_type=content_type,
+            number_of_parts=number_of_parts,
+        )
+        file_upload_id = response["id"]
+        for part_number in range(1, number_of_parts + 1):
+            part_size = min(
+                _MULTI_PART_SIZE, size - (part_number - 1) * _MULTI_PART_SIZE
+            )
+            await self._send(
+                file_upload_id,
+                reader.iter_part(part_size),
+                content_type,
+                part_size,
+                part_number=part_number,
+            )
+        return await self.client.file_uploads.complete(file_upload_id=file_upload_id)
+
+    async def _send(
+        self,
+        file_upload_id: str,
+        data: AsyncIterator[bytes],
+        content_type: str,
+        size: Optional[int],
+        part_number: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        以流式 multipart/form-data 请求体调用 file upload send 接口
+
+        SDK 的 send 会把整个文件读入内存后再编码，这里手动拼接 multipart
+        边界，直接在共享的 Notion httpx 客户端上发送（同样经过限流传输层）。
+
+        Args:
+            file_upload_id: file upload ID
+            data: 文件内容数据块
+            content_type: 文件的 Content-Type
+            size: 文件（分片）字节数，未知时使用分块传输编码
+            part_number: multi_part 模式下的分片序号（从 1 开始）
+
+        Returns:
+            send 接口返回的 file upload 对象
+        """
+        boundary = uuid.uuid4().hex
+        filename = (self.image_name_all or "").replace('"', "%22")
+        head = ""
+        if part_number is not None:
+            head += (
+                f"--{boundary}\r\n"
+                f'Content-Disposition: form-data; name="part_number"\r\n\r\n'
+                f"{part_number}\r\n"
+            )
+        head += (
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        )
+        head_bytes = head.encode("utf-8")
+        tail_bytes = f"\r\n--{boundary}--\r\n".encode("utf-8")
+
+        async def body() -> AsyncIterator[bytes]:
+            yield head_bytes
+            async for chunk in data:
+                yield chunk
+            yield tail_bytes
+
+        headers = {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+        if size is not None:
+            headers["Content-Length"] = str(len(head_bytes) + size + len(tail_bytes))
+
+        resp = await self.client.client.post(
+            f"file_uploads/{file_upload_id}/send", content=body(), headers=headers
+        )
+        if resp.is_error:
+            raise Exception(
+                f"File upload send failed for '{self.image_name}' with status code {resp.status_code}: {resp.text}"
+            )
+        return resp.json()
+
+    async def _check_upload(self, file_upload_id: str) -> Optional[Dict[str, Any]]:
+        """
+        检查 file_upload_id 是否仍然有效（状态为 uploaded）
+
+        Returns:
+            有效时返回 file upload 对象，否则返回 None
+        """
         try:
             resp = await self.client.file_uploads.retrieve(
                 file_upload_id=file_upload_id
             )
-            return resp.get("status") == "uploaded"
+            return resp if resp.get("status") == "uploaded" else None
         except Exception as e:
             logger.warning(f"Failed to verify upload status for {file_upload_id}: {e}")
-            return False
+            return None
 
     async def image_upload(self) -> str:
         """
         上传图片到Notion（带缓存机制）
 
         查找顺序：
-        1. 本地内存/文件缓存（校验有效性）
+        1. 本地内存/文件缓存（信任窗口内直接使用，临近过期时才校验）
         2. Notion file uploads API
-        3. 实际上传
+        3. 图片内容哈希（其他 URL 已上传过相同图片时直接复用）
+        4. 实际上传
 
         Returns:
             file_upload_id: 上传成功后的文件ID
         """
-        # 1. 先查本地缓存，命中后校验是否已过期
-        cached_id = cover_cache.get(self.image_url)
-        if cached_id:
-            if await self._is_upload_valid(cached_id):
+        # 1. 先查本地缓存，信任窗口内直接返回，否则校验是否已过期
+        entry = cover_cache.get_entry(self.image_url)
+        if entry:
+            cached_id = entry["id"]
+            if cover_cache.is_trusted(entry):
+                _cache_stats["trusted_hits"] += 1
                 logger.info(f"Cache hit for {self.image_name}: {cached_id}")
                 return cached_id
-            else:
-                logger.warning(
-                    f"Cached file upload {cached_id} is expired, invalidating cache and re-uploading"
+
+            upload = await self._check_upload(cached_id)
+            if upload is not None:
+                _cache_stats["validated_hits"] += 1
+                await cover_cache.mark_validated(
+                    self.image_url, parse_expiry_time(upload)
                 )
-                await cover_cache.delete(self.image_url)
-
-        # 2. 查询 Notion 已上传文件列表
-        logger.info(f"Cache miss, querying Notion file uploads for: {self.image_name}")
-        notion_id = await self._find_in_notion_uploads()
-        if notion_id:
-            # 找到了，更新本地缓存
-            await cover_cache.set(self.image_url, notion_id)
+                logger.info(
+                    f"Cache hit (revalidated) for {self.image_name}: {cached_id}"
+                )
+                return cached_id
+
+            _cache_stats["expired"] += 1
+            logger.warning(
+                f"Cached file upload {cached_id} is expired, invalidating cache and re-uploading"
+            )
+            await cover_cache.delete(self.image_url)
+            await cover_cache.discard_hash_id(cached_id)
+            await get_upload_index().discard_id(cached_id)
+        else:
+            _cache_stats["misses"] += 1
+
+        # 2~4 需要访问 Notion / 图片源，在进程级调度器的名额内执行
+        async with get_upload_scheduler().slot(self.priority, key=self) as waited:
+            if waited > 0.001:
+                logger.info(
+                    f"Cover upload for {self.image_name} queued for {waited:.2f}s"
+                )
+            return await self._lookup_or_upload()
+
+    async def _lookup_or_upload(self) -> str:
+        """
+        缓存未命中时依次查找 Notion 文件名索引、内容哈希，最后实际上传
+
+        Returns:
+            file_upload_id
+        """
+        self._cached_locally = get_image_store().get_hash(self.image_url) is not None
+
+        # 2. 查询 Notion 已上传文件索引（此时才需要确定文件名）
+        await self._ensure_image_name()
+        logger.info(
+            f"Cache miss, looking up Notion file uploads for: {self.image_name}"
+        )
+        found = await self._find_in_notion_uploads()
+        if found:
+            # 找到了（已确认有效），更新本地缓存
+            notion_id, expires_at = found
+            await cover_cache.set(
+                self.image_url,
+                notion_id,
+                expires_at,
+                name=self.image_name,
+                filename=self.image_name_all,
+            )
             return notion_id
 
-        # 3. 都没有，执行实际上传
+        # 3. 按内容哈希查找其他 URL 上传过的相同图片（不额外下载，见 _hash_image）
+        content_hash = await self._hash_image() if config.COVER_CONTENT_DEDUP else None
+        if content_hash:
+            found = await self._find_by_content(content_hash)
+            if found:
+                _cache_stats["content_hits"] += 1
+                file_upload_id, expires_at = found
+                await cover_cache.set(
+                    self.image_url,
+                    file_upload_id,
+                    expires_at,
+                    name=self.image_name,
+                    content_hash=content_hash,
+                    filename=self.image_name_all,
+                )
+                return file_upload_id
+
+        # 4. 都没有，执行实际上传
         logger.info(f"Not found in Notion, uploading: {self.image_name}")
-        file_upload_id = await self._do_upload()
+        file_upload_id, expires_at = await self._do_upload()
+        if config.COVER_CONTENT_DEDUP:
+            # 边下载边发送时得到的哈希，供之后相同内容的图片复用
+            content_hash = (
+                content_hash
+                or self._streamed_hash
+                or get_image_store().get_hash(self.image_url)
+            )
 
         # 更新缓存
-        await cover_cache.set(self.image_url, file_upload_id)
+        await cover_cache.set(
+            self.image_url,
+            file_upload_id,
+            expires_at,
+            name=self.image_name,
+            content_hash=content_hash,
+            filename=self.image_name_all,
+        )
+        if content_hash:
+            await cover_cache.set_hash(content_hash, file_upload_id)
 
         return file_upload_id
 
 
-async def upload_cover(url: str, upload_name: str) -> str:
-    async with CoverUploader(image_url=url, image_name=upload_name) as uploader:
-        return await uploader.image_upload()
+def get_cover_filename(url: str) -> Optional[str]:
+    """
+    获取写入页面 files 属性的封面文件名（供差异比较识别未变化的封面）
+
+    在上传文件名中加入图片 URL 的短哈希：同名专辑更换封面图片时文件名随之变化，
+    不会被误判为未变化。
+
+    Args:
+        url: 图片 URL
+
+    Returns:
+        文件名，缓存中没有上传文件名记录时返回 None
+    """
+    image_url = normalize_image_url(url)
+    entry = cover_cache.get_entry(image_url)
+    filename = entry.get("filename") if entry else None
+    if not filename:
+        return None
+    stem, dot, ext = filename.rpartition(".")
+    tag = hashlib.sha1(image_url.encode("utf-8")).hexdigest()[:8]
+    return f"{stem}_{tag}.{ext}" if dot else f"{filename}_{tag}"
+
+
+async def upload_cover(
+    url: str,
+    upload_name: str,
+    client: Optional[AsyncClient] = None,
+    priority: int = PRIORITY_INTERACTIVE,
+) -> str:
+    """
+    上传封面并返回 file_upload_id
+
+    同一图片 URL（规范化后）的并发调用只执行一次查找/上传，
+    后到的调用者等待并共享首个调用的结果。
+
+    Args:
+        url: 图片 URL
+        upload_name: 上传文件名前缀
+        client: 注入的 Notion 异步客户端
+        priority: 上传调度优先级（合并的并发调用按其中最高的优先级调度）
+
+    Returns:
+        file_upload_id
+    """
+
+    image_url = normalize_image_url(url)
+    if priority != PRIORITY_BACKGROUND:
+        # 后台任务（如巡检重新上传）的调用不计为使用，冷门封面才能被淘汰
+        cover_cache.touch(image_url)
+
+    # 加入进行中的上传时，后台任务不能让 webhook 在低优先级队列中等待
+    running = _flight_uploaders.get(image_url)
+    if running is not None:
+        running.escalate(priority)
+
+    def start() -> Awaitable[str]:
+        # 在 SingleFlight 创建任务时同步登记，保证之后加入的调用方能找到它
+        uploader = CoverUploader(
+            image_url=image_url,
+            image_name=upload_name,
+            client=client,
+            priority=priority,
+        )
+        _flight_uploaders[image_url] = uploader
+        return upload(uploader)
+
+    async def upload(uploader: CoverUploader) -> str:
+        try:
+            async with uploader:
+                return await uploader.image_upload()
+        finally:
+            if _flight_uploaders.get(image_url) is uploader:
+                del _flight_uploaders[image_url]
+
+    return await _upload_flight.do(image_url, start)
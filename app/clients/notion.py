@@ -6,27 +6,146 @@ Notion API客户端
 负责与Notion API进行交互（异步版本）
 """
 
+import httpx
 from typing import Dict, Any, Optional
 from notion_client import AsyncClient
 
 from app.utils.config import config
 from app.utils.logger import setup_logger
+from app.utils.rate_limiter import AsyncTokenBucket
 
 logger = setup_logger(__name__)
 
+# 进程级共享的 Notion 客户端（复用连接池与 TLS 连接）
+_notion_client: AsyncClient | None = None
+
+# 所有 Notion 请求共用的限流器（Notion 限制约 3 请求/秒/集成）
+_notion_limiter: AsyncTokenBucket | None = None
+_notion_transport: "RateLimitedTransport | None" = None
+
+
+def get_notion_rate_limiter() -> AsyncTokenBucket:
+    """获取 Notion 限流器（延迟初始化）"""
+    global _notion_limiter
+    if _notion_limiter is None:
+        _notion_limiter = AsyncTokenBucket(
+            name="notion",
+            rate=config.NOTION_RATE_LIMIT,
+            capacity=config.NOTION_RATE_BURST,
+        )
+    return _notion_limiter
+
+
+class RateLimitedTransport(httpx.AsyncBaseTransport):
+    """
+    限流 httpx 传输层
+
+    每个请求发出前先从共享令牌桶获取令牌；收到 429 时按 Retry-After
+    暂停整个令牌桶（所有排队请求一起退避），然后自动重发。
+    """
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        limiter: AsyncTokenBucket,
+        max_retries: int,
+    ):
+        self._transport = transport
+        self.limiter = limiter
+        self.max_retries = max_retries
+        self.throttled = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        attempt = 0
+        while True:
+            await self.limiter.acquire()
+            response = await self._transport.handle_async_request(request)
+            # 流式请求体无法重发，直接把 429 交给调用方
+            replayable = isinstance(request.stream, httpx.SyncByteStream)
+            if (
+                response.status_code != 429
+                or attempt >= self.max_retries
+                or not replayable
+            ):
+                return response
+
+            self.throttled += 1
+            attempt += 1
+            delay = self._retry_after(response, attempt)
+            await response.aclose()
+            logger.warning(
+                f"Notion rate limited {request.method} {request.url.path}, "
+                f"retry {attempt}/{self.max_retries} in {delay:.1f}s"
+            )
+            self.limiter.pause(delay)
+
+    @staticmethod
+    def _retry_after(response: httpx.Response, attempt: int) -> float:
+        """解析 Retry-After（秒），缺失时按指数退避"""
+        try:
+            return max(0.0, float(response.headers["Retry-After"]))
+        except (KeyError, ValueError):
+            return min(2.0 ** (attempt - 1), 30.0)
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def get_notion_client() -> AsyncClient:
+    """获取共享的 Notion 异步客户端（延迟初始化，通常由 lifespan 提前创建）"""
+    global _notion_client, _notion_transport
+    if _notion_client is None:
+        _notion_transport = RateLimitedTransport(
+            httpx.AsyncHTTPTransport(
+                limits=httpx.Limits(
+                    max_connections=config.NOTION_MAX_CONNECTIONS,
+                    max_keepalive_connections=config.NOTION_MAX_CONNECTIONS,
+                    keepalive_expiry=config.NOTION_KEEPALIVE_EXPIRY,
+                ),
+            ),
+            limiter=get_notion_rate_limiter(),
+            max_retries=config.NOTION_MAX_RETRIES,
+        )
+        _notion_client = AsyncClient(
+            auth=config.NOTION_TOKEN,
+            client=httpx.AsyncClient(transport=_notion_transport),
+        )
+    return _notion_client
+
+
+def get_notion_stats() -> Dict[str, Any]:
+    """Notion 请求统计（用于 /stats）"""
+    return {
+        "rate_limiter": get_notion_rate_limiter().stats(),
+        "throttled_429": _notion_transport.throttled if _notion_transport else 0,
+    }
+
+
+async def close_notion_client() -> None:
+    """关闭共享的 Notion 异步客户端"""
+    global _notion_client, _notion_transport
+    if _notion_client is not None:
+        await _notion_client.aclose()
+        _notion_client = None
+        _notion_transport = None
+
 
 class NotionClient:
     """Notion API异步客户端"""
 
-    def __init__(self, token: Optional[str] = None):
+    def __init__(
+        self, token: Optional[str] = None, client: Optional[AsyncClient] = None
+    ):
         """
         初始化Notion客户端
 
         Args:
-            token: Notion API Token，默认使用配置中的值
+            token: Notion API Token，仅在需要使用其他 Token 时传入
+            client: 注入的 Notion 异步客户端，默认使用进程级共享客户端
         """
-        self.token = token or config.NOTION_TOKEN
-        self.client = AsyncClient(auth=self.token)
+        if client is None:
+            client = get_notion_client() if token is None else AsyncClient(auth=token)
+        self.client = client
 
     async def update_page(
         self, page_id: str, properties: Dict[str, Any], emoji: str = "🎧"
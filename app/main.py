@@ -14,7 +14,15 @@ from contextlib import asynccontextmanager
 
 from app.api.routes import router, APP_VERSION
 from app.clients.fanjiao import close_http_client
+from app.clients.image_upload import close_image_http_client
+from app.clients.notion import close_notion_client, get_notion_client
+from app.services.cover_sweeper import cover_sweeper
+from app.services.job_queue import job_queue
+from app.services.notion_outbox import notion_outbox
+from app.services.notion_service import NotionService, get_write_coalescer
+from app.utils.cache import cover_cache
 from app.utils.config import config
+from app.utils.upload_index import get_upload_index
 from app.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -24,10 +32,34 @@ logger = setup_logger(__name__)
 async def lifespan(app: FastAPI):
     """应用生命周期管理"""
     app.state.start_time = time.time()
+    # 创建进程级共享的 Notion 客户端，供 NotionService / CoverUploader 复用
+    app.state.notion_client = get_notion_client()
+    # 后台分页同步 Notion 文件上传索引
+    get_upload_index().start(app.state.notion_client)
+    if config.COVER_CACHE_WRITE_BEHIND:
+        cover_cache.start_write_behind()
+    # 后台巡检封面缓存，提前续期或重新上传即将过期的 file_upload_id
+    cover_sweeper.start(app.state.notion_client)
+    if config.NOTION_OUTBOX:
+        # 启动发件箱投递，并重新投递上次未完成的 Notion 写入
+        await notion_outbox.start(NotionService().deliver_outbox)
+    if config.WEBHOOK_ASYNC:
+        # 异步模式：webhook 入队后立即返回，由后台 worker 处理
+        job_queue.start()
     logger.info(f"Application initialized in {config.ENV} mode")
     yield
+    await job_queue.stop()
+    await notion_outbox.stop()
+    # 发送合并中尚未发出的页面写入
+    await get_write_coalescer().flush_all()
+    await cover_sweeper.stop()
+    await get_upload_index().stop()
+    # 最后一次刷盘，保证 write-behind 队列中的缓存写入不丢失
+    await cover_cache.stop_write_behind()
     # 关闭 httpx 客户端（如果已创建）
     await close_http_client()
+    await close_image_http_client()
+    await close_notion_client()
     logger.info("Application shutdown complete")
 
 
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+封面缓存后台巡检服务
+定期批量校验即将失去信任的缓存条目，提前续期、重新上传或淘汰，
+使 webhook 热路径上的缓存命中几乎无需任何 I/O
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, Optional
+
+from notion_client import AsyncClient, APIResponseError
+
+from app.clients.image_upload import parse_expiry_time, upload_cover
+from app.utils.cache import CoverEntry, cover_cache
+from app.utils.config import config
+from app.utils.logger import setup_logger
+from app.utils.priority_limiter import PRIORITY_BACKGROUND
+from app.utils.upload_index import get_upload_index
+
+logger = setup_logger(__name__)
+
+
+class CoverCacheSweeper:
+    """封面缓存巡检器"""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self.last_sweep: Dict[str, Any] = {}
+
+    async def sweep(self, client: AsyncClient) -> Dict[str, int]:
+        """
+        执行一轮巡检
+
+        选出在下一轮巡检前就会失去信任的条目（最久未校验的优先，每轮最多
+        COVER_SWEEP_BATCH 个）：超过 COVER_SWEEP_IDLE_SECONDS 未被使用的直接淘汰，
+        其余以有限并发向 Notion 校验；所有请求同样经过 Notion 共享限流器。
+
+        Args:
+            client: Notion 异步客户端
+
+        Returns:
+            各处理结果的计数
+        """
+        horizon = time.time() + config.COVER_SWEEP_INTERVAL
+        due = [
+            (url, entry)
+            for url, entry in cover_cache.entries()
+            if not cover_cache.is_trusted(entry, now=horizon)
+        ]
+        due.sort(key=lambda item: item[1].get("validated_at", 0))
+        due = due[: config.COVER_SWEEP_BATCH]
+
+        counts = {"checked": 0, "revalidated": 0, "reuploaded": 0, "evicted": 0}
+        if not due:
+            return counts
+
+        semaphore = asyncio.Semaphore(max(1, config.COVER_SWEEP_CONCURRENCY))
+        idle_before = time.time() - config.COVER_SWEEP_IDLE_SECONDS
+
+        async def revalidate(url: str, entry: CoverEntry) -> None:
+            if cover_cache.last_used(url) < idle_before:
+                # 长时间无人使用：不再续期或重新上传
+                await cover_cache.delete(url)
+                counts["evicted"] += 1
+                return
+            async with semaphore:
+                outcome = await self._revalidate(client, url, entry, horizon)
+            counts["checked"] += 1
+            if outcome:
+                counts[outcome] += 1
+
+        await asyncio.gather(*(revalidate(url, entry) for url, entry in due))
+        logger.info(f"Cover cache sweep finished: {counts}")
+        return counts
+
+    async def _revalidate(
+        self, client: AsyncClient, url: str, entry: CoverEntry, horizon: float
+    ) -> Optional[str]:
+        """
+        校验单个条目
+
+        仍有效且在下一轮巡检（horizon）之后才进入过期余量的条目续期；
+        已失效或在此之前就会进入过期余量的条目提前重新上传（没有文件名时淘汰）。
+
+        Returns:
+            "revalidated" / "reuploaded" / "evicted"，临时错误时返回 None（下轮重试）
+        """
+        file_upload_id = entry["id"]
+        try:
+            upload = await client.file_uploads.retrieve(file_upload_id=file_upload_id)
+        except APIResponseError as e:
+            if e.status not in (400, 404):
+                logger.warning(f"Sweep check failed for {file_upload_id}: {e}")
+                return None
+            upload = {"status": "missing"}
+        except Exception as e:
+            logger.warning(f"Sweep check failed for {file_upload_id}: {e}")
+            return None
+
+        if upload.get("status") == "uploaded":
+            expires_at = parse_expiry_time(upload)
+            if (
+                expires_at is None
+                or expires_at - config.COVER_CACHE_EXPIRY_MARGIN > horizon
+            ):
+                await cover_cache.mark_validated(url, expires_at)
+                return "revalidated"
+
+        # 同时移除文件名索引和内容哈希中的旧 ID，否则重新上传时会再次找到它
+        await cover_cache.delete(url)
+        await cover_cache.discard_hash_id(file_upload_id)
+        await get_upload_index().discard_id(file_upload_id)
+        name = entry.get("name")
+        if not name:
+            logger.info(f"Evicted expiring cover upload {file_upload_id}")
+            return "evicted"
+
+        try:
+            # 后台优先级：与 webhook 同时排队时让出上传名额
+            await upload_cover(url, name, client=client, priority=PRIORITY_BACKGROUND)
+            logger.info(f"Re-uploaded expiring cover ahead of time: {name}")
+            return "reuploaded"
+        except Exception as e:
+            logger.warning(f"Failed to re-upload expiring cover {name}: {e}")
+            return "evicted"
+
+    async def _run(self, client: AsyncClient) -> None:
+        """后台巡检循环"""
+        while True:
+            await asyncio.sleep(config.COVER_SWEEP_INTERVAL)
+            started = time.monotonic()
+            try:
+                counts = await self.sweep(client)
+                self.last_sweep = {
+                    **counts,
+                    "finished_at": time.time(),
+                    "duration_seconds": round(time.monotonic() - started, 3),
+                }
+            except Exception as e:
+                logger.warning(f"Cover cache sweep failed: {e}")
+
+    def start(self, client: AsyncClient) -> None:
+        """启动后台巡检任务（由 lifespan 调用），间隔不大于 0 时不启动"""
+        if config.COVER_SWEEP_INTERVAL <= 0:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(client))
+
+    async def stop(self) -> None:
+        """停止后台巡检任务"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        """巡检统计信息"""
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "last_sweep": self.last_sweep,
+        }
+
+
+# 全局巡检器实例
+cover_sweeper = CoverCacheSweeper()
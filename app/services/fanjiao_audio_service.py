@@ -6,10 +6,12 @@ Fanjiao Audio数据获取服务
 负责从Fanjiao获取和处理Audio数据（异步版本）
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 
 from app.clients.fanjiao import FanjiaoAudioClient
+from app.utils.config import config
 from app.utils.logger import setup_logger
+from app.utils.ttl_cache import TTLCache
 
 logger = setup_logger(__name__)
 
@@ -23,6 +25,29 @@ _AUDIO_FIELDS = (
     "play",
 )
 
+# 索引中缺失字段的占位符
+_MISSING = object()
+
+# 单条音频的紧凑记录：按 _AUDIO_FIELDS 顺序排列的值元组
+AudioRecord = Tuple[Any, ...]
+
+# 专辑音频索引：{audio_id: AudioRecord}
+AudioIndex = Dict[int, AudioRecord]
+
+# 延迟初始化的专辑音频索引缓存：{album_id: AudioIndex}
+_audio_cache: TTLCache[str, AudioIndex] | None = None
+
+
+def get_audio_cache() -> TTLCache[str, AudioIndex]:
+    """获取专辑音频索引缓存（延迟初始化）"""
+    global _audio_cache
+    if _audio_cache is None:
+        _audio_cache = TTLCache(
+            maxsize=config.FANJIAO_AUDIO_CACHE_SIZE,
+            ttl=config.FANJIAO_AUDIO_CACHE_TTL,
+        )
+    return _audio_cache
+
 
 class FanjiaoAudioService:
     """Fanjiao Audio数据服务"""
@@ -44,8 +69,17 @@ class FanjiaoAudioService:
             处理后的Audio数据，失败返回None
         """
         try:
-            audio_raw = await self.audio_client.fetch_audio(album_id=album_id)
-            return self._extract_audio_data(audio_raw, audio_id)
+            index, from_cache = await self._fetch_audio_index(album_id)
+            audio_data = self._extract_audio_data(index, audio_id)
+            if audio_data is None and from_cache:
+                # 缓存期内专辑可能新增了音频，失效缓存后重新获取一次
+                logger.info(
+                    f"Audio {audio_id} not in cached album {album_id}, refetching"
+                )
+                get_audio_cache().pop(album_id)
+                index, _ = await self._fetch_audio_index(album_id)
+                audio_data = self._extract_audio_data(index, audio_id)
+            return audio_data
         except Exception as e:
             logger.error(
                 f"Failed to fetch audio data for audio_id {audio_id}: {str(e)}",
@@ -53,31 +87,74 @@ class FanjiaoAudioService:
             )
             return None
 
+    async def _fetch_audio_index(self, album_id: str) -> Tuple[AudioIndex, bool]:
+        """
+        获取专辑音频索引，优先使用缓存
+
+        Args:
+            album_id: 专辑ID
+
+        Returns:
+            (音频索引, 是否来自缓存)
+        """
+        cache = get_audio_cache()
+        cached = cache.get(album_id)
+        if cached is not None:
+            logger.info(f"Audio cache hit for album_id {album_id}")
+            return cached, True
+
+        audio_raw = await self.audio_client.fetch_audio(album_id=album_id)
+        index = self._build_audio_index(audio_raw)
+        # 仅缓存有效响应，避免把错误结果缓存一个 TTL
+        if index:
+            cache.set(album_id, index)
+        return index, False
+
+    @staticmethod
+    def _build_audio_index(raw_data: Dict[str, Any]) -> AudioIndex:
+        """
+        将原始响应构建为 audio_id -> 紧凑记录 的索引
+
+        仅保留 _AUDIO_FIELDS 中的字段，原始音频字典不再被引用
+
+        Args:
+            raw_data: 原始Audio数据
+
+        Returns:
+            音频索引
+        """
+        index: AudioIndex = {}
+        for audio in raw_data.get("data", {}).get("audios_list", []):
+            audio_id = audio.get("audio_id")
+            if audio_id is None:
+                continue
+            index[int(audio_id)] = tuple(audio.get(k, _MISSING) for k in _AUDIO_FIELDS)
+        return index
+
     @staticmethod
     def _extract_audio_data(
-        raw_data: Dict[str, Any], audio_id: str
+        index: AudioIndex, audio_id: str
     ) -> Optional[Dict[str, Any]]:
         """
-        从原始数据中提取Audio信息
+        从专辑音频索引中提取Audio信息
 
         Args:
-            raw_data: 原始Audio数据
+            index: 专辑音频索引
             audio_id: Audio ID
         Returns:
             提取后的Audio信息，失败返回None
         """
-        audios = raw_data.get("data", {}).get("audios_list", [])
-        if not audios:
+        if not index:
             logger.error(f"No audio data found in response for audio_id: {audio_id}")
             return None
 
-        audio_id_int = int(audio_id)
-        for audio in audios:
-            if audio.get("audio_id") == audio_id_int:
-                logger.info(
-                    f"Extracted audio data for audio_id {audio_id}: {audio.get('name')}"
-                )
-                return {k: audio[k] for k in _AUDIO_FIELDS if k in audio}
+        record = index.get(int(audio_id))
+        if record is None:
+            logger.error(f"Audio ID {audio_id} not found in album data")
+            return None
 
-        logger.error(f"Audio ID {audio_id} not found in album data")
-        return None
+        audio = {k: v for k, v in zip(_AUDIO_FIELDS, record) if v is not _MISSING}
+        logger.info(
+            f"Extracted audio data for audio_id {audio_id}: {audio.get('name')}"
+        )
+        return audio
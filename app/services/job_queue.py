@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Webhook 异步任务队列
+webhook 校验请求后将处理流程放入进程内队列并立即返回任务 ID，
+由固定数量的后台 worker 执行；任务状态与耗时可通过 /jobs/{id} 查询
+"""
+
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.utils.config import config
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+JobFn = Callable[[], Awaitable[Any]]
+
+
+class JobQueueFullError(RuntimeError):
+    """任务队列已满，拒绝新任务"""
+
+
+class Job:
+    """单个异步任务"""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+    def __init__(self, kind: str, fn: JobFn, params: Optional[Dict[str, Any]] = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params or {}
+        self.fn: Optional[JobFn] = fn
+        self.status = self.QUEUED
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in (self.SUCCEEDED, self.FAILED)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """任务状态与耗时"""
+        queue_seconds = None
+        run_seconds = None
+        if self.started_at is not None:
+            queue_seconds = round(self.started_at - self.created_at, 3)
+            if self.finished_at is not None:
+                run_seconds = round(self.finished_at - self.started_at, 3)
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "queue_seconds": queue_seconds,
+            "run_seconds": run_seconds,
+        }
+
+
+class JobQueue:
+    """
+    有界异步任务队列
+
+    - 最多 JOB_QUEUE_SIZE 个任务排队，已满时 submit 抛出 JobQueueFullError
+    - JOB_WORKERS 个 worker 并发执行
+    - 保留最近 JOB_HISTORY_SIZE 个任务记录供查询
+    - 停止时不再接受新任务，等待排队与执行中的任务完成（最多
+      JOB_SHUTDOWN_TIMEOUT 秒），超时后才取消剩余任务
+    """
+
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue[Job]] = None
+        self._workers: List[asyncio.Task] = []
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._accepting = False
+        self.succeeded = 0
+        self.failed = 0
+
+    @property
+    def running(self) -> bool:
+        """worker 是否在运行"""
+        return any(not worker.done() for worker in self._workers)
+
+    def start(self) -> None:
+        """启动 worker（由 lifespan 调用）"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=max(1, config.JOB_QUEUE_SIZE))
+        self._workers = [
+            asyncio.create_task(self._worker())
+            for _ in range(max(1, config.JOB_WORKERS))
+        ]
+        self._accepting = True
+        logger.info(f"Job queue started with {len(self._workers)} workers")
+
+    async def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        停止 worker：先等待已接受的任务完成，超时后取消剩余任务并标记为失败
+
+        Args:
+            timeout: 等待时长（秒），默认取 JOB_SHUTDOWN_TIMEOUT
+        """
+        self._accepting = False
+        if timeout is None:
+            timeout = config.JOB_SHUTDOWN_TIMEOUT
+        if self._queue is not None and self.running:
+            pending = self._queue.qsize() + sum(
+                1 for job in self._jobs.values() if job.status == Job.RUNNING
+            )
+            if pending:
+                logger.info(
+                    f"Waiting up to {timeout:.0f}s for {pending} jobs to finish"
+                )
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=timeout)
+            except asyncio.TimeoutError:
+                logger.warning(
+                    f"Job queue did not drain within {timeout:.0f}s, cancelling remaining jobs"
+                )
+        for worker in self._workers:
+            worker.cancel()
+        for worker in self._workers:
+            try:
+                await worker
+            except asyncio.CancelledError:
+                pass
+        self._workers = []
+        for job in self._jobs.values():
+            if not job.done:
+                job.status = Job.FAILED
+                job.error = "Server shutting down"
+                job.finished_at = time.time()
+
+    def submit(
+        self, kind: str, fn: JobFn, params: Optional[Dict[str, Any]] = None
+    ) -> Job:
+        """
+        提交任务
+
+        Args:
+            kind: 任务类型（如 webhook 名称）
+            fn: 无参协程工厂，执行实际处理流程，抛出异常表示失败
+            params: 用于查询展示的任务参数
+
+        Returns:
+            已入队的任务
+
+        Raises:
+            JobQueueFullError: 队列未启动、正在停止或已满
+        """
+        if self._queue is None or not self.running or not self._accepting:
+            raise JobQueueFullError("Job queue is not running")
+        job = Job(kind, fn, params)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFullError(
+                f"Job queue is full ({self._queue.maxsize} pending)"
+            ) from None
+        self._jobs[job.id] = job
+        self._trim_history()
+        logger.info(f"Queued {kind} job {job.id}")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """按 ID 查询任务"""
+        return self._jobs.get(job_id)
+
+    def _trim_history(self) -> None:
+        """只保留最近的任务记录（优先丢弃已完成的旧任务）"""
+        excess = len(self._jobs) - max(1, config.JOB_HISTORY_SIZE)
+        if excess <= 0:
+            return
+        for job_id in [jid for jid, job in self._jobs.items() if job.done][:excess]:
+            del self._jobs[job_id]
+
+    async def _worker(self) -> None:
+        """worker 循环：依次取出任务执行"""
+        assert self._queue is not None
+        while True:
+            job = await self._queue.get()
+            job.status = Job.RUNNING
+            job.started_at = time.time()
+            try:
+                assert job.fn is not None
+                await job.fn()
+                job.status = Job.SUCCEEDED
+                self.succeeded += 1
+            except asyncio.CancelledError:
+                job.status = Job.FAILED
+                job.error = "Cancelled"
+                job.finished_at = time.time()
+                raise
+            except Exception as e:
+                job.status = Job.FAILED
+                job.error = str(getattr(e, "detail", None) or e)
+                self.failed += 1
+                logger.error(f"{job.kind} job {job.id} failed: {job.error}")
+            finally:
+                job.fn = None  # 释放闭包引用的请求数据
+                if job.finished_at is None:
+                    job.finished_at = time.time()
+                self._queue.task_done()
+            logger.info(
+                f"{job.kind} job {job.id} {job.status} in {job.finished_at - job.started_at:.2f}s"
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        """队列统计信息"""
+        return {
+            "enabled": config.WEBHOOK_ASYNC,
+            "workers": len(self._workers),
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "running": sum(1 for j in self._jobs.values() if j.status == Job.RUNNING),
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+        }
+
+
+# 全局任务队列实例
+job_queue = JobQueue()
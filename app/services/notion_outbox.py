@@ -0,0 +1,524 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Notion 写入发件箱
+待写入的页面属性先持久化到 SQLite（DATA_DIR/notion_outbox.db），再发送到 Notion；
+发送失败按退避计划重试，进程重启后由 lifespan 重新投递未完成的写入。
+封面属性同时保存图片来源，投递时重新解析 file_upload_id（未附加的上传约一小时后过期）。
+"""
+
+import asyncio
+import json
+import sqlite3
+import time
+from contextlib import contextmanager, suppress
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional
+
+from notion_client import APIResponseError
+
+from app.utils.config import config
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# 封面来源：{property_name: {"url": 图片 URL, "name": 上传文件名前缀}}
+CoverSources = Dict[str, Dict[str, str]]
+
+# 投递函数：(page_id, properties, emoji, covers) -> 是否实际发出了写入
+Deliver = Callable[[str, Dict[str, Any], str, CoverSources], Awaitable[bool]]
+
+# 投递期间持有的租约（秒）：投递进行中每 1/3 租约时长续期一次，
+# 进程在投递中途退出时，租约过期后重新投递
+_LEASE_SECONDS = 60.0
+
+# 不会因重试而成功的 Notion 错误状态码（请求内容或权限问题）
+_PERMANENT_STATUSES = {400, 401, 403, 404}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    page_id TEXT PRIMARY KEY,
+    properties TEXT NOT NULL,
+    covers TEXT NOT NULL DEFAULT '{}',
+    emoji TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 1,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    leased_until REAL NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    last_error TEXT,
+    dead INTEGER NOT NULL DEFAULT 0
+)
+"""
+
+
+def _offending_property(error: Exception, properties: Dict[str, Any]) -> Optional[str]:
+    """
+    从 400 错误信息中找出导致校验失败的属性
+
+    优先匹配错误信息中出现的 file_upload id，其次匹配属性名（取最长的匹配，
+    避免 Cover 误匹配 Cover_square）。
+
+    Returns:
+        属性名，无法确定时返回 None
+    """
+    message = str(error)
+    for name, value in properties.items():
+        for item in value.get("files") or []:
+            file_upload_id = (item.get("file_upload") or {}).get("id")
+            if file_upload_id and file_upload_id in message:
+                return name
+    matches = [name for name in properties if name in message]
+    return max(matches, key=len) if matches else None
+
+
+class NotionOutbox:
+    """
+    基于 SQLite 的 Notion 写入发件箱
+
+    - 每个页面最多一行：新的写入与未完成的写入按属性合并（后写覆盖），
+      避免旧写入重试时覆盖新数据
+    - 每次合并递增 version；投递成功后仅在 version 未变时删除该行，
+      否则立即再次投递合并后的内容
+    - 投递前以租约认领该行，防止后台 worker 与即时投递重复发送
+    - 投递进行中定期续租，慢速投递（限流等待、429 退避）不会被重复认领
+    - 临时错误按指数退避重试，超过 NOTION_OUTBOX_MAX_ATTEMPTS 或遇到
+      请求/权限类错误时标记为 dead，保留供排查（新的写入会使其复活）
+    - 400 错误能定位到单个属性时只丢弃该属性，其余属性立即重试
+    - 封面属性记录图片来源，由投递函数在发送前重新解析 file_upload_id
+
+    SQLite 操作均为同步阻塞调用，通过 asyncio.to_thread 执行。
+    """
+
+    def __init__(self, db_file: Optional[Path] = None):
+        """
+        Args:
+            db_file: 数据库文件路径，默认 DATA_DIR/notion_outbox.db
+        """
+        self.db_file = db_file or Path(config.DATA_DIR) / "notion_outbox.db"
+        self._deliver: Optional[Deliver] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._initialized = False
+        self.delivered = 0
+        self.retried = 0
+        self.dead = 0
+        self.dropped_properties = 0
+
+    # ------------------------------------------------------------------
+    # SQLite（同步，在线程池中执行）
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """打开连接并在一个事务中执行（成功提交、异常回滚），结束后关闭连接"""
+        conn = sqlite3.connect(self.db_file, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self) -> None:
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(_SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(outbox)")}
+            if "covers" not in columns:
+                conn.execute(
+                    "ALTER TABLE outbox ADD COLUMN covers TEXT NOT NULL DEFAULT '{}'"
+                )
+
+    def _db_enqueue(
+        self,
+        page_id: str,
+        properties: Dict[str, Any],
+        emoji: str,
+        covers: CoverSources,
+    ) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT properties, covers FROM outbox WHERE page_id = ?", (page_id,)
+            ).fetchone()
+            if row is None:
+                conn.execute(
+                    "INSERT INTO outbox (page_id, properties, covers, emoji,"
+                    " next_attempt_at, created_at, updated_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        page_id,
+                        json.dumps(properties, ensure_ascii=False),
+                        json.dumps(covers, ensure_ascii=False),
+                        emoji,
+                        now,
+                        now,
+                        now,
+                    ),
+                )
+                return
+            merged = {**json.loads(row["properties"]), **properties}
+            # 被新写入覆盖的属性不再沿用旧的封面来源
+            merged_covers = {
+                name: source
+                for name, source in json.loads(row["covers"]).items()
+                if name not in properties
+            }
+            merged_covers.update(covers)
+            conn.execute(
+                "UPDATE outbox SET properties = ?, covers = ?, emoji = ?,"
+                " version = version + 1, attempts = 0, next_attempt_at = ?,"
+                " updated_at = ?, dead = 0, last_error = NULL WHERE page_id = ?",
+                (
+                    json.dumps(merged, ensure_ascii=False),
+                    json.dumps(merged_covers, ensure_ascii=False),
+                    emoji,
+                    now,
+                    now,
+                    page_id,
+                ),
+            )
+
+    def _db_claim(self, page_id: str) -> Optional[sqlite3.Row]:
+        """以租约认领一行，已被认领或不存在时返回 None"""
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE outbox SET leased_until = ? WHERE page_id = ? AND dead = 0"
+                " AND leased_until <= ?",
+                (now + _LEASE_SECONDS, page_id, now),
+            )
+            if cursor.rowcount != 1:
+                return None
+            return conn.execute(
+                "SELECT * FROM outbox WHERE page_id = ?", (page_id,)
+            ).fetchone()
+
+    def _db_renew(self, page_id: str) -> None:
+        """续租（租约已释放时不再重新持有）"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE outbox SET leased_until = ? WHERE page_id = ?"
+                " AND leased_until > ?",
+                (now + _LEASE_SECONDS, page_id, now),
+            )
+
+    def _db_drop_property(
+        self, page_id: str, version: int, name: str, error: str
+    ) -> None:
+        """丢弃校验失败的属性并立即重新投递其余内容（期间有新写入时直接重新投递）"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT properties, covers FROM outbox WHERE page_id = ?"
+                " AND version = ?",
+                (page_id, version),
+            ).fetchone()
+            if row is not None:
+                properties = json.loads(row["properties"])
+                covers = json.loads(row["covers"])
+                properties.pop(name, None)
+                covers.pop(name, None)
+                conn.execute(
+                    "UPDATE outbox SET properties = ?, covers = ?,"
+                    " version = version + 1 WHERE page_id = ?",
+                    (
+                        json.dumps(properties, ensure_ascii=False),
+                        json.dumps(covers, ensure_ascii=False),
+                        page_id,
+                    ),
+                )
+            conn.execute(
+                "UPDATE outbox SET leased_until = 0, next_attempt_at = ?,"
+                " last_error = ? WHERE page_id = ?",
+                (time.time(), error, page_id),
+            )
+
+    def _db_complete(self, page_id: str, version: int) -> bool:
+        """投递成功：version 未变时删除该行，否则释放租约等待再次投递"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "DELETE FROM outbox WHERE page_id = ? AND version = ?",
+                (page_id, version),
+            )
+            if cursor.rowcount == 1:
+                return True
+            conn.execute(
+                "UPDATE outbox SET leased_until = 0, next_attempt_at = ?"
+                " WHERE page_id = ?",
+                (time.time(), page_id),
+            )
+            return False
+
+    def _db_fail(
+        self, page_id: str, version: int, error: str, retry_at: Optional[float]
+    ) -> None:
+        """投递失败：安排重试（retry_at）或标记为 dead（retry_at 为 None）"""
+        with self._connect() as conn:
+            if retry_at is None:
+                conn.execute(
+                    "UPDATE outbox SET dead = 1, leased_until = 0, last_error = ?"
+                    " WHERE page_id = ? AND version = ?",
+                    (error, page_id, version),
+                )
+            conn.execute(
+                "UPDATE outbox SET attempts = attempts + 1, leased_until = 0,"
+                " next_attempt_at = MAX(next_attempt_at, ?), last_error = ?"
+                " WHERE page_id = ? AND dead = 0",
+                (retry_at or time.time(), error, page_id),
+            )
+
+    def _db_due(self, limit: int) -> list[str]:
+        now = time.time()
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT page_id FROM outbox WHERE dead = 0 AND next_attempt_at <= ?"
+                " AND leased_until <= ? ORDER BY next_attempt_at LIMIT ?",
+                (now, now, limit),
+            ).fetchall()
+        return [row["page_id"] for row in rows]
+
+    def _db_next_due(self) -> Optional[float]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT MIN(MAX(next_attempt_at, leased_until)) AS due FROM outbox"
+                " WHERE dead = 0"
+            ).fetchone()
+        return row["due"] if row else None
+
+    def _db_replay(self) -> int:
+        """启动时让所有未完成的写入立即到期（租约仍然有效的除外）"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE outbox SET next_attempt_at = ? WHERE dead = 0",
+                (time.time(),),
+            )
+            return cursor.rowcount
+
+    def _db_counts(self) -> Dict[str, int]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT SUM(dead = 0) AS pending, SUM(dead = 1) AS dead FROM outbox"
+            ).fetchone()
+        return {"pending": row["pending"] or 0, "dead": row["dead"] or 0}
+
+    # ------------------------------------------------------------------
+    # 投递
+    # ------------------------------------------------------------------
+
+    @property
+    def running(self) -> bool:
+        """后台投递任务是否在运行"""
+        return self._task is not None and not self._task.done()
+
+    async def submit(
+        self,
+        page_id: str,
+        properties: Dict[str, Any],
+        emoji: str,
+        covers: Optional[CoverSources] = None,
+    ) -> bool:
+        """
+        写入发件箱并立即尝试投递
+
+        Args:
+            page_id: 页面ID
+            properties: 待写入属性
+            emoji: 页面图标
+            covers: 封面属性的图片来源，投递时据此重新解析 file_upload_id
+
+        Returns:
+            是否已实际发出写入；已持久化但未能立即投递（排队中或等待重试）时
+            返回 True
+
+        Raises:
+            Exception: 请求/权限类等不可重试的错误
+        """
+        await asyncio.to_thread(
+            self._db_enqueue, page_id, properties, emoji, covers or {}
+        )
+        delivered = await self._deliver_one(page_id, raise_permanent=True)
+        if delivered is None:
+            # 其他投递正在进行，合并后的内容由其在完成后再次投递
+            self._wake()
+            return True
+        return delivered
+
+    async def _renew_lease(self, page_id: str) -> None:
+        """投递进行中定期续租"""
+        while True:
+            await asyncio.sleep(_LEASE_SECONDS / 3)
+            await asyncio.to_thread(self._db_renew, page_id)
+
+    async def _deliver_one(
+        self, page_id: str, raise_permanent: bool = False
+    ) -> Optional[bool]:
+        """
+        认领并投递一个页面的待写入内容
+
+        Returns:
+            投递函数的返回值；未能认领时返回 None；失败并安排重试时返回 True
+        """
+        assert self._deliver is not None
+        row = await asyncio.to_thread(self._db_claim, page_id)
+        if row is None:
+            return None
+
+        version = row["version"]
+        properties = json.loads(row["properties"])
+        renew = asyncio.create_task(self._renew_lease(page_id))
+        try:
+            written = await self._deliver(
+                page_id, properties, row["emoji"], json.loads(row["covers"])
+            )
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            permanent = (
+                isinstance(e, APIResponseError) and e.status in _PERMANENT_STATUSES
+            )
+            if permanent and e.status == 400 and len(properties) > 1:
+                name = _offending_property(e, properties)
+                if name is not None:
+                    # 只丢弃校验失败的属性，其余属性立即重试
+                    self.dropped_properties += 1
+                    logger.error(
+                        f"Dropping property {name!r} rejected by Notion for page {page_id}: {error}"
+                    )
+                    await asyncio.to_thread(
+                        self._db_drop_property, page_id, version, name, error
+                    )
+                    self._wake()
+                    return True
+
+            attempts = row["attempts"] + 1
+            if permanent or attempts >= config.NOTION_OUTBOX_MAX_ATTEMPTS:
+                self.dead += 1
+                logger.error(
+                    f"Giving up Notion write for page {page_id} after {attempts} attempts: {error}"
+                )
+                await asyncio.to_thread(self._db_fail, page_id, version, error, None)
+                if permanent and raise_permanent:
+                    raise
+                return True
+
+            delay = min(
+                config.NOTION_OUTBOX_RETRY_BASE * 2 ** (attempts - 1),
+                config.NOTION_OUTBOX_RETRY_MAX,
+            )
+            self.retried += 1
+            logger.warning(
+                f"Notion write for page {page_id} failed, retrying in {delay:.0f}s: {error}"
+            )
+            await asyncio.to_thread(
+                self._db_fail, page_id, version, error, time.time() + delay
+            )
+            self._wake()
+            return True
+        finally:
+            renew.cancel()
+            with suppress(asyncio.CancelledError):
+                await renew
+
+        self.delivered += 1
+        if not await asyncio.to_thread(self._db_complete, page_id, version):
+            # 投递期间有新的写入合并进来，再投递一次
+            self._wake()
+        return written
+
+    def _wake(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def drain(self) -> int:
+        """
+        投递所有已到期的写入（有限并发）
+
+        Returns:
+            本轮处理的页面数
+        """
+        page_ids = await asyncio.to_thread(self._db_due, 100)
+        if not page_ids:
+            return 0
+        semaphore = asyncio.Semaphore(max(1, config.NOTION_OUTBOX_CONCURRENCY))
+
+        async def deliver(page_id: str) -> None:
+            async with semaphore:
+                try:
+                    await self._deliver_one(page_id)
+                except Exception as e:
+                    logger.error(f"Outbox delivery for {page_id} failed: {e}")
+
+        await asyncio.gather(*(deliver(page_id) for page_id in page_ids))
+        return len(page_ids)
+
+    async def _run(self) -> None:
+        """后台投递循环：有到期写入时立即处理，否则等待唤醒或下一个到期时间"""
+        assert self._wakeup is not None
+        while True:
+            self._wakeup.clear()
+            try:
+                if await self.drain():
+                    continue
+                next_due = await asyncio.to_thread(self._db_next_due)
+            except Exception as e:
+                logger.error(f"Notion outbox drain failed: {e}")
+                next_due = None
+            timeout = 30.0 if next_due is None else max(0.0, next_due - time.time())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=min(timeout, 30.0))
+            except asyncio.TimeoutError:
+                pass
+
+    async def start(self, deliver: Deliver) -> None:
+        """
+        启动后台投递（由 lifespan 调用），并重新投递上次未完成的写入
+
+        Args:
+            deliver: 实际写入 Notion 的函数
+        """
+        if self.running:
+            return
+        self._deliver = deliver
+        if not self._initialized:
+            await asyncio.to_thread(self._init_db)
+            self._initialized = True
+        replayed = await asyncio.to_thread(self._db_replay)
+        if replayed:
+            logger.info(f"Replaying {replayed} pending Notion writes from outbox")
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """停止后台投递（未完成的写入保留在发件箱中，下次启动时重新投递）"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def stats(self) -> Dict[str, Any]:
+        """发件箱统计信息"""
+        counts = (
+            await asyncio.to_thread(self._db_counts)
+            if self._initialized
+            else {"pending": 0, "dead": 0}
+        )
+        return {
+            "enabled": config.NOTION_OUTBOX,
+            "running": self.running,
+            **counts,
+            "delivered": self.delivered,
+            "retried": self.retried,
+            "given_up": self.dead,
+            "dropped_properties": self.dropped_properties,
+        }
+
+
+# 全局发件箱实例
+notion_outbox = NotionOutbox()
@@ -10,7 +10,13 @@ import asyncio
 from typing import Dict, Any
 
 from app.clients.notion import NotionClient
+from app.services.notion_outbox import CoverSources, notion_outbox
 from app.constants.notion_fields import AlbumField, AudioField
+from app.utils.config import config
+from app.utils.notion_diff import diff_properties
+from app.utils.notion_property import NotionProp as P
+from app.utils.property_ledger import get_property_ledger
+from app.utils.write_coalescer import WriteCoalescer
 from app.utils.notion_builder import (
     build_album_properties,
     build_audio_properties,
@@ -18,17 +24,172 @@ from app.utils.notion_builder import (
 )
 from app.services.description_album_parser import DescriptionParser
 from app.services.description_audio_parser import DescriptionAudioParser
-from app.clients.image_upload import upload_cover
+from app.clients.image_upload import get_cover_filename, upload_cover
 from app.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# 账本中记录页面图标使用的键（不会与 Notion 属性名冲突）
+_ICON_KEY = "@icon"
+
+# 同一页面的多次写入合并为一次（延迟初始化）
+_write_coalescer: WriteCoalescer | None = None
+
+
+def get_write_coalescer() -> WriteCoalescer:
+    """获取页面写入合并器"""
+    global _write_coalescer
+    if _write_coalescer is None:
+        _write_coalescer = WriteCoalescer(window=config.NOTION_WRITE_COALESCE_WINDOW)
+    return _write_coalescer
+
 
 class NotionService:
     """Notion数据服务"""
 
-    def __init__(self):
-        self.client = NotionClient()
+    def __init__(self, client: NotionClient | None = None):
+        """
+        Args:
+            client: 注入的 Notion 客户端，默认包装进程级共享客户端
+        """
+        self.client = client or NotionClient()
+
+    async def _write_page(
+        self,
+        page_id: str,
+        properties: Dict[str, Any],
+        emoji: str = "🎧",
+        covers: CoverSources | None = None,
+    ) -> bool:
+        """
+        写入页面属性
+
+        启用 NOTION_OUTBOX 时先持久化到发件箱再投递（失败后由后台按计划重试）；
+        否则同一页面的写入先按属性合并（后写覆盖），合并后的完整内容再统一经过
+        账本/差异过滤后写入，见 WriteCoalescer。
+
+        Args:
+            page_id: 页面ID
+            properties: 完整的待写入属性
+            emoji: 页面图标
+            covers: 封面属性的图片来源（发件箱投递时重新解析 file_upload_id）
+
+        Returns:
+            是否实际发出了写入请求（已进入发件箱等待重试时为 True）
+        """
+        if config.NOTION_OUTBOX and notion_outbox.running:
+            covers = {k: v for k, v in (covers or {}).items() if k in properties}
+            return await notion_outbox.submit(page_id, properties, emoji, covers)
+        # 按底层 SDK 客户端区分（每个请求都会新建 NotionService/NotionClient 包装，
+        # 但共享同一个 SDK 客户端），不同 webhook 对同一页面的写入才能合并
+        key = (id(self.client.client), page_id.replace("-", "").lower())
+        return await get_write_coalescer().submit(
+            key,
+            properties,
+            lambda merged: self.apply_write(page_id, merged, emoji),
+        )
+
+    async def deliver_outbox(
+        self,
+        page_id: str,
+        properties: Dict[str, Any],
+        emoji: str,
+        covers: CoverSources,
+    ) -> bool:
+        """
+        发件箱的投递函数：重新解析封面 file_upload_id 后写入
+
+        发件箱中的写入可能在很久之后才投递，届时原 file_upload_id 可能已过期；
+        upload_cover 缓存命中时不发出请求，过期时重新校验或上传。
+
+        Args:
+            page_id: 页面ID
+            properties: 待写入属性
+            emoji: 页面图标
+            covers: 封面属性的图片来源
+
+        Returns:
+            是否实际发出了写入请求
+        """
+        names = [name for name in covers if name in properties]
+        if names:
+            file_upload_ids = await asyncio.gather(
+                *(
+                    upload_cover(
+                        covers[name]["url"],
+                        covers[name]["name"],
+                        client=self.client.client,
+                    )
+                    for name in names
+                )
+            )
+            properties = {
+                **properties,
+                **{
+                    name: P.file_upload(
+                        file_upload_id, get_cover_filename(covers[name]["url"])
+                    )
+                    for name, file_upload_id in zip(names, file_upload_ids)
+                },
+            }
+        return await self.apply_write(page_id, properties, emoji)
+
+    async def apply_write(
+        self, page_id: str, properties: Dict[str, Any], emoji: str = "🎧"
+    ) -> bool:
+        """
+        将页面属性写入 Notion
+
+        按配置剔除无需写入的属性：
+        - NOTION_WRITE_LEDGER：与本地账本中上次成功写入值相同的属性（无网络请求）。
+          账本已给出变化的属性，因此不再读取页面；页面上被手动修改的属性在
+          其值再次变化（或通过 /ledger 使账本失效）前不会被覆盖
+        - 否则 NOTION_DIFF_WRITES：读取页面，剔除与当前值相同的属性（读取失败时不过滤），
+          手动修改过的属性会被恢复
+        属性和图标都没有变化时跳过写入；写入成功后更新账本。
+
+        Args:
+            page_id: 页面ID
+            properties: 完整的待写入属性
+            emoji: 页面图标
+
+        Returns:
+            是否实际发出了写入请求
+        """
+        ledger = get_property_ledger() if config.NOTION_WRITE_LEDGER else None
+        # 图标与属性一同记入账本
+        tracked = {**properties, _ICON_KEY: emoji}
+        pending = dict(properties)
+        written = True
+
+        if ledger is not None:
+            changed = ledger.filter_changed(page_id, tracked)
+            pending = {k: v for k, v in changed.items() if k != _ICON_KEY}
+            written = bool(changed)
+            if written:
+                logger.info(
+                    f"Writing {len(pending)}/{len(properties)} properties changed since last write to page {page_id}"
+                )
+            else:
+                logger.info(f"Page {page_id} unchanged since last write, skipping")
+        elif config.NOTION_DIFF_WRITES:
+            page = await self.client.get_page(page_id)
+            if page is not None:
+                pending = diff_properties(pending, page.get("properties", {}))
+                icon_changed = page.get("icon") != {"type": "emoji", "emoji": emoji}
+                written = bool(pending) or icon_changed
+                if written:
+                    logger.info(
+                        f"Writing {len(pending)}/{len(properties)} changed properties to page {page_id}"
+                    )
+                else:
+                    logger.info(f"Page {page_id} is up to date, skipping write")
+
+        if written:
+            await self.client.update_page(page_id, pending, emoji=emoji)
+            if ledger is not None:
+                await ledger.record(page_id, tracked)
+        return written
 
     async def upload_album_data(self, album_data: Dict[str, Any], page_id: str) -> bool:
         """
@@ -44,12 +205,13 @@ class NotionService:
         try:
             # 准备数据
             processed_data = await self._prepare_album_data(album_data)
+            cover_sources = processed_data.pop("cover_sources")
 
             # 构建属性
             properties = build_album_properties(**processed_data)
 
             # 创建或更新页面
-            await self.client.update_page(page_id, properties)
+            await self._write_page(page_id, properties, covers=cover_sources)
 
             logger.info(f"Successfully uploaded data for: {processed_data['name']}")
             return True
@@ -80,6 +242,7 @@ class NotionService:
         try:
             # 准备部分更新数据
             processed_data = await self._prepare_album_data(album_data, update_fields)
+            cover_sources = processed_data.pop("cover_sources")
 
             # 构建部分属性
             all_props = build_album_properties(**processed_data)
@@ -92,7 +255,7 @@ class NotionService:
                 return False
 
             # 更新页面
-            await self.client.update_page(page_id, properties)
+            await self._write_page(page_id, properties, covers=cover_sources)
 
             logger.info(f"Successfully updated partial data for page: {page_id}")
             return True
@@ -115,12 +278,15 @@ class NotionService:
         try:
             # 准备数据
             processed_data = await self._prepare_audio_data(audio_data)
+            cover_sources = processed_data.pop("cover_sources")
 
             # 构建属性
             properties = build_audio_properties(**processed_data)
 
             # 更新页面
-            await self.client.update_page(page_id, properties, emoji="🎵")
+            await self._write_page(
+                page_id, properties, emoji="🎵", covers=cover_sources
+            )
 
             logger.info(f"Successfully uploaded data for: {processed_data['name']}")
             return True
@@ -151,6 +317,7 @@ class NotionService:
         try:
             # 准备部分更新数据
             processed_data = await self._prepare_audio_data(audio_data, update_fields)
+            cover_sources = processed_data.pop("cover_sources")
 
             # 构建部分属性
             all_props = build_audio_properties(**processed_data)
@@ -163,7 +330,9 @@ class NotionService:
                 return False
 
             # 更新页面
-            await self.client.update_page(page_id, properties, emoji="🎵")
+            await self._write_page(
+                page_id, properties, emoji="🎵", covers=cover_sources
+            )
 
             logger.info(f"Successfully updated partial audio data for page: {page_id}")
             return True
@@ -190,7 +359,7 @@ class NotionService:
             update_fields: 需要更新的字段列表，None 表示全量
 
         Returns:
-            处理后的数据
+            处理后的数据（cover_sources 为封面来源，不参与属性构建）
         """
         F = AlbumField
         name = album_data.get("name", "")
@@ -206,13 +375,16 @@ class NotionService:
         ]
         keys: list[str] = []
         coros = []
+        # 封面来源（按 Notion 属性名），供发件箱投递时重新解析 file_upload_id
+        cover_sources: CoverSources = {}
         for field, data_key, upload_name in cover_defs:
             if wanted is not None and field not in wanted:
                 continue
             url = album_data.get(data_key)
             if url:
                 keys.append(data_key)
-                coros.append(upload_cover(url, upload_name))
+                cover_sources[field] = {"url": url, "name": upload_name}
+                coros.append(upload_cover(url, upload_name, client=self.client.client))
             elif field == F.COVER:
                 logger.warning(
                     f"Cover URL is empty for album: {name}, skipping cover upload"
@@ -222,6 +394,9 @@ class NotionService:
         if coros:
             results = await asyncio.gather(*coros)
             covers = dict(zip(keys, results))
+            # 上传文件名随 file_upload 一同写入，使差异比较能识别未变化的封面
+            for key in keys:
+                covers[f"{key}_filename"] = get_cover_filename(album_data[key])
 
         # 解析描述
         parser = DescriptionParser(description)
@@ -233,6 +408,7 @@ class NotionService:
         return {
             "name": name,
             **covers,
+            "cover_sources": cover_sources,
             "description": parser.main_description,
             "description_sequel": parser.additional_info,
             "publish_date": album_data.get("publish_date", "").replace("+08:00", "Z"),
@@ -272,7 +448,7 @@ class NotionService:
             update_fields: 需要更新的字段列表，None 表示全量
 
         Returns:
-            处理后的Audio数据
+            处理后的Audio数据（cover_sources 为封面来源，不参与属性构建）
         """
         F = AudioField
         name = audio_data.get("name", "")
@@ -281,10 +457,14 @@ class NotionService:
 
         # Cover 上传（square 为空时 fallback 到 cover）
         cover_id = None
+        cover_sources: CoverSources = {}
         if update_fields is None or F.COVER in update_fields:
             cover_url = audio_data.get("square") or audio_data.get("cover")
             if cover_url:
-                cover_id = await upload_cover(cover_url, name)
+                cover_sources[F.COVER] = {"url": cover_url, "name": name}
+                cover_id = await upload_cover(
+                    cover_url, name, client=self.client.client
+                )
             else:
                 logger.warning(
                     f"Cover URL is empty for audio: {name}, skipping cover upload"
@@ -304,9 +484,11 @@ class NotionService:
             "arranger": credits.arranger,
             "mixer": credits.mixer,
             "lyrics": credits.lyrics,
+            "cover_sources": cover_sources,
         }
 
         if cover_id:
             result["cover"] = cover_id
+            result["cover_filename"] = get_cover_filename(cover_url)
 
         return result
@@ -7,14 +7,41 @@
 """
 
 import json
+import time
 import asyncio
 from pathlib import Path
-from typing import Optional, Dict
+from typing import Any, Optional, Dict, List
+from app.utils.journal_store import JournalOp, JournalStore
 from app.utils.logger import setup_logger
 from app.utils.config import config
 
 logger = setup_logger(__name__)
 
+# 缓存条目：
+# {
+#     "id": file_upload_id,
+#     "created_at": 写入缓存的时间（epoch 秒）,
+#     "validated_at": 最近一次确认有效的时间（epoch 秒），
+#     "expires_at": Notion 返回的 expiry_time（epoch 秒），未知为 None,
+#     "name": 上传时使用的文件名前缀（用于后台重新上传），未知为 None,
+#     "sha256": 图片内容哈希，未知为 None,
+#     "filename": 上传时使用的完整文件名（含扩展名），未知为 None,
+# }
+CoverEntry = Dict[str, Any]
+
+
+def _normalize_entry(value: Any) -> CoverEntry:
+    """兼容旧格式（值为 file_upload_id 字符串），旧条目视为从未校验过"""
+    if isinstance(value, str):
+        return {
+            "id": value,
+            "created_at": 0,
+            "validated_at": 0,
+            "expires_at": None,
+            "name": None,
+        }
+    return value
+
 
 class CoverCache:
     """封面图片缓存管理器（单例模式）"""
@@ -37,8 +64,29 @@ class CoverCache:
 
         # 缓存文件路径（利用已有的 volume 挂载）
         self.cache_file = Path(config.DATA_DIR) / "cover_cache.json"
-        # 内存缓存：{image_url: file_upload_id}
-        self._cache: Dict[str, str] = {}
+        # 快照 + 追加日志存储：每次写入只追加一行，日志过长时压缩回快照
+        self._store = JournalStore(
+            self.cache_file, compact_threshold=config.COVER_CACHE_COMPACT_THRESHOLD
+        )
+        # 内存缓存：{image_url: CoverEntry}
+        self._cache: Dict[str, CoverEntry] = {}
+        # 内容寻址层：{sha256: file_upload_id}，相同图片的不同 URL 复用同一上传
+        self.hash_file = Path(config.DATA_DIR) / "cover_hashes.json"
+        self._hash_store = JournalStore(
+            self.hash_file, compact_threshold=config.COVER_CACHE_COMPACT_THRESHOLD
+        )
+        self._hashes: Dict[str, str] = {}
+        # 最近使用时间（仅内存）：{image_url: epoch 秒}，供后台巡检判断条目是否仍在使用；
+        # 没有记录的条目（如重启前写入的）视为在加载时刚被使用
+        self._used_at: Dict[str, float] = {}
+        self._loaded_at = time.time()
+        # write-behind 模式：待落盘的操作与后台刷盘任务
+        self._pending: List[JournalOp] = []
+        self._flusher: Optional[asyncio.Task] = None
+        self._flush_event: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        # 请求停止刷盘循环（不取消任务，保证进行中的刷盘完整结束）
+        self._stopping = False
         # 加载已有缓存
         self._load_cache()
 
@@ -50,19 +98,22 @@ class CoverCache:
         return self._async_lock
 
     def _load_cache(self) -> None:
-        """从文件加载缓存到内存
+        """从快照和日志恢复缓存到内存
 
         容错处理：
         - 文件不存在：正常情况（首次运行），使用空缓存
+        - 日志末尾写了一半的行：忽略该行（崩溃恢复）
         - 文件读取/解析失败：记录警告，使用空缓存
         """
         try:
-            if not self.cache_file.exists():
+            if not self.cache_file.exists() and not self._store.journal_file.exists():
                 logger.info("Cache file not found, starting with empty cache")
                 return
 
-            with open(self.cache_file, "r", encoding="utf-8") as f:
-                self._cache = json.load(f)
+            self._cache = {
+                url: _normalize_entry(value)
+                for url, value in self._store.load().items()
+            }
             logger.info(f"Loaded {len(self._cache)} cached covers")
 
         except json.JSONDecodeError as e:
@@ -75,14 +126,98 @@ class CoverCache:
             logger.warning(f"Failed to load cache file: {type(e).__name__}: {e}")
             self._cache = {}
 
-    def _save_cache(self) -> None:
-        """保存缓存到文件"""
         try:
-            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
-            with open(self.cache_file, "w", encoding="utf-8") as f:
-                json.dump(self._cache, f, ensure_ascii=False, indent=2)
+            self._hashes = self._hash_store.load()
+            if self._hashes:
+                logger.info(f"Loaded {len(self._hashes)} cover content hashes")
+        except Exception as e:
+            logger.warning(f"Failed to load cover hash file: {type(e).__name__}: {e}")
+            self._hashes = {}
+
+    @property
+    def write_behind(self) -> bool:
+        """后台刷盘任务是否在运行"""
+        return self._flusher is not None and not self._flusher.done()
+
+    async def _persist(
+        self, op: str, image_url: str, value: Optional[CoverEntry]
+    ) -> None:
+        """
+        持久化一条操作
+
+        write-behind 模式下只记入待刷盘队列，由后台任务批量写入；
+        否则立即追加到日志。
+        """
+        if self.write_behind and self._flush_event is not None:
+            self._pending.append((op, image_url, value))
+            if len(self._pending) >= config.COVER_CACHE_FLUSH_THRESHOLD:
+                self._flush_event.set()
+            return
+        await self._write_ops([(op, image_url, value)])
+
+    async def _write_ops(self, ops: List[JournalOp]) -> bool:
+        """追加操作到日志，必要时压缩（在线程池中执行，不阻塞事件循环）"""
+        try:
+            await asyncio.to_thread(self._store.append, ops)
+            if self._store.needs_compaction:
+                await asyncio.to_thread(self._store.compact, dict(self._cache))
+                logger.info(
+                    f"Compacted cover cache journal ({len(self._cache)} entries)"
+                )
+            return True
         except Exception as e:
             logger.error(f"Failed to save cache file: {e}")
+            return False
+
+    async def flush(self) -> None:
+        """将待刷盘的操作批量写入日志，失败时放回队列等待下次刷盘"""
+        if not self._pending:
+            return
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        # 先取出再排队加锁，中间没有 await，保证多次 flush 按顺序落盘
+        ops, self._pending = self._pending, []
+        async with self._flush_lock:
+            if not await self._write_ops(ops):
+                self._pending[:0] = ops
+            else:
+                logger.debug(f"Flushed {len(ops)} cover cache updates")
+
+    async def _flush_loop(self) -> None:
+        """后台刷盘循环：每隔 interval 秒或待刷盘数达到阈值时刷盘，请求停止后退出"""
+        assert self._flush_event is not None
+        interval = config.COVER_CACHE_FLUSH_INTERVAL
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._flush_event.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_event.clear()
+            await self.flush()
+
+    def start_write_behind(self) -> None:
+        """启动后台刷盘任务（由 lifespan 调用）"""
+        if self.write_behind:
+            return
+        self._stopping = False
+        self._flush_event = asyncio.Event()
+        self._flusher = asyncio.create_task(self._flush_loop())
+        logger.info("Cover cache write-behind enabled")
+
+    async def stop_write_behind(self) -> None:
+        """
+        停止后台刷盘任务并完成最后一次刷盘
+
+        不取消刷盘任务：取消可能发生在 flush() 已取出待刷盘操作之后，
+        导致失败时无法放回队列；这里唤醒循环并等待进行中的刷盘结束。
+        """
+        if self._flusher is not None:
+            self._stopping = True
+            if self._flush_event is not None:
+                self._flush_event.set()
+            await self._flusher
+            self._flusher = None
+        await self.flush()
 
     def get(self, image_url: str) -> Optional[str]:
         """
@@ -94,21 +229,114 @@ class CoverCache:
         Returns:
             file_upload_id 或 None
         """
-        return self._cache.get(image_url)
+        entry = self._cache.get(image_url)
+        return entry["id"] if entry else None
 
-    async def set(self, image_url: str, file_upload_id: str) -> None:
+    def get_entry(self, image_url: str) -> Optional[CoverEntry]:
         """
-        设置缓存
+        获取完整缓存条目（含创建、校验与过期时间）
+
+        Args:
+            image_url: 图片 URL（去除查询参数后）
+
+        Returns:
+            缓存条目副本或 None
+        """
+        entry = self._cache.get(image_url)
+        return dict(entry) if entry else None
+
+    def touch(self, image_url: str) -> None:
+        """
+        记录条目被业务请求使用（后台任务的访问不应调用）
+
+        Args:
+            image_url: 图片 URL（去除查询参数后）
+        """
+        self._used_at[image_url] = time.time()
+
+    def last_used(self, image_url: str) -> float:
+        """
+        条目最近一次被使用的时间（epoch 秒）
+
+        Args:
+            image_url: 图片 URL（去除查询参数后）
+        """
+        return self._used_at.get(image_url, self._loaded_at)
+
+    @staticmethod
+    def is_trusted(entry: CoverEntry, now: Optional[float] = None) -> bool:
+        """
+        条目是否可以不经 Notion 校验直接使用
+
+        需同时满足：
+        - 距最近一次确认有效不超过 COVER_CACHE_TRUST_SECONDS
+        - 已知过期时间时，距过期还有超过 COVER_CACHE_EXPIRY_MARGIN 秒
+
+        Args:
+            entry: 缓存条目
+            now: 当前时间（epoch 秒），默认 time.time()
+        """
+        now = time.time() if now is None else now
+        if now - entry.get("validated_at", 0) > config.COVER_CACHE_TRUST_SECONDS:
+            return False
+        expires_at = entry.get("expires_at")
+        if expires_at is not None:
+            return now < expires_at - config.COVER_CACHE_EXPIRY_MARGIN
+        return True
+
+    async def set(
+        self,
+        image_url: str,
+        file_upload_id: str,
+        expires_at: Optional[float] = None,
+        name: Optional[str] = None,
+        content_hash: Optional[str] = None,
+        filename: Optional[str] = None,
+    ) -> None:
+        """
+        设置缓存（写入即视为刚确认有效）
 
         Args:
             image_url: 图片 URL
             file_upload_id: Notion file_upload_id
+            expires_at: Notion 返回的过期时间（epoch 秒），未知为 None
+            name: 上传时使用的文件名前缀
+            content_hash: 图片内容的 SHA-256，未知为 None
+            filename: 上传时使用的完整文件名，未知为 None
         """
+        now = time.time()
+        entry: CoverEntry = {
+            "id": file_upload_id,
+            "created_at": now,
+            "validated_at": now,
+            "expires_at": expires_at,
+            "name": name,
+            "sha256": content_hash,
+            "filename": filename,
+        }
         async with self.async_lock:
-            self._cache[image_url] = file_upload_id
-            self._save_cache()
+            self._cache[image_url] = entry
+            await self._persist("set", image_url, entry)
             logger.info(f"Cached cover: {image_url[:50]}... -> {file_upload_id}")
 
+    async def mark_validated(
+        self, image_url: str, expires_at: Optional[float] = None
+    ) -> None:
+        """
+        记录条目刚通过 Notion 校验，刷新信任窗口
+
+        Args:
+            image_url: 图片 URL
+            expires_at: Notion 返回的最新过期时间（epoch 秒），未知为 None
+        """
+        async with self.async_lock:
+            entry = self._cache.get(image_url)
+            if entry is None:
+                return
+            entry = {**entry, "validated_at": time.time(), "expires_at": expires_at}
+            self._cache[image_url] = entry
+            await self._persist("set", image_url, entry)
+
     async def delete(self, image_url: str) -> None:
         """
         删除指定缓存条目（用于失效过期的 file_upload_id）
@@ -119,17 +347,78 @@ class CoverCache:
         async with self.async_lock:
             if image_url in self._cache:
                 del self._cache[image_url]
-                self._save_cache()
+                self._used_at.pop(image_url, None)
+                await self._persist("del", image_url, None)
                 logger.info(f"Cache invalidated: {image_url[:50]}...")
 
+    def get_by_hash(self, content_hash: str) -> Optional[str]:
+        """
+        按图片内容哈希查找已上传的 file_upload_id
+
+        Args:
+            content_hash: 图片内容的 SHA-256（十六进制）
+
+        Returns:
+            file_upload_id 或 None
+        """
+        return self._hashes.get(content_hash)
+
+    async def _write_hash_ops(self, ops: List[JournalOp]) -> None:
+        """追加哈希映射操作到日志，必要时压缩（写入频率低，始终立即落盘）"""
+        try:
+            await asyncio.to_thread(self._hash_store.append, ops)
+            if self._hash_store.needs_compaction:
+                await asyncio.to_thread(self._hash_store.compact, dict(self._hashes))
+        except Exception as e:
+            logger.error(f"Failed to save cover hash file: {e}")
+
+    async def set_hash(self, content_hash: str, file_upload_id: str) -> None:
+        """
+        记录图片内容哈希对应的 file_upload_id
+
+        Args:
+            content_hash: 图片内容的 SHA-256（十六进制）
+            file_upload_id: Notion file_upload_id
+        """
+        async with self.async_lock:
+            if self._hashes.get(content_hash) == file_upload_id:
+                return
+            self._hashes[content_hash] = file_upload_id
+            await self._write_hash_ops([("set", content_hash, file_upload_id)])
+
+    async def discard_hash_id(self, file_upload_id: str) -> None:
+        """
+        移除指向某个 file_upload_id 的哈希映射（该上传已过期或失效时调用）
+
+        Args:
+            file_upload_id: Notion file_upload_id
+        """
+        async with self.async_lock:
+            stale = [h for h, fid in self._hashes.items() if fid == file_upload_id]
+            if not stale:
+                return
+            for content_hash in stale:
+                del self._hashes[content_hash]
+            await self._write_hash_ops([("del", h, None) for h in stale])
+
+    def entries(self) -> List[tuple[str, CoverEntry]]:
+        """所有缓存条目的快照（供后台巡检使用）"""
+        return [(url, dict(entry)) for url, entry in self._cache.items()]
+
     def get_all(self) -> Dict[str, str]:
         """获取所有缓存（用于调试）"""
-        return self._cache.copy()
+        return {url: entry["id"] for url, entry in self._cache.items()}
 
     def clear(self) -> None:
         """清空缓存（用于调试）"""
         self._cache.clear()
-        self._save_cache()
+        self._hashes.clear()
+        self._pending.clear()
+        try:
+            self._store.compact({})
+            self._hash_store.compact({})
+        except Exception as e:
+            logger.error(f"Failed to save cache file: {e}")
         logger.info("Cache cleared")
 
 
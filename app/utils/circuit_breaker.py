@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+熔断器
+上游持续失败时快速失败，避免请求堆积等待超时
+"""
+
+import time
+from typing import Any, Dict
+
+
+class CircuitOpenError(RuntimeError):
+    """熔断器处于打开状态，请求被拒绝"""
+
+
+class CircuitBreaker:
+    """
+    三态熔断器
+
+    - closed: 正常放行，连续失败达到阈值后转为 open
+    - open: 直接拒绝请求，冷却 reset_timeout 秒后转为 half_open
+    - half_open: 仅放行一个探测请求，成功则关闭，失败则重新打开
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        """
+        Args:
+            name: 熔断器名称（用于日志和统计）
+            failure_threshold: 连续失败多少次后打开，不大于 0 表示关闭熔断
+            reset_timeout: 打开后的冷却时间（秒）
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.rejected = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    def before_request(self) -> bool:
+        """
+        请求前检查是否放行
+
+        Returns:
+            本次请求是否占用了半开状态的探测名额（是则结束时需调用 release）
+
+        Raises:
+            CircuitOpenError: 熔断器打开或已有探测请求在进行中
+        """
+        if self.failure_threshold <= 0 or self.state == self.CLOSED:
+            return False
+
+        if self.state == self.OPEN:
+            remaining = self._opened_at + self.reset_timeout - time.monotonic()
+            if remaining > 0:
+                self.rejected += 1
+                raise CircuitOpenError(
+                    f"Circuit '{self.name}' is open, retry in {remaining:.1f}s"
+                )
+            self.state = self.HALF_OPEN
+
+        if self._probe_in_flight:
+            self.rejected += 1
+            raise CircuitOpenError(f"Circuit '{self.name}' is half-open, probing")
+        self._probe_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        """记录一次成功，关闭熔断器"""
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        """记录一次失败，达到阈值或探测失败时打开熔断器"""
+        self.failures += 1
+        self._probe_in_flight = False
+        if self.failure_threshold <= 0:
+            return
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """
+        探测请求未得出结论即结束（如被取消）时释放探测名额
+
+        只能由 before_request 返回 True 的调用方调用
+        """
+        self._probe_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        """熔断器状态"""
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "rejected": self.rejected,
+        }
@@ -10,6 +10,14 @@ from typing import Optional
 from dotenv import load_dotenv
 
 
+def _env_bool(name: str, default: bool = False) -> bool:
+    """读取布尔型环境变量（1/true/yes/on 视为 True）"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
 class Config:
     """应用配置类"""
 
@@ -61,11 +69,181 @@ class Config:
             raise RuntimeError("Missing required env FANJIAO_AUDIO_BASE_URL")
         return value
 
+    @property
+    def FANJIAO_AUDIO_CACHE_TTL(self) -> float:
+        """专辑音频列表缓存有效期（秒），0 表示关闭缓存"""
+        return float(os.getenv("FANJIAO_AUDIO_CACHE_TTL", "300"))
+
+    @property
+    def FANJIAO_AUDIO_CACHE_SIZE(self) -> int:
+        """专辑音频列表缓存最大专辑数"""
+        return int(os.getenv("FANJIAO_AUDIO_CACHE_SIZE", "64"))
+
+    @property
+    def FANJIAO_RETRY_ATTEMPTS(self) -> int:
+        """Fanjiao 请求最大尝试次数（含首次请求）"""
+        return int(os.getenv("FANJIAO_RETRY_ATTEMPTS", "3"))
+
+    @property
+    def FANJIAO_RETRY_BACKOFF(self) -> float:
+        """Fanjiao 重试退避基数（秒），每次重试翻倍"""
+        return float(os.getenv("FANJIAO_RETRY_BACKOFF", "0.5"))
+
+    @property
+    def FANJIAO_RETRY_BACKOFF_MAX(self) -> float:
+        """Fanjiao 单次重试最长等待（秒）"""
+        return float(os.getenv("FANJIAO_RETRY_BACKOFF_MAX", "5"))
+
+    @property
+    def FANJIAO_BREAKER_THRESHOLD(self) -> int:
+        """Fanjiao 熔断阈值（连续失败次数），0 表示关闭熔断"""
+        return int(os.getenv("FANJIAO_BREAKER_THRESHOLD", "5"))
+
+    @property
+    def FANJIAO_BREAKER_RESET_TIMEOUT(self) -> float:
+        """Fanjiao 熔断冷却时间（秒）"""
+        return float(os.getenv("FANJIAO_BREAKER_RESET_TIMEOUT", "30"))
+
+    @property
+    def FANJIAO_RATE_LIMIT(self) -> float:
+        """Fanjiao 默认限流速率（请求/秒），0 表示不限流"""
+        return float(os.getenv("FANJIAO_RATE_LIMIT", "5"))
+
+    @property
+    def FANJIAO_ALBUM_RATE_LIMIT(self) -> float:
+        """FANJIAO_BASE_URL 限流速率（请求/秒），默认同 FANJIAO_RATE_LIMIT"""
+        return float(os.getenv("FANJIAO_ALBUM_RATE_LIMIT", self.FANJIAO_RATE_LIMIT))
+
+    @property
+    def FANJIAO_CV_RATE_LIMIT(self) -> float:
+        """FANJIAO_CV_BASE_URL 限流速率（请求/秒），默认同 FANJIAO_RATE_LIMIT"""
+        return float(os.getenv("FANJIAO_CV_RATE_LIMIT", self.FANJIAO_RATE_LIMIT))
+
+    @property
+    def FANJIAO_AUDIO_RATE_LIMIT(self) -> float:
+        """FANJIAO_AUDIO_BASE_URL 限流速率（请求/秒），默认同 FANJIAO_RATE_LIMIT"""
+        return float(os.getenv("FANJIAO_AUDIO_RATE_LIMIT", self.FANJIAO_RATE_LIMIT))
+
+    @property
+    def FANJIAO_RATE_BURST(self) -> float:
+        """Fanjiao 限流令牌桶容量（允许的突发请求数）"""
+        return float(os.getenv("FANJIAO_RATE_BURST", "5"))
+
+    @property
+    def FANJIAO_HTTP2(self) -> bool:
+        """Fanjiao 客户端是否启用 HTTP/2（需要安装 h2）"""
+        return _env_bool("FANJIAO_HTTP2")
+
+    @property
+    def FANJIAO_MAX_CONNECTIONS(self) -> int:
+        """Fanjiao 连接池最大连接数"""
+        return int(os.getenv("FANJIAO_MAX_CONNECTIONS", "20"))
+
+    @property
+    def FANJIAO_MAX_KEEPALIVE_CONNECTIONS(self) -> int:
+        """Fanjiao 连接池最大空闲保活连接数"""
+        return int(os.getenv("FANJIAO_MAX_KEEPALIVE_CONNECTIONS", "10"))
+
+    @property
+    def FANJIAO_KEEPALIVE_EXPIRY(self) -> float:
+        """Fanjiao 空闲连接保活时间（秒）"""
+        return float(os.getenv("FANJIAO_KEEPALIVE_EXPIRY", "60"))
+
+    @property
+    def FANJIAO_CONNECT_TIMEOUT(self) -> float:
+        """Fanjiao 建立连接超时（秒）"""
+        return float(os.getenv("FANJIAO_CONNECT_TIMEOUT", "5"))
+
+    @property
+    def FANJIAO_READ_TIMEOUT(self) -> float:
+        """Fanjiao 读取/写入超时（秒）"""
+        return float(os.getenv("FANJIAO_READ_TIMEOUT", "10"))
+
+    @property
+    def FANJIAO_POOL_TIMEOUT(self) -> float:
+        """Fanjiao 等待连接池空闲连接的超时（秒）"""
+        return float(os.getenv("FANJIAO_POOL_TIMEOUT", "5"))
+
     @property
     def DATA_DIR(self) -> str:
         """cache data directory"""
         return os.path.join(".", "app", "data_cache")
 
+    @property
+    def COVER_CACHE_COMPACT_THRESHOLD(self) -> int:
+        """封面缓存日志累计多少条写入后压缩为快照"""
+        return int(os.getenv("COVER_CACHE_COMPACT_THRESHOLD", "500"))
+
+    @property
+    def COVER_CACHE_WRITE_BEHIND(self) -> bool:
+        """封面缓存是否启用 write-behind（写入先进内存，由后台任务批量落盘）"""
+        return _env_bool("COVER_CACHE_WRITE_BEHIND")
+
+    @property
+    def COVER_CACHE_FLUSH_INTERVAL(self) -> float:
+        """write-behind 刷盘间隔（秒）"""
+        return float(os.getenv("COVER_CACHE_FLUSH_INTERVAL", "2"))
+
+    @property
+    def COVER_CACHE_FLUSH_THRESHOLD(self) -> int:
+        """write-behind 待刷盘操作达到多少条时立即刷盘"""
+        return int(os.getenv("COVER_CACHE_FLUSH_THRESHOLD", "20"))
+
+    @property
+    def COVER_CACHE_TRUST_SECONDS(self) -> float:
+        """封面缓存信任窗口（秒）：确认有效后这段时间内命中不再请求 Notion 校验"""
+        return float(os.getenv("COVER_CACHE_TRUST_SECONDS", "21600"))
+
+    @property
+    def COVER_CACHE_EXPIRY_MARGIN(self) -> float:
+        """距 Notion expiry_time 不足该秒数时视为即将过期，需要重新校验"""
+        return float(os.getenv("COVER_CACHE_EXPIRY_MARGIN", "300"))
+
+    @property
+    def COVER_CONTENT_DEDUP(self) -> bool:
+        """
+        缓存未命中时按图片内容哈希复用已有上传（不同 URL 的相同图片只上传一次）
+
+        只在不增加图片传输时计算哈希：direct 模式（需启用磁盘缓存）或磁盘缓存中
+        已有该图片时；external_url 模式下新图片不参与去重。
+        """
+        return _env_bool("COVER_CONTENT_DEDUP", False)
+
+    @property
+    def COVER_FORMAT_CACHE_TTL(self) -> float:
+        """图片 URL 格式识别结果缓存有效期（秒），0 表示关闭缓存"""
+        return float(os.getenv("COVER_FORMAT_CACHE_TTL", "86400"))
+
+    @property
+    def COVER_FORMAT_CACHE_SIZE(self) -> int:
+        """图片 URL 格式识别结果缓存最大条目数"""
+        return int(os.getenv("COVER_FORMAT_CACHE_SIZE", "1024"))
+
+    @property
+    def COVER_IMAGE_CACHE_MAX_MB(self) -> float:
+        """封面图片本地磁盘缓存容量上限（MB，保存在 DATA_DIR/images），0 表示关闭"""
+        return float(os.getenv("COVER_IMAGE_CACHE_MAX_MB", "200"))
+
+    @property
+    def COVER_SWEEP_INTERVAL(self) -> float:
+        """封面缓存后台巡检间隔（秒），0 表示关闭巡检"""
+        return float(os.getenv("COVER_SWEEP_INTERVAL", "1800"))
+
+    @property
+    def COVER_SWEEP_BATCH(self) -> int:
+        """每轮巡检最多校验的条目数"""
+        return int(os.getenv("COVER_SWEEP_BATCH", "50"))
+
+    @property
+    def COVER_SWEEP_CONCURRENCY(self) -> int:
+        """巡检时同时校验的条目数"""
+        return int(os.getenv("COVER_SWEEP_CONCURRENCY", "2"))
+
+    @property
+    def COVER_SWEEP_IDLE_SECONDS(self) -> float:
+        """超过该秒数未被使用的封面，巡检不再续期或重新上传，直接淘汰"""
+        return float(os.getenv("COVER_SWEEP_IDLE_SECONDS", "604800"))
+
     # Notion 配置
     @property
     def NOTION_TOKEN(self) -> str:
@@ -75,12 +253,142 @@ class Config:
             raise RuntimeError("Missing required env NOTION_TOKEN")
         return value
 
+    @property
+    def NOTION_MAX_CONNECTIONS(self) -> int:
+        """Notion 共享客户端连接池最大连接数"""
+        return int(os.getenv("NOTION_MAX_CONNECTIONS", "10"))
+
+    @property
+    def NOTION_KEEPALIVE_EXPIRY(self) -> float:
+        """Notion 空闲连接保活时间（秒）"""
+        return float(os.getenv("NOTION_KEEPALIVE_EXPIRY", "60"))
+
+    @property
+    def NOTION_RATE_LIMIT(self) -> float:
+        """Notion 请求限流速率（请求/秒），0 表示不限流"""
+        return float(os.getenv("NOTION_RATE_LIMIT", "3"))
+
+    @property
+    def NOTION_RATE_BURST(self) -> float:
+        """Notion 限流令牌桶容量（允许的突发请求数）"""
+        return float(os.getenv("NOTION_RATE_BURST", "3"))
+
+    @property
+    def NOTION_MAX_RETRIES(self) -> int:
+        """Notion 返回 429 时的最大自动重试次数"""
+        return int(os.getenv("NOTION_MAX_RETRIES", "3"))
+
+    @property
+    def NOTION_DIFF_WRITES(self) -> bool:
+        """写入前读取页面，只发送有变化的属性（无变化时跳过写入）"""
+        return _env_bool("NOTION_DIFF_WRITES", True)
+
+    @property
+    def NOTION_WRITE_LEDGER(self) -> bool:
+        """
+        本地记录上次写入的属性哈希，未变化的属性不再发送
+
+        启用后以账本代替 NOTION_DIFF_WRITES 的页面读取；页面被手动修改后
+        不会被恢复，需通过 /ledger 使其失效，因此默认关闭
+        """
+        return _env_bool("NOTION_WRITE_LEDGER")
+
+    @property
+    def NOTION_WRITE_COALESCE_WINDOW(self) -> float:
+        """
+        同一页面写入的额外合并窗口（秒）
+
+        无论是否设置，同一页面上一次写入发送期间到达的写入都会合并为一次请求；
+        大于 0 时每次写入额外等待该时长收集更多写入（增加写入延迟）
+        """
+        return float(os.getenv("NOTION_WRITE_COALESCE_WINDOW", "0"))
+
+    @property
+    def NOTION_OUTBOX(self) -> bool:
+        """写入 Notion 前先持久化到本地发件箱（SQLite），失败后后台重试，重启后继续投递"""
+        return _env_bool("NOTION_OUTBOX", False)
+
+    @property
+    def NOTION_OUTBOX_CONCURRENCY(self) -> int:
+        """发件箱后台同时投递的页面数"""
+        return int(os.getenv("NOTION_OUTBOX_CONCURRENCY", "2"))
+
+    @property
+    def NOTION_OUTBOX_MAX_ATTEMPTS(self) -> int:
+        """单个写入的最大投递次数，超过后标记为失败并保留在发件箱中"""
+        return int(os.getenv("NOTION_OUTBOX_MAX_ATTEMPTS", "8"))
+
+    @property
+    def NOTION_OUTBOX_RETRY_BASE(self) -> float:
+        """重试退避基数（秒），第 n 次失败后等待 base * 2^(n-1)"""
+        return float(os.getenv("NOTION_OUTBOX_RETRY_BASE", "5"))
+
+    @property
+    def NOTION_OUTBOX_RETRY_MAX(self) -> float:
+        """重试退避上限（秒）"""
+        return float(os.getenv("NOTION_OUTBOX_RETRY_MAX", "600"))
+
+    @property
+    def COVER_UPLOAD_MODE(self) -> str:
+        """
+        封面上传方式：
+        - external_url: 由 Notion 从图片 URL 导入（需轮询导入状态）
+        - direct: 本服务流式下载图片并直接发送到 Notion（无需轮询）
+        """
+        mode = os.getenv("COVER_UPLOAD_MODE", "external_url").strip().lower()
+        return mode if mode in ("external_url", "direct") else "external_url"
+
+    @property
+    def COVER_UPLOAD_CONCURRENCY(self) -> int:
+        """进程内同时进行的封面查找/上传数上限（webhook 优先于后台任务），0 表示不限制"""
+        return int(os.getenv("COVER_UPLOAD_CONCURRENCY", "4"))
+
+    @property
+    def COVER_POLL_INITIAL_DELAY(self) -> float:
+        """封面导入状态首次轮询延迟（秒），有历史耗时数据后自动调整"""
+        return float(os.getenv("COVER_POLL_INITIAL_DELAY", "0.5"))
+
+    @property
+    def COVER_POLL_MAX_INTERVAL(self) -> float:
+        """封面导入状态轮询最大间隔（秒），轮询间隔按指数增长至此上限"""
+        return float(os.getenv("COVER_POLL_MAX_INTERVAL", "5"))
+
+    @property
+    def UPLOAD_INDEX_REFRESH_INTERVAL(self) -> float:
+        """Notion 文件上传索引后台同步间隔（秒）"""
+        return float(os.getenv("UPLOAD_INDEX_REFRESH_INTERVAL", "600"))
+
     # API 配置
     @property
     def API_KEY(self) -> Optional[str]:
         """Webhook API密钥（可选）"""
         return os.getenv("API_KEY")
 
+    @property
+    def WEBHOOK_ASYNC(self) -> bool:
+        """webhook 异步模式：校验后入队并立即返回 202 与任务 ID，通过 /jobs/{id} 查询结果"""
+        return _env_bool("WEBHOOK_ASYNC")
+
+    @property
+    def JOB_WORKERS(self) -> int:
+        """异步模式下并发执行任务的 worker 数"""
+        return int(os.getenv("JOB_WORKERS", "2"))
+
+    @property
+    def JOB_QUEUE_SIZE(self) -> int:
+        """异步模式下最多排队的任务数，已满时 webhook 返回 503"""
+        return int(os.getenv("JOB_QUEUE_SIZE", "100"))
+
+    @property
+    def JOB_HISTORY_SIZE(self) -> int:
+        """保留供 /jobs/{id} 查询的最近任务数"""
+        return int(os.getenv("JOB_HISTORY_SIZE", "500"))
+
+    @property
+    def JOB_SHUTDOWN_TIMEOUT(self) -> float:
+        """关闭服务时等待排队与执行中任务完成的最长时间（秒），超时后取消"""
+        return float(os.getenv("JOB_SHUTDOWN_TIMEOUT", "30"))
+
     # 应用配置
     @property
     def ENV(self) -> str:
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+封面图片本地磁盘缓存
+按内容哈希存储图片文件，并记录 URL -> 哈希映射；总大小超过上限时按 LRU 淘汰。
+Notion 上传过期后重新上传、direct 模式上传时可直接读取本地文件（mmap），
+无需再次从图片源下载。
+"""
+
+import asyncio
+import hashlib
+import json
+import mmap
+import os
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Optional
+
+from app.utils.config import config
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# 读取本地文件时每次产出的字节数
+_READ_CHUNK_SIZE = 64 * 1024
+
+
+class ImageWriter:
+    """
+    边下载边写入缓存的临时文件，同时计算内容哈希
+
+    写入在线程池中执行；commit() 后文件按哈希归档，abort() 丢弃临时文件。
+    """
+
+    def __init__(self, store: "ImageDiskCache", image_url: str):
+        self._store = store
+        self._image_url = image_url
+        self._digest = hashlib.sha256()
+        self._tmp_file = store.tmp_dir / f"{uuid.uuid4().hex}.tmp"
+        self._file = None
+        self.size = 0
+
+    async def write(self, chunk: bytes) -> None:
+        """追加一个数据块"""
+        self._digest.update(chunk)
+        self.size += len(chunk)
+        if self._file is None:
+            self._file = await asyncio.to_thread(self._open)
+        await asyncio.to_thread(self._file.write, chunk)
+
+    def _open(self):
+        self._store.tmp_dir.mkdir(parents=True, exist_ok=True)
+        return open(self._tmp_file, "wb")
+
+    @property
+    def hexdigest(self) -> str:
+        """已写入内容的 SHA-256"""
+        return self._digest.hexdigest()
+
+    async def commit(self) -> str:
+        """
+        完成写入并归档到缓存
+
+        Returns:
+            内容的 SHA-256
+        """
+        content_hash = self.hexdigest
+        if self._file is not None:
+            await asyncio.to_thread(self._file.close)
+        await self._store._commit(
+            self._image_url, content_hash, self._tmp_file, self.size
+        )
+        return content_hash
+
+    async def abort(self) -> None:
+        """放弃写入，删除临时文件"""
+        if self._file is not None:
+            await asyncio.to_thread(self._file.close)
+        await asyncio.to_thread(self._tmp_file.unlink, missing_ok=True)
+
+
+class ImageDiskCache:
+    """
+    内容寻址的图片磁盘缓存
+
+    - 图片文件：objects/<sha256>，相同内容只存一份
+    - 索引文件：index.json，保存 URL -> sha256 映射
+    - LRU 顺序：以文件修改时间记录，命中时更新（启动时按修改时间恢复），
+      因此读取不需要写索引文件
+    - max_bytes 不大于 0 时关闭缓存
+    """
+
+    def __init__(self, root: Optional[Path] = None, max_bytes: Optional[int] = None):
+        """
+        Args:
+            root: 缓存目录，默认 DATA_DIR/images
+            max_bytes: 缓存总大小上限（字节），默认取配置
+        """
+        self.root = root or Path(config.DATA_DIR) / "images"
+        self.objects_dir = self.root / "objects"
+        self.tmp_dir = self.root / "tmp"
+        self.index_file = self.root / "index.json"
+        self.max_bytes = (
+            max_bytes
+            if max_bytes is not None
+            else int(config.COVER_IMAGE_CACHE_MAX_MB * 1024 * 1024)
+        )
+        # {image_url: sha256}
+        self._urls: Dict[str, str] = {}
+        # {sha256: 文件大小}，按最近使用时间从旧到新排列
+        self._sizes: "OrderedDict[str, int]" = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # 串行化归档与淘汰，避免并发提交重复计入 total_bytes
+        self._commit_lock: Optional[asyncio.Lock] = None
+        if self.enabled:
+            self._load()
+
+    @property
+    def enabled(self) -> bool:
+        """是否启用磁盘缓存"""
+        return self.max_bytes > 0
+
+    @property
+    def commit_lock(self) -> asyncio.Lock:
+        """延迟初始化异步锁（需要在事件循环中创建）"""
+        if self._commit_lock is None:
+            self._commit_lock = asyncio.Lock()
+        return self._commit_lock
+
+    def _load(self) -> None:
+        """扫描缓存目录恢复索引，失败时从空缓存开始"""
+        try:
+            files = []
+            if self.objects_dir.exists():
+                for path in self.objects_dir.iterdir():
+                    stat = path.stat()
+                    files.append((stat.st_mtime, path.name, stat.st_size))
+            for _, content_hash, size in sorted(files):
+                self._sizes[content_hash] = size
+                self.total_bytes += size
+
+            if self.index_file.exists():
+                with open(self.index_file, "r", encoding="utf-8") as f:
+                    urls = json.load(f)
+                self._urls = {
+                    url: content_hash
+                    for url, content_hash in urls.items()
+                    if content_hash in self._sizes
+                }
+            # 清理崩溃时遗留的临时文件
+            if self.tmp_dir.exists():
+                for path in self.tmp_dir.iterdir():
+                    path.unlink(missing_ok=True)
+            if self._sizes:
+                logger.info(
+                    f"Loaded image cache: {len(self._sizes)} files, {self.total_bytes} bytes"
+                )
+        except Exception as e:
+            logger.warning(f"Failed to load image cache: {type(e).__name__}: {e}")
+            self._urls = {}
+            self._sizes = OrderedDict()
+            self.total_bytes = 0
+
+    def _object_path(self, content_hash: str) -> Path:
+        return self.objects_dir / content_hash
+
+    def get_path(self, image_url: str) -> Optional[Path]:
+        """
+        查找 URL 对应的本地文件（命中时更新 LRU 顺序）
+
+        Args:
+            image_url: 规范化后的图片 URL
+
+        Returns:
+            本地文件路径或 None
+        """
+        if not self.enabled:
+            return None
+        content_hash = self._urls.get(image_url)
+        if content_hash is None or content_hash not in self._sizes:
+            self.misses += 1
+            return None
+        path = self._object_path(content_hash)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            # 文件被外部删除
+            self.total_bytes -= self._sizes.pop(content_hash)
+            self.misses += 1
+            return None
+        self._sizes.move_to_end(content_hash)
+        self.hits += 1
+        return path
+
+    def get_hash(self, image_url: str) -> Optional[str]:
+        """
+        获取 URL 对应的已缓存内容哈希（不计入命中统计）
+
+        Args:
+            image_url: 规范化后的图片 URL
+        """
+        content_hash = self._urls.get(image_url)
+        return content_hash if content_hash in self._sizes else None
+
+    def writer(self, image_url: str) -> Optional[ImageWriter]:
+        """
+        创建写入器，未启用缓存时返回 None
+
+        Args:
+            image_url: 规范化后的图片 URL
+        """
+        return ImageWriter(self, image_url) if self.enabled else None
+
+    async def _commit(
+        self, image_url: str, content_hash: str, tmp_file: Path, size: int
+    ) -> None:
+        """归档临时文件并登记 URL，超过上限时淘汰最久未使用的文件"""
+        if size == 0 or size > self.max_bytes:
+            await asyncio.to_thread(tmp_file.unlink, missing_ok=True)
+            return
+        async with self.commit_lock:
+            target = self._object_path(content_hash)
+            if content_hash in self._sizes:
+                # 相同内容已存在，只需登记 URL
+                await asyncio.to_thread(tmp_file.unlink, missing_ok=True)
+            else:
+                await asyncio.to_thread(self._place, tmp_file, target)
+                self._sizes[content_hash] = size
+                self.total_bytes += size
+            self._sizes.move_to_end(content_hash)
+            self._urls[image_url] = content_hash
+
+            while self.total_bytes > self.max_bytes and len(self._sizes) > 1:
+                evicted, evicted_size = self._sizes.popitem(last=False)
+                self.total_bytes -= evicted_size
+                self.evictions += 1
+                self._urls = {u: h for u, h in self._urls.items() if h != evicted}
+                await asyncio.to_thread(
+                    self._object_path(evicted).unlink, missing_ok=True
+                )
+            await self._save()
+
+    def _place(self, tmp_file: Path, target: Path) -> None:
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp_file, target)
+
+    def _write_index(self, urls: Dict[str, str]) -> None:
+        """原子写入索引文件（先写临时文件再替换）"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.index_file.with_suffix(".tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(urls, f, ensure_ascii=False)
+        os.replace(tmp_file, self.index_file)
+
+    async def _save(self) -> None:
+        """在线程池中保存索引，避免阻塞事件循环"""
+        try:
+            await asyncio.to_thread(self._write_index, dict(self._urls))
+        except Exception as e:
+            logger.error(f"Failed to save image cache index: {e}")
+
+    @staticmethod
+    async def iter_file(path: Path) -> AsyncIterator[bytes]:
+        """
+        以 mmap 方式按块读取本地文件
+
+        Args:
+            path: 文件路径（由 get_path 返回，非空文件）
+        """
+        # 打开、映射与读取页面都可能阻塞在磁盘 IO 上，放到线程中执行
+        mm = await asyncio.to_thread(ImageDiskCache._map_file, path)
+        try:
+            while chunk := await asyncio.to_thread(mm.read, _READ_CHUNK_SIZE):
+                yield chunk
+        finally:
+            await asyncio.to_thread(mm.close)
+
+    @staticmethod
+    def _map_file(path: Path) -> mmap.mmap:
+        # mmap 持有自己的文件描述符，关闭文件后映射仍然有效
+        with open(path, "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计信息"""
+        return {
+            "enabled": self.enabled,
+            "files": len(self._sizes),
+            "urls": len(self._urls),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+# 延迟初始化的全局图片缓存实例
+_image_store: Optional[ImageDiskCache] = None
+
+
+def get_image_store() -> ImageDiskCache:
+    """获取封面图片磁盘缓存单例"""
+    global _image_store
+    if _image_store is None:
+        _image_store = ImageDiskCache()
+    return _image_store
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+追加日志 + 快照的键值持久化
+每次写入只追加一行日志（O(1)），日志过长时压缩为快照
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# 日志操作：("set", key, value) 或 ("del", key, None)
+JournalOp = Tuple[str, str, Any]
+
+
+class JournalStore:
+    """
+    基于追加日志的键值存储
+
+    - 快照文件：完整的 JSON 对象 {key: value}
+    - 日志文件：每行一个 JSON 操作 {"op": "set"|"del", "k": key, "v": value}
+    - 加载：读取快照后按顺序重放日志；末尾写了一半的行（崩溃时）会被忽略，
+      并立即压缩以丢弃损坏部分
+    - 压缩：原子替换快照（临时文件 + fsync + os.replace）后清空日志；
+      两步之间崩溃时日志会被重放到新快照上，操作幂等，结果不变
+
+    所有方法都是同步阻塞的，异步调用方应通过 asyncio.to_thread 执行。
+    """
+
+    def __init__(
+        self,
+        snapshot_file: Path,
+        journal_file: Optional[Path] = None,
+        compact_threshold: int = 1000,
+    ):
+        """
+        Args:
+            snapshot_file: 快照文件路径
+            journal_file: 日志文件路径，默认为快照文件名加 .journal 后缀
+            compact_threshold: 日志累计多少条操作后触发压缩
+        """
+        self.snapshot_file = snapshot_file
+        self.journal_file = journal_file or snapshot_file.with_suffix(".journal")
+        self.compact_threshold = compact_threshold
+        self.journal_entries = 0
+
+    @property
+    def needs_compaction(self) -> bool:
+        """日志是否已超过压缩阈值"""
+        return self.journal_entries >= self.compact_threshold
+
+    def load(self) -> Dict[str, Any]:
+        """
+        加载快照并重放日志
+
+        Returns:
+            恢复后的完整数据
+
+        Raises:
+            json.JSONDecodeError: 快照文件损坏
+            OSError: 文件读取失败
+        """
+        data: Dict[str, Any] = {}
+        if self.snapshot_file.exists():
+            with open(self.snapshot_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+
+        self.journal_entries = 0
+        if not self.journal_file.exists():
+            return data
+
+        torn = False
+        with open(self.journal_file, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                    op, key = entry["op"], entry["k"]
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    logger.warning(
+                        f"Ignoring torn journal entry at {self.journal_file.name}:{line_no}"
+                    )
+                    torn = True
+                    break
+                if op == "set":
+                    data[key] = entry.get("v")
+                elif op == "del":
+                    data.pop(key, None)
+                self.journal_entries += 1
+
+        if torn:
+            # 立即压缩，避免后续追加的操作落在损坏行之后而在下次加载时被丢弃
+            self.compact(data)
+        return data
+
+    def append(self, ops: Iterable[JournalOp]) -> None:
+        """
+        追加操作到日志并落盘
+
+        Args:
+            ops: 操作列表
+        """
+        lines = "".join(
+            json.dumps({"op": op, "k": key, "v": value}, ensure_ascii=False) + "\n"
+            for op, key, value in ops
+        )
+        if not lines:
+            return
+        self.journal_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.journal_file, "a", encoding="utf-8") as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        self.journal_entries += lines.count("\n")
+
+    def compact(self, data: Dict[str, Any]) -> None:
+        """
+        将完整数据写为新快照并清空日志
+
+        Args:
+            data: 当前完整数据
+        """
+        self.snapshot_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.snapshot_file.with_suffix(".tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.snapshot_file)
+        # 快照已包含全部状态，此时清空日志是安全的
+        with open(self.journal_file, "w", encoding="utf-8"):
+            pass
+        self.journal_entries = 0
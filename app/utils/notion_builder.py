@@ -45,11 +45,15 @@ def build_album_properties(
 
     # file_upload: 有 ID 才写，上传失败/跳过时不覆盖 Notion 已有值
     if data.get("cover"):
-        props[F.COVER] = P.file_upload(data["cover"])
+        props[F.COVER] = P.file_upload(data["cover"], data.get("cover_filename"))
     if data.get("horizontal"):
-        props[F.COVER_HORIZONTAL] = P.file_upload(data["horizontal"])
+        props[F.COVER_HORIZONTAL] = P.file_upload(
+            data["horizontal"], data.get("horizontal_filename")
+        )
     if data.get("square"):
-        props[F.COVER_SQUARE] = P.file_upload(data["square"])
+        props[F.COVER_SQUARE] = P.file_upload(
+            data["square"], data.get("square_filename")
+        )
 
     return props
 
@@ -76,7 +80,7 @@ def build_audio_properties(
     }
 
     if data.get("cover"):
-        props[F.COVER] = P.file_upload(data["cover"])
+        props[F.COVER] = P.file_upload(data["cover"], data.get("cover_filename"))
 
     return props
 
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Notion 页面属性差异比较
+
+将写入格式（notion_builder 构建的 properties）与读取格式（pages.retrieve
+返回的 properties）规范化为同一形式后比较，只保留需要写入的属性。
+无法可靠比较的属性一律视为已变化；files 按文件名比较，写入值未指定
+文件名时同样视为已变化。
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+# 无法比较的属性值，与任何值都不相等
+_UNCOMPARABLE = object()
+
+
+def _plain_text(items: Optional[list]) -> str:
+    """拼接 title / rich_text 的文本内容（兼容写入与读取格式）"""
+    parts = []
+    for item in items or []:
+        if "plain_text" in item:
+            parts.append(item["plain_text"])
+        else:
+            parts.append(item.get("text", {}).get("content", ""))
+    return "".join(parts)
+
+
+def _date_instant(start: Optional[str]) -> Any:
+    """带时区偏移的时间转为 UTC 时刻比较，其余保持原字符串"""
+    if not start:
+        return None
+    try:
+        parsed = datetime.fromisoformat(start.replace("Z", "+00:00"))
+    except ValueError:
+        return start
+    if parsed.tzinfo is None:
+        return start
+    return parsed.timestamp()
+
+
+def normalize_property(value: Dict[str, Any]) -> Any:
+    """
+    将单个属性值规范化为可比较的形式
+
+    Args:
+        value: 写入格式或读取格式的属性值（如 {"number": 1}）
+
+    Returns:
+        规范化后的值，无法比较时返回 _UNCOMPARABLE
+    """
+    if "title" in value:
+        return ("text", _plain_text(value["title"]))
+    if "rich_text" in value:
+        return ("text", _plain_text(value["rich_text"]))
+    if "number" in value:
+        return ("number", value["number"])
+    if "select" in value:
+        select = value["select"]
+        return ("select", select.get("name") if select else None)
+    if "multi_select" in value:
+        return (
+            "multi_select",
+            tuple(item.get("name") for item in value["multi_select"] or []),
+        )
+    if "date" in value:
+        date = value["date"]
+        if not date:
+            return ("date", None, None)
+        return ("date", _date_instant(date.get("start")), date.get("time_zone"))
+    if "url" in value:
+        return ("url", value["url"] or None)
+    if "files" in value:
+        # 读取格式不含 file_upload id，只能按文件名（写入时显式指定）对应
+        names = tuple(item.get("name") for item in value["files"] or [])
+        if None in names:
+            return _UNCOMPARABLE
+        return ("files", names)
+    return _UNCOMPARABLE
+
+
+def diff_properties(desired: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    挑出与页面当前值不同的属性
+
+    Args:
+        desired: 准备写入的属性（写入格式）
+        current: 页面当前属性（pages.retrieve 返回的 properties）
+
+    Returns:
+        需要写入的属性子集
+    """
+    changed: Dict[str, Any] = {}
+    for name, value in desired.items():
+        existing = current.get(name)
+        if existing is None:
+            changed[name] = value
+            continue
+        normalized = normalize_property(value)
+        if normalized is _UNCOMPARABLE or normalized != normalize_property(existing):
+            changed[name] = value
+    return changed
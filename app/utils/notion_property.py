@@ -38,9 +38,16 @@ class NotionProp:
         return {"date": {"start": start, "time_zone": time_zone}}
 
     @staticmethod
-    def file_upload(file_id: str | None) -> Dict[str, Any]:
+    def file_upload(file_id: str | None, name: str | None = None) -> Dict[str, Any]:
         if file_id:
-            return {"files": [{"type": "file_upload", "file_upload": {"id": file_id}}]}
+            item: Dict[str, Any] = {
+                "type": "file_upload",
+                "file_upload": {"id": file_id},
+            }
+            # 显式指定文件名，读取页面时可据此判断是否为同一封面
+            if name:
+                item["name"] = name
+            return {"files": [item]}
         return {"files": []}
 
     @staticmethod
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+带优先级的并发限制器
+限制同时执行的任务数，排队时优先级高（数值小）的任务先获得名额
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Hashable, List, Optional, Tuple
+
+# 优先级：数值越小越先执行
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+_PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_BACKGROUND: "background",
+}
+
+
+class _PriorityStats:
+    """单个优先级的排队统计"""
+
+    def __init__(self):
+        self.acquired = 0
+        self.queued = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, waited: float, queued: bool) -> None:
+        self.acquired += 1
+        if queued:
+            self.queued += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "acquired": self.acquired,
+            "queued": self.queued,
+            "total_wait_seconds": round(self.total_wait, 3),
+            "max_wait_seconds": round(self.max_wait, 3),
+            "avg_wait_seconds": (
+                round(self.total_wait / self.acquired, 3) if self.acquired else 0.0
+            ),
+        }
+
+
+class PriorityLimiter:
+    """
+    优先级并发限制器
+
+    - 最多 concurrency 个任务同时持有名额
+    - 名额不足时进入优先级队列；同优先级按到达顺序（FIFO）
+    - 任务释放名额时直接交给队首等待者，后到的任务不会插队
+    - 排队中的任务可通过 promote() 提升优先级（如高优先级调用方加入了同一任务）
+    - concurrency 不大于 0 时不限制并发（仍记录统计）
+    """
+
+    def __init__(self, name: str, concurrency: int):
+        """
+        Args:
+            name: 限制器名称（用于统计）
+            concurrency: 最大并发数
+        """
+        self.name = name
+        self.concurrency = concurrency
+        self.active = 0
+        # (优先级, 到达序号, future, 调用方标识)
+        self._waiters: List[Tuple[int, int, asyncio.Future, Optional[Hashable]]] = []
+        self._counter = itertools.count()
+        self._stats: Dict[int, _PriorityStats] = {}
+
+    @property
+    def waiting(self) -> int:
+        """正在排队的任务数"""
+        return sum(1 for _, _, fut, _ in self._waiters if not fut.done())
+
+    async def acquire(
+        self, priority: int = PRIORITY_INTERACTIVE, key: Optional[Hashable] = None
+    ) -> float:
+        """
+        获取一个名额，必要时按优先级排队
+
+        Args:
+            priority: 优先级，数值越小越先获得名额
+            key: 调用方标识，排队期间可用于 promote()
+
+        Returns:
+            排队等待的秒数
+        """
+        start = time.monotonic()
+        queued = not (
+            self.concurrency <= 0
+            or (self.active < self.concurrency and not self.waiting)
+        )
+        if not queued:
+            self.active += 1
+        else:
+            fut = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiters, (priority, next(self._counter), fut, key))
+            try:
+                # 名额由 release() 直接转交，active 计数已在转交时加上
+                await fut
+            except asyncio.CancelledError:
+                if fut.done() and not fut.cancelled():
+                    # 名额已转交但调用方被取消，归还名额
+                    self.release()
+                raise
+
+        waited = time.monotonic() - start
+        self._stats.setdefault(priority, _PriorityStats()).record(waited, queued)
+        return waited
+
+    def release(self) -> None:
+        """释放名额，有等待者时转交给优先级最高的等待者"""
+        while self._waiters:
+            _, _, fut, _ = heapq.heappop(self._waiters)
+            if not fut.done():
+                fut.set_result(None)
+                return
+        self.active -= 1
+
+    def promote(self, key: Hashable, priority: int) -> bool:
+        """
+        提升排队中任务的优先级（只升不降，保持原有到达顺序）
+
+        Args:
+            key: acquire() 时传入的调用方标识
+            priority: 新的优先级
+
+        Returns:
+            是否有排队中的任务被提升
+        """
+        promoted = False
+        for i, (current, order, fut, waiter_key) in enumerate(self._waiters):
+            if waiter_key == key and priority < current and not fut.done():
+                self._waiters[i] = (priority, order, fut, waiter_key)
+                promoted = True
+        if promoted:
+            heapq.heapify(self._waiters)
+        return promoted
+
+    @asynccontextmanager
+    async def slot(
+        self, priority: int = PRIORITY_INTERACTIVE, key: Optional[Hashable] = None
+    ) -> AsyncIterator[float]:
+        """
+        在名额内执行代码块
+
+        Args:
+            priority: 优先级
+            key: 调用方标识，排队期间可用于 promote()
+
+        Yields:
+            排队等待的秒数
+        """
+        waited = await self.acquire(priority, key)
+        try:
+            yield waited
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """并发与排队统计信息"""
+        return {
+            "concurrency": self.concurrency,
+            "active": self.active,
+            "waiting": self.waiting,
+            "priorities": {
+                _PRIORITY_NAMES.get(priority, str(priority)): stats.to_dict()
+                for priority, stats in sorted(self._stats.items())
+            },
+        }
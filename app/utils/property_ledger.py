@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Notion 属性写入账本
+记录每个页面各属性最近一次成功写入值的哈希，写入前剔除未变化的属性，
+无需额外读取页面。页面被手动修改后可通过接口使账本失效。
+"""
+
+import asyncio
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from app.utils.journal_store import JournalStore
+from app.utils.logger import setup_logger
+from app.utils.config import config
+
+logger = setup_logger(__name__)
+
+
+def _page_key(page_id: str) -> str:
+    """页面 ID 统一为不带连字符的小写形式（webhook 与 API 返回格式可能不同）"""
+    return page_id.replace("-", "").lower()
+
+
+def property_hash(value: Any) -> str:
+    """
+    计算属性值的稳定哈希（键排序后的 JSON）
+
+    Args:
+        value: 写入格式的属性值
+
+    Returns:
+        16 位十六进制摘要
+    """
+    encoded = json.dumps(value, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16]
+
+
+class PropertyLedger:
+    """
+    页面属性哈希账本
+
+    数据结构：{page_id: {property_name: hash}}，通过 JournalStore 持久化
+    （每次记录只追加该页面的一行日志）。
+    """
+
+    def __init__(self, ledger_file: Optional[Path] = None):
+        """
+        Args:
+            ledger_file: 快照文件路径，默认 DATA_DIR/property_ledger.json
+        """
+        self.ledger_file = ledger_file or Path(config.DATA_DIR) / "property_ledger.json"
+        self._store = JournalStore(self.ledger_file)
+        self._pages: Dict[str, Dict[str, str]] = {}
+        self._lock: Optional[asyncio.Lock] = None
+        self.skipped = 0
+        self.sent = 0
+        self._load()
+
+    @property
+    def lock(self) -> asyncio.Lock:
+        """延迟初始化异步锁"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    def _load(self) -> None:
+        """从快照和日志恢复账本，失败时从空账本开始"""
+        try:
+            self._pages = self._store.load()
+            if self._pages:
+                logger.info(f"Loaded property ledger for {len(self._pages)} pages")
+        except Exception as e:
+            logger.warning(f"Failed to load property ledger: {type(e).__name__}: {e}")
+            self._pages = {}
+
+    def filter_changed(self, page_id: str, values: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        剔除与上次成功写入相同的属性
+
+        Args:
+            page_id: 页面ID
+            values: 待写入的属性（写入格式）
+
+        Returns:
+            需要写入的属性子集
+        """
+        recorded = self._pages.get(_page_key(page_id), {})
+        changed = {
+            name: value
+            for name, value in values.items()
+            if recorded.get(name) != property_hash(value)
+        }
+        self.skipped += len(values) - len(changed)
+        self.sent += len(changed)
+        return changed
+
+    async def _write(self, ops) -> None:
+        """追加日志，必要时压缩（在线程池中执行）"""
+        try:
+            await asyncio.to_thread(self._store.append, ops)
+            if self._store.needs_compaction:
+                await asyncio.to_thread(self._store.compact, dict(self._pages))
+        except Exception as e:
+            logger.error(f"Failed to save property ledger: {e}")
+
+    async def record(self, page_id: str, values: Dict[str, Any]) -> None:
+        """
+        记录成功写入（或已确认与页面一致）的属性值
+
+        Args:
+            page_id: 页面ID
+            values: 属性（写入格式）
+        """
+        key = _page_key(page_id)
+        async with self.lock:
+            hashes = {
+                **self._pages.get(key, {}),
+                **{name: property_hash(value) for name, value in values.items()},
+            }
+            if hashes == self._pages.get(key):
+                return
+            self._pages[key] = hashes
+            await self._write([("set", key, hashes)])
+
+    async def invalidate(self, page_id: Optional[str] = None) -> int:
+        """
+        使账本失效（页面被手动修改后调用），下次写入时发送全部属性
+
+        Args:
+            page_id: 页面ID，None 表示清空整个账本
+
+        Returns:
+            失效的页面数
+        """
+        async with self.lock:
+            if page_id is None:
+                count = len(self._pages)
+                self._pages = {}
+                try:
+                    await asyncio.to_thread(self._store.compact, {})
+                except Exception as e:
+                    logger.error(f"Failed to save property ledger: {e}")
+                logger.info(f"Property ledger cleared ({count} pages)")
+                return count
+
+            key = _page_key(page_id)
+            if self._pages.pop(key, None) is None:
+                return 0
+            await self._write([("del", key, None)])
+            logger.info(f"Property ledger invalidated for page {page_id}")
+            return 1
+
+    def stats(self) -> Dict[str, Any]:
+        """账本统计信息"""
+        return {
+            "enabled": config.NOTION_WRITE_LEDGER,
+            "pages": len(self._pages),
+            "properties_skipped": self.skipped,
+            "properties_sent": self.sent,
+        }
+
+
+# 延迟初始化的全局账本实例
+_property_ledger: Optional[PropertyLedger] = None
+
+
+def get_property_ledger() -> PropertyLedger:
+    """获取属性写入账本单例"""
+    global _property_ledger
+    if _property_ledger is None:
+        _property_ledger = PropertyLedger()
+    return _property_ledger
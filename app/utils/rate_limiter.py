@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+异步令牌桶限流器
+请求超出速率时按到达顺序排队等待，而不是直接失败
+"""
+
+import asyncio
+import time
+from typing import Any, Dict
+
+
+class AsyncTokenBucket:
+    """
+    令牌桶限流器
+
+    - 令牌以 rate 个/秒的速度补充，最多积攒 capacity 个（允许的突发量）
+    - 每次 acquire 消耗一个令牌，令牌不足时等待补充
+    - 等待者通过 asyncio.Lock 排队，按 FIFO 顺序获得令牌
+    - pause() 可在上游要求退避（如 429 Retry-After）时暂停所有请求
+    - rate 不大于 0 时不限流（pause 仍然生效）
+    """
+
+    def __init__(self, name: str, rate: float, capacity: float = 1.0):
+        """
+        Args:
+            name: 限流器名称（用于日志和统计）
+            rate: 每秒补充的令牌数
+            capacity: 令牌桶容量
+        """
+        self.name = name
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock: asyncio.Lock | None = None
+        self._paused_until = 0.0
+
+        self.acquired = 0
+        self.delayed = 0
+        self.waiting = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @property
+    def lock(self) -> asyncio.Lock:
+        """延迟初始化异步锁（需要在事件循环中创建）"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    def _refill(self) -> None:
+        """按流逝时间补充令牌"""
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated_at) * self.rate
+        )
+        self._updated_at = now
+
+    async def acquire(self) -> float:
+        """
+        获取一个令牌，必要时排队等待
+
+        Returns:
+            本次等待的秒数
+        """
+        if self.rate <= 0 and self._paused_until <= time.monotonic():
+            self.acquired += 1
+            return 0.0
+
+        start = time.monotonic()
+        self.waiting += 1
+        try:
+            async with self.lock:
+                # pause() 可能在等待期间被再次调用，循环直到暂停结束
+                while (pause := self._paused_until - time.monotonic()) > 0:
+                    await asyncio.sleep(pause)
+                if self.rate > 0:
+                    self._refill()
+                    if self._tokens < 1:
+                        await asyncio.sleep((1 - self._tokens) / self.rate)
+                        self._refill()
+                    self._tokens -= 1
+        finally:
+            self.waiting -= 1
+
+        waited = time.monotonic() - start
+        self.acquired += 1
+        if waited > 0.001:
+            self.delayed += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+        return waited
+
+    def pause(self, seconds: float) -> None:
+        """
+        暂停发放令牌 seconds 秒（与已有暂停取较晚者）
+
+        Args:
+            seconds: 暂停时长
+        """
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        """限流统计信息"""
+        return {
+            "rate": self.rate,
+            "capacity": self.capacity,
+            "acquired": self.acquired,
+            "delayed": self.delayed,
+            "waiting": self.waiting,
+            "total_wait_seconds": round(self.total_wait, 3),
+            "max_wait_seconds": round(self.max_wait, 3),
+            "avg_wait_seconds": (
+                round(self.total_wait / self.acquired, 3) if self.acquired else 0.0
+            ),
+        }
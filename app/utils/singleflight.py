@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Single-flight 请求合并
+同一 key 的并发调用只执行一次，其余调用等待并共享同一结果
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[K, T]):
+    """
+    并发调用合并器
+
+    首个调用者启动实际任务，后续相同 key 的调用者等待同一任务完成。
+    任务运行在独立的 asyncio.Task 中，某个调用者被取消（如客户端断开）
+    不会影响其他等待者。结果对象在调用者之间共享，调用方不应原地修改。
+    """
+
+    def __init__(self):
+        self._inflight: Dict[K, "asyncio.Task[T]"] = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key: K, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        执行或加入 key 对应的进行中任务
+
+        Args:
+            key: 合并键
+            fn: 无参协程工厂，仅在没有进行中任务时调用
+
+        Returns:
+            任务结果（异常同样会传播给所有等待者）
+        """
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._on_done(key, t))
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    def _on_done(self, key: K, task: "asyncio.Task[Any]") -> None:
+        """任务结束后移除记录，并标记异常已读取，避免所有等待者都取消时告警"""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()
+
+    @property
+    def inflight(self) -> int:
+        """当前进行中的任务数"""
+        return len(self._inflight)
+
+    def stats(self) -> Dict[str, int]:
+        """合并统计信息"""
+        return {
+            "calls": self.calls,
+            "shared": self.shared,
+            "inflight": self.inflight,
+        }
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+进程内 TTL + LRU 缓存
+用于短时间内复用上游 API 响应，避免重复请求
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """
+    带过期时间与容量上限的内存缓存
+
+    - 条目写入后 ttl 秒过期，过期条目在访问时惰性清除
+    - 超出 maxsize 时淘汰最久未使用（LRU）的条目
+    - maxsize 或 ttl 不大于 0 时缓存关闭，所有 get 均为 miss
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        """
+        Args:
+            maxsize: 最大条目数
+            ttl: 条目存活时间（秒）
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[K, Tuple[float, V]]" = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        """缓存是否启用"""
+        return self.maxsize > 0 and self.ttl > 0
+
+    def get(self, key: K) -> Optional[V]:
+        """
+        获取缓存值，命中时刷新 LRU 顺序
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            缓存值，未命中或已过期返回 None
+        """
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: K, value: V) -> None:
+        """
+        写入缓存，超出容量时淘汰最久未使用的条目
+
+        Args:
+            key: 缓存键
+            value: 缓存值
+        """
+        if not self.enabled:
+            return
+
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: K) -> Optional[V]:
+        """移除并返回指定条目（不计入命中统计）"""
+        item = self._data.pop(key, None)
+        return item[1] if item is not None else None
+
+    def clear(self) -> None:
+        """清空缓存（保留统计计数）"""
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计信息"""
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Notion 文件上传索引
+本地维护 filename -> file_upload_id 映射，后台分页同步 Notion file uploads 列表，
+查找时无需访问 Notion
+"""
+
+import asyncio
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, TypedDict
+
+from notion_client import AsyncClient
+
+from app.utils.config import config
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class IndexEntry(TypedDict):
+    """索引条目"""
+
+    id: str
+    # Notion 返回的过期时间（epoch 秒），未知为 None
+    expires_at: Optional[float]
+
+
+def _expiry_epoch(file_info: Dict[str, Any]) -> Optional[float]:
+    """解析 file upload 对象的 expiry_time（ISO 8601）为 epoch 秒"""
+    expiry_time = file_info.get("expiry_time")
+    if not expiry_time:
+        return None
+    try:
+        return datetime.fromisoformat(expiry_time).timestamp()
+    except ValueError:
+        return None
+
+
+class NotionUploadIndex:
+    """
+    Notion 已上传文件的文件名索引
+
+    同步策略：Notion 按创建时间倒序返回 file uploads，每轮同步从最新一页开始
+    沿 next_cursor 翻页，遇到不晚于上次同步高水位（created_time）的条目即停止。
+    首次同步会遍历全部分页；中途失败时不推进高水位，下一轮重新补齐。
+
+    - 只索引 status 为 uploaded 的上传，并记录其过期时间；已过期的条目在查找时淘汰，
+      查找方校验失败时通过 discard_id 移除
+    - 同步时仍处于 pending 的上传不会让高水位越过它，之后的同步会重新扫描到它
+    """
+
+    def __init__(self, index_file: Optional[Path] = None):
+        self.index_file = index_file or Path(config.DATA_DIR) / "upload_index.json"
+        # {filename: IndexEntry}
+        self._index: Dict[str, IndexEntry] = {}
+        # 已完整同步到的最新 created_time（ISO 8601 字符串，可直接比较），
+        # None 表示尚未同步到任何上传
+        self._high_water: Optional[str] = None
+        # 是否已完成至少一次完整同步（工作区为空时高水位仍为 None）
+        self._synced = False
+        self._task: Optional[asyncio.Task] = None
+        self._sync_lock: Optional[asyncio.Lock] = None
+        self.expired = 0
+        self._load()
+
+    @property
+    def ready(self) -> bool:
+        """是否已完成至少一次完整同步"""
+        return self._synced
+
+    @property
+    def sync_lock(self) -> asyncio.Lock:
+        """延迟初始化异步锁"""
+        if self._sync_lock is None:
+            self._sync_lock = asyncio.Lock()
+        return self._sync_lock
+
+    def _load(self) -> None:
+        """从文件加载索引，失败时从空索引开始"""
+        try:
+            if not self.index_file.exists():
+                logger.info("Upload index not found, starting with empty index")
+                return
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._index = {
+                name: (
+                    {"id": value, "expires_at": None}
+                    if isinstance(value, str)
+                    else value
+                )
+                for name, value in data.get("files", {}).items()
+            }
+            # 兼容旧格式：空字符串表示已同步但没有任何上传
+            self._high_water = data.get("high_water") or None
+            self._synced = data.get("synced", data.get("high_water") is not None)
+            logger.info(f"Loaded upload index with {len(self._index)} files")
+        except Exception as e:
+            logger.warning(f"Failed to load upload index: {type(e).__name__}: {e}")
+            self._index = {}
+            self._high_water = None
+            self._synced = False
+
+    def _write(self, snapshot: Dict[str, Any]) -> None:
+        """原子写入索引文件（先写临时文件再替换）"""
+        self.index_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.index_file.with_suffix(".tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(tmp_file, self.index_file)
+
+    async def _save(self) -> None:
+        """在线程池中保存索引，避免阻塞事件循环"""
+        snapshot = {
+            "synced": self._synced,
+            "high_water": self._high_water,
+            "files": dict(self._index),
+        }
+        try:
+            await asyncio.to_thread(self._write, snapshot)
+        except Exception as e:
+            logger.error(f"Failed to save upload index: {e}")
+
+    def get(self, filename: str) -> Optional[str]:
+        """
+        查找文件名对应的 file_upload_id（已过期或临近过期的条目直接淘汰）
+
+        Args:
+            filename: 上传时使用的文件名
+
+        Returns:
+            file_upload_id 或 None
+        """
+        entry = self.get_entry(filename)
+        return entry["id"] if entry else None
+
+    def get_entry(self, filename: str) -> Optional[IndexEntry]:
+        """
+        查找文件名对应的索引条目（已过期或临近过期的条目直接淘汰）
+
+        返回的条目若有已知过期时间，则距过期还有超过 COVER_CACHE_EXPIRY_MARGIN 秒
+
+        Args:
+            filename: 上传时使用的文件名
+
+        Returns:
+            条目副本或 None
+        """
+        entry = self._index.get(filename)
+        if entry is None:
+            return None
+        expires_at = entry["expires_at"]
+        if (
+            expires_at is not None
+            and expires_at - config.COVER_CACHE_EXPIRY_MARGIN <= time.time()
+        ):
+            # 下次保存时一并写入文件
+            del self._index[filename]
+            self.expired += 1
+            return None
+        return {"id": entry["id"], "expires_at": expires_at}
+
+    async def add(
+        self, filename: str, file_upload_id: str, expires_at: Optional[float] = None
+    ) -> None:
+        """
+        记录新上传的文件
+
+        Args:
+            filename: 文件名
+            file_upload_id: Notion file_upload_id
+            expires_at: 过期时间（epoch 秒），未知为 None
+        """
+        self._index[filename] = {"id": file_upload_id, "expires_at": expires_at}
+        await self._save()
+
+    async def discard_id(self, file_upload_id: str) -> None:
+        """
+        移除指向某个 file_upload_id 的条目（该上传已过期或失效时调用）
+
+        Args:
+            file_upload_id: Notion file_upload_id
+        """
+        stale = [
+            name for name, entry in self._index.items() if entry["id"] == file_upload_id
+        ]
+        if not stale:
+            return
+        for name in stale:
+            del self._index[name]
+        await self._save()
+
+    async def sync(self, client: AsyncClient) -> int:
+        """
+        从 Notion 增量同步已上传文件列表
+
+        Args:
+            client: Notion 异步客户端
+
+        Returns:
+            本轮新增或更新的条目数
+        """
+        async with self.sync_lock:
+            stop_at = self._high_water
+            newest: Optional[str] = None
+            # 本轮遇到的最早的 pending 上传，高水位不能越过它
+            oldest_pending: Optional[str] = None
+            # 本轮扫描到的 created_time（用于计算 pending 之前的高水位）
+            scanned: list[str] = []
+            seen: set[str] = set()
+            cursor: Optional[str] = None
+            changed = 0
+
+            while True:
+                kwargs: Dict[str, Any] = {"page_size": 100}
+                if cursor:
+                    kwargs["start_cursor"] = cursor
+                response = await client.file_uploads.list(**kwargs)
+
+                reached_known = False
+                for file_info in response.get("results", []):
+                    created_time = file_info.get("created_time", "")
+                    if stop_at is not None and created_time <= stop_at:
+                        reached_known = True
+                        break
+                    if newest is None or created_time > newest:
+                        newest = created_time
+                    scanned.append(created_time)
+                    status = file_info.get("status")
+                    filename = file_info.get("filename")
+                    file_upload_id = file_info.get("id")
+                    if status == "pending":
+                        if oldest_pending is None or created_time < oldest_pending:
+                            oldest_pending = created_time
+                        continue
+                    if not filename or not file_upload_id:
+                        continue
+                    if status != "uploaded":
+                        # 已过期/失败的上传不能再使用
+                        entry = self._index.get(filename)
+                        if entry is not None and entry["id"] == file_upload_id:
+                            del self._index[filename]
+                            changed += 1
+                        continue
+                    # 同一轮中先出现的是更新的上传，保留最新的那个
+                    if filename in seen:
+                        continue
+                    seen.add(filename)
+                    latest: IndexEntry = {
+                        "id": file_upload_id,
+                        "expires_at": _expiry_epoch(file_info),
+                    }
+                    if self._index.get(filename) != latest:
+                        self._index[filename] = latest
+                        changed += 1
+
+                cursor = response.get("next_cursor")
+                if reached_known or not response.get("has_more") or not cursor:
+                    break
+                if changed:
+                    # 长时间的首次同步按页保存进度
+                    await self._save()
+
+            if oldest_pending is not None:
+                # 只推进到最早的 pending 上传之前，下一轮会重新扫描它
+                newest = max((t for t in scanned if t < oldest_pending), default=None)
+            self._high_water = max(filter(None, (stop_at, newest)), default=None)
+            self._synced = True
+            await self._save()
+            logger.info(
+                f"Upload index synced: {changed} changed, {len(self._index)} total"
+            )
+            return changed
+
+    async def _run(self, client: AsyncClient) -> None:
+        """后台同步循环"""
+        interval = config.UPLOAD_INDEX_REFRESH_INTERVAL
+        while True:
+            try:
+                await self.sync(client)
+            except Exception as e:
+                logger.warning(f"Upload index sync failed: {e}")
+            await asyncio.sleep(interval)
+
+    def start(self, client: AsyncClient) -> None:
+        """启动后台同步任务（由 lifespan 调用）"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(client))
+
+    async def stop(self) -> None:
+        """停止后台同步任务"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        """索引统计信息"""
+        return {
+            "files": len(self._index),
+            "ready": self.ready,
+            "high_water": self._high_water,
+            "expired": self.expired,
+        }
+
+
+# 延迟初始化的全局索引实例
+_upload_index: Optional[NotionUploadIndex] = None
+
+
+def get_upload_index() -> NotionUploadIndex:
+    """获取文件上传索引单例"""
+    global _upload_index
+    if _upload_index is None:
+        _upload_index = NotionUploadIndex()
+    return _upload_index
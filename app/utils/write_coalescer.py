@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+写入合并
+同一 key 在上一次写入发送期间（或可选的短时间窗口内）到达的多次写入按字段合并
+（后写覆盖），之后只发送一次，所有调用者共享该次写入的结果
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Generic, Hashable, Optional, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+
+FlushFn = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class _Batch:
+    """一个 key 在当前窗口内累积的写入"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.values: Dict[str, Any] = {}
+        self.flush: Optional[FlushFn] = None
+        self.future: asyncio.Future = loop.create_future()
+        self.flush_now = asyncio.Event()
+
+
+class WriteCoalescer(Generic[K]):
+    """
+    按 key 合并写入
+
+    - 某个 key 没有正在发送的批次时，新写入立即发送（window 为 0 时不增加延迟）；
+      发送期间到达的写入合并到下一批次，上一批次完成后一次发出
+    - window 大于 0 时，每个批次额外等待 window 秒收集写入（窗口长度固定，
+      不随新写入延长，单次写入的额外延迟不超过 window）
+    - 合并按字段后写覆盖，实际发送使用最后一个调用者提供的 flush 函数
+      （因此调用方的其他参数，如页面图标，同样以最后一次为准）
+    - 同一 key 的批次按顺序发送：上一批次发送完成前，下一批次不会发出
+    - 发送在独立的 asyncio.Task 中进行，某个调用者被取消不影响其他调用者
+    """
+
+    def __init__(self, window: float = 0):
+        """
+        Args:
+            window: 额外的合并窗口（秒），0 表示只合并发送期间到达的写入
+        """
+        self.window = window
+        self._pending: Dict[K, _Batch] = {}
+        # 每个 key 最后一个批次的发送任务，用于保证发送顺序
+        self._tails: Dict[K, "asyncio.Task[None]"] = {}
+        self.submitted = 0
+        self.flushes = 0
+        self.merged = 0
+
+    async def submit(self, key: K, values: Dict[str, Any], flush: FlushFn) -> Any:
+        """
+        提交一次写入并等待其所在批次发送完成
+
+        Args:
+            key: 合并键（如页面 ID）
+            values: 本次写入的字段
+            flush: 发送函数，参数为合并后的字段
+
+        Returns:
+            flush 的返回值（异常同样会传播给该批次的所有调用者）
+        """
+        self.submitted += 1
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = _Batch(asyncio.get_running_loop())
+            self._pending[key] = batch
+            previous = self._tails.get(key)
+            task = asyncio.create_task(self._flush_later(key, batch, previous))
+            self._tails[key] = task
+            task.add_done_callback(lambda t: self._on_done(key, t))
+        else:
+            self.merged += 1
+        batch.values.update(values)
+        batch.flush = flush
+        return await asyncio.shield(batch.future)
+
+    async def _flush_later(
+        self, key: K, batch: _Batch, previous: Optional["asyncio.Task[None]"]
+    ) -> None:
+        """等待窗口结束（或 flush_all）及上一批次完成后发送批次"""
+        if self.window > 0:
+            try:
+                await asyncio.wait_for(batch.flush_now.wait(), timeout=self.window)
+            except asyncio.TimeoutError:
+                pass
+        if previous is not None:
+            # 上一批次发送期间，新写入继续合并到本批次
+            await asyncio.wait([previous])
+        if self._pending.get(key) is batch:
+            del self._pending[key]
+
+        self.flushes += 1
+        assert batch.flush is not None
+        try:
+            batch.future.set_result(await batch.flush(batch.values))
+        except asyncio.CancelledError:
+            batch.future.cancel()
+            raise
+        except Exception as e:
+            batch.future.set_exception(e)
+            # 标记异常已读取，避免所有调用者都取消时告警
+            batch.future.exception()
+
+    def _on_done(self, key: K, task: "asyncio.Task[None]") -> None:
+        if self._tails.get(key) is task:
+            del self._tails[key]
+
+    async def flush_all(self) -> None:
+        """立即发送所有等待中的批次并等待完成（关闭客户端前调用）"""
+        for batch in list(self._pending.values()):
+            batch.flush_now.set()
+        tails = list(self._tails.values())
+        if tails:
+            await asyncio.wait(tails)
+
+    @property
+    def pending(self) -> int:
+        """当前等待发送的批次数"""
+        return len(self._pending)
+
+    def stats(self) -> Dict[str, Any]:
+        """合并统计信息"""
+        return {
+            "window": self.window,
+            "pending": self.pending,
+            "submitted": self.submitted,
+            "flushes": self.flushes,
+            "merged": self.merged,
+        }
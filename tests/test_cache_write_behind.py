@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+CoverCache write-behind 刷盘单元测试
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from app.utils.cache import CoverCache
+from app.utils.config import config
+from app.utils.journal_store import JournalStore
+
+
+@pytest.fixture
+def cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(type(config), "DATA_DIR", property(lambda self: str(tmp_path)))
+    monkeypatch.setattr(CoverCache, "_instance", None)
+    monkeypatch.setenv("COVER_CACHE_FLUSH_INTERVAL", "60")
+    monkeypatch.setenv("COVER_CACHE_FLUSH_THRESHOLD", "3")
+    return CoverCache()
+
+
+def _persisted(cache: CoverCache) -> dict:
+    """重新从磁盘读取已落盘的条目"""
+    return JournalStore(cache.cache_file).load()
+
+
+async def _wait_until(predicate, timeout=1.0):
+    for _ in range(int(timeout / 0.01)):
+        if predicate():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not met")
+
+
+def test_threshold_triggers_flush(cache):
+    async def scenario():
+        cache.start_write_behind()
+        try:
+            for i in range(2):
+                await cache.set(f"https://x/{i}.png", f"fu-{i}")
+            await asyncio.sleep(0.02)
+            # 未达阈值时只在内存中排队
+            assert _persisted(cache) == {}
+            await cache.set("https://x/2.png", "fu-2")
+            await _wait_until(lambda: not cache._pending)
+            return _persisted(cache)
+        finally:
+            await cache.stop_write_behind()
+
+    assert len(asyncio.run(scenario())) == 3
+
+
+def test_stop_flushes_pending_ops(cache):
+    async def scenario():
+        cache.start_write_behind()
+        await cache.set("https://x/a.png", "fu-1")
+        assert _persisted(cache) == {}
+        await cache.stop_write_behind()
+
+    asyncio.run(scenario())
+    assert _persisted(cache)["https://x/a.png"]["id"] == "fu-1"
+    assert not cache.write_behind
+
+
+def test_failed_flush_is_requeued(cache, monkeypatch):
+    append = cache._store.append
+    calls = []
+
+    def flaky_append(ops):
+        calls.append(list(ops))
+        if len(calls) == 1:
+            raise OSError("disk full")
+        append(ops)
+
+    monkeypatch.setattr(cache._store, "append", flaky_append)
+
+    async def scenario():
+        cache.start_write_behind()
+        await cache.set("https://x/a.png", "fu-1")
+        await cache.flush()
+        # 失败的操作放回队列，之后到达的操作排在其后
+        assert len(cache._pending) == 1
+        await cache.set("https://x/a.png", "fu-2")
+        await cache.stop_write_behind()
+
+    asyncio.run(scenario())
+    assert len(calls) == 2
+    assert [op[2]["id"] for op in calls[1]] == ["fu-1", "fu-2"]
+    assert _persisted(cache)["https://x/a.png"]["id"] == "fu-2"
+
+
+def test_stop_waits_for_in_flight_flush(cache, monkeypatch):
+    append = cache._store.append
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow_failing_append(ops):
+        calls.append(list(ops))
+        if len(calls) == 1:
+            started.set()
+            release.wait(1)
+            raise OSError("disk full")
+        append(ops)
+
+    monkeypatch.setattr(cache._store, "append", slow_failing_append)
+
+    async def scenario():
+        cache.start_write_behind()
+        for i in range(3):
+            await cache.set(f"https://x/{i}.png", f"fu-{i}")
+        # 阈值触发的刷盘进行中时请求停止
+        await asyncio.to_thread(started.wait, 1)
+        stopping = asyncio.create_task(cache.stop_write_behind())
+        await asyncio.sleep(0.02)
+        release.set()
+        await stopping
+
+    asyncio.run(scenario())
+    # 进行中的刷盘失败后放回队列，由最后一次刷盘写入，不会丢失
+    assert len(_persisted(cache)) == 3
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+CircuitBreaker 单元测试
+"""
+
+import time
+
+import pytest
+
+from app.utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+def _open(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.failure_threshold):
+        assert breaker.before_request() is False
+        breaker.record_failure()
+
+
+def test_opens_after_threshold_and_rejects():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_success_resets_consecutive_failures():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_allows_single_probe():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0)
+    _open(breaker)
+
+    assert breaker.before_request() is True
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.before_request() is False
+
+
+def test_failed_probe_reopens():
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=0.05)
+    _open(breaker)
+    time.sleep(0.06)
+
+    assert breaker.before_request() is True
+    breaker.record_failure()
+    # 半开状态下一次失败即重新打开，并重新开始冷却
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+
+
+def test_released_probe_can_be_retaken():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0)
+    _open(breaker)
+
+    assert breaker.before_request() is True
+    breaker.release()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.before_request() is True
+
+
+def test_disabled_breaker_never_opens():
+    breaker = CircuitBreaker("test", failure_threshold=0, reset_timeout=60)
+    for _ in range(10):
+        breaker.record_failure()
+    assert breaker.before_request() is False
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+封面内容哈希去重单元测试
+"""
+
+import asyncio
+import hashlib
+
+import httpx
+
+from app.clients import image_upload
+from app.clients.image_upload import CoverUploader
+from app.utils.image_store import ImageDiskCache
+
+IMAGE = b"\x89PNG\r\n\x1a\n" + b"x" * 1000
+URL = "https://example.com/a.png"
+
+
+def _setup(monkeypatch, tmp_path, mode):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, content=IMAGE)
+
+    store = ImageDiskCache(tmp_path / "images", max_bytes=1024 * 1024)
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setenv("COVER_UPLOAD_MODE", mode)
+    monkeypatch.setattr(image_upload, "get_image_store", lambda: store)
+    monkeypatch.setattr(image_upload, "get_image_http_client", lambda: client)
+    return store, requests
+
+
+def test_external_url_mode_does_not_download_for_hash(monkeypatch, tmp_path):
+    _, requests = _setup(monkeypatch, tmp_path, "external_url")
+    uploader = CoverUploader(URL, "a", client=object())
+
+    assert asyncio.run(uploader._hash_image()) is None
+    assert requests == []
+
+
+def test_direct_mode_downloads_once_into_disk_cache(monkeypatch, tmp_path):
+    store, requests = _setup(monkeypatch, tmp_path, "direct")
+    uploader = CoverUploader(URL, "a", client=object())
+
+    content_hash = asyncio.run(uploader._hash_image())
+    assert content_hash == hashlib.sha256(IMAGE).hexdigest()
+    assert len(requests) == 1
+    # 之后的 direct 上传直接读取本地文件，哈希也无需再次下载
+    assert store.get_path(URL) is not None
+    assert asyncio.run(uploader._hash_image()) == content_hash
+    assert len(requests) == 1
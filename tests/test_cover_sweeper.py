@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+CoverCacheSweeper 单元测试
+"""
+
+import asyncio
+import time
+from datetime import UTC, datetime
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from notion_client import APIResponseError
+
+from app.services import cover_sweeper
+from app.services.cover_sweeper import CoverCacheSweeper
+from app.utils.cache import CoverCache
+from app.utils.config import config
+from app.utils.priority_limiter import PRIORITY_BACKGROUND
+
+
+def _iso(epoch: float) -> str:
+    return datetime.fromtimestamp(epoch, tz=UTC).isoformat()
+
+
+class FakeFileUploads:
+    """按 file_upload_id 返回预设对象，缺失时返回 404"""
+
+    def __init__(self, uploads):
+        self.uploads = uploads
+        self.retrieved = []
+
+    async def retrieve(self, file_upload_id):
+        self.retrieved.append(file_upload_id)
+        if file_upload_id not in self.uploads:
+            raise APIResponseError(
+                "object_not_found", 404, "not found", httpx.Headers(), ""
+            )
+        return self.uploads[file_upload_id]
+
+
+class FakeIndex:
+    def __init__(self):
+        self.discarded = []
+
+    async def discard_id(self, file_upload_id):
+        self.discarded.append(file_upload_id)
+
+
+@pytest.fixture
+def env(monkeypatch, tmp_path):
+    monkeypatch.setattr(type(config), "DATA_DIR", property(lambda self: str(tmp_path)))
+    monkeypatch.setattr(CoverCache, "_instance", None)
+    monkeypatch.setenv("COVER_CACHE_TRUST_SECONDS", "0")
+    monkeypatch.setenv("COVER_CACHE_EXPIRY_MARGIN", "300")
+    monkeypatch.setenv("COVER_SWEEP_INTERVAL", "1800")
+    monkeypatch.setenv("COVER_SWEEP_IDLE_SECONDS", "3600")
+    cache = CoverCache()
+    # 没有使用记录的条目视为很久以前加载
+    cache._loaded_at = 0
+    index = FakeIndex()
+    uploads = []
+
+    async def fake_upload_cover(url, name, client=None, priority=None):
+        uploads.append((url, name, priority))
+        return "fu-new"
+
+    monkeypatch.setattr(cover_sweeper, "cover_cache", cache)
+    monkeypatch.setattr(cover_sweeper, "get_upload_index", lambda: index)
+    monkeypatch.setattr(cover_sweeper, "upload_cover", fake_upload_cover)
+    return SimpleNamespace(cache=cache, index=index, uploads=uploads)
+
+
+def _sweep(uploads):
+    client = SimpleNamespace(file_uploads=FakeFileUploads(uploads))
+    counts = asyncio.run(CoverCacheSweeper().sweep(client))
+    return counts, client.file_uploads
+
+
+def _add(env, url, file_upload_id, expires_at, used=True):
+    asyncio.run(env.cache.set(url, file_upload_id, expires_at, name="a"))
+    if used:
+        env.cache.touch(url)
+
+
+def test_valid_entry_far_from_expiry_is_revalidated(env):
+    expires_at = time.time() + 86400
+    _add(env, "https://x/a.png", "fu-1", expires_at)
+
+    counts, _ = _sweep(
+        {"fu-1": {"id": "fu-1", "status": "uploaded", "expiry_time": _iso(expires_at)}}
+    )
+
+    assert counts["revalidated"] == 1
+    assert env.cache.get("https://x/a.png") == "fu-1"
+    assert env.uploads == []
+
+
+def test_entry_expiring_before_next_sweep_is_reuploaded(env):
+    # 仍然有效，但下一轮巡检前就会进入过期余量
+    expires_at = time.time() + 1000
+    _add(env, "https://x/a.png", "fu-1", expires_at)
+
+    counts, _ = _sweep(
+        {"fu-1": {"id": "fu-1", "status": "uploaded", "expiry_time": _iso(expires_at)}}
+    )
+
+    assert counts["reuploaded"] == 1
+    assert env.uploads == [("https://x/a.png", "a", PRIORITY_BACKGROUND)]
+    # 旧 ID 从各索引中移除，重新上传时不会再次命中
+    assert env.index.discarded == ["fu-1"]
+    assert env.cache.get("https://x/a.png") is None
+
+
+def test_missing_upload_is_reuploaded(env):
+    _add(env, "https://x/a.png", "fu-1", None)
+
+    counts, _ = _sweep({})
+
+    assert counts["reuploaded"] == 1
+    assert env.index.discarded == ["fu-1"]
+
+
+def test_idle_entry_is_evicted_without_requests(env):
+    _add(env, "https://x/cold.png", "fu-1", time.time() + 1000, used=False)
+
+    counts, file_uploads = _sweep({})
+
+    assert counts["evicted"] == 1
+    assert counts["checked"] == 0
+    assert file_uploads.retrieved == []
+    assert env.uploads == []
+    assert env.cache.get("https://x/cold.png") is None
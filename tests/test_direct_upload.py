@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+direct 模式流式上传单元测试
+"""
+
+import asyncio
+import hashlib
+import re
+
+import httpx
+import pytest
+
+from app.clients import image_upload
+from app.clients.image_upload import CoverUploader, _ChunkReader
+from app.utils.image_store import ImageDiskCache
+
+PNG = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 4
+URL = "https://example.com/a.jpg"
+
+
+class FakeFileUploads:
+    """记录 create/complete 调用"""
+
+    def __init__(self):
+        self.created = []
+        self.completed = []
+
+    async def create(self, **kwargs):
+        self.created.append(kwargs)
+        return {"id": "fu-1"}
+
+    async def complete(self, file_upload_id):
+        self.completed.append(file_upload_id)
+        return {"id": file_upload_id, "status": "uploaded"}
+
+
+class FakeNotion:
+    """file_uploads 接口 + 记录 send 请求的 httpx 客户端"""
+
+    def __init__(self):
+        self.file_uploads = FakeFileUploads()
+        self.sends = []
+
+        def handler(request):
+            self.sends.append(request)
+            return httpx.Response(200, json={"id": "fu-1", "status": "uploaded"})
+
+        self.client = httpx.AsyncClient(
+            base_url="https://api.notion.com/v1/",
+            transport=httpx.MockTransport(handler),
+        )
+
+
+def _file_field(request: httpx.Request) -> bytes:
+    """取出 multipart 请求体中 file 字段的内容"""
+    boundary = request.headers["content-type"].split("boundary=")[1].encode()
+    tail = b"\r\n--" + boundary + b"--\r\n"
+    assert request.content.endswith(tail)
+    field = request.content.partition(b'name="file"')[2]
+    return field.split(b"\r\n\r\n", 1)[1][: -len(tail)]
+
+
+def _part_number(request: httpx.Request) -> int:
+    match = re.search(rb'name="part_number"\r\n\r\n(\d+)\r\n', request.content)
+    return int(match.group(1))
+
+
+async def _chunks(data: bytes, size: int = 7):
+    for i in range(0, len(data), size):
+        yield data[i : i + size]
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch, tmp_path):
+    monkeypatch.setattr(image_upload, "_format_cache", None)
+    store = ImageDiskCache(tmp_path / "images", max_bytes=1024 * 1024)
+    monkeypatch.setattr(image_upload, "get_image_store", lambda: store)
+    return store
+
+
+def _uploader(notion: FakeNotion, fmt: str = "png") -> CoverUploader:
+    uploader = CoverUploader(URL, "a", client=notion)
+    uploader._set_image_format(fmt)
+    return uploader
+
+
+def _serve_image(monkeypatch, stream=None, headers=None):
+    def handler(request):
+        if stream is not None:
+            return httpx.Response(200, stream=stream, headers=headers)
+        return httpx.Response(200, content=PNG)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(image_upload, "get_image_http_client", lambda: client)
+
+
+def test_single_part_streams_body_with_content_length(monkeypatch, fresh_state):
+    notion = FakeNotion()
+    _serve_image(monkeypatch)
+    uploader = _uploader(notion)
+
+    upload = asyncio.run(uploader._download_and_send())
+
+    assert upload["status"] == "uploaded"
+    assert notion.file_uploads.created == [
+        {"mode": "single_part", "filename": "a_cover.png", "content_type": "image/png"}
+    ]
+    (request,) = notion.sends
+    assert request.url.path == "/v1/file_uploads/fu-1/send"
+    assert request.headers["content-length"] == str(len(request.content))
+    assert b'filename="a_cover.png"' in request.content
+    assert _file_field(request) == PNG
+    # 边下载边发送时顺带计算哈希并归档到磁盘缓存
+    assert uploader._streamed_hash == hashlib.sha256(PNG).hexdigest()
+    assert fresh_state.get_hash(URL) == uploader._streamed_hash
+
+
+def test_multi_part_splits_into_parts_and_completes(monkeypatch):
+    monkeypatch.setattr(image_upload, "_SINGLE_PART_LIMIT", 500)
+    monkeypatch.setattr(image_upload, "_MULTI_PART_SIZE", 400)
+    notion = FakeNotion()
+    uploader = _uploader(notion)
+
+    upload = asyncio.run(uploader._send_image(_ChunkReader(_chunks(PNG)), len(PNG)))
+
+    assert upload == {"id": "fu-1", "status": "uploaded"}
+    assert notion.file_uploads.created[0]["mode"] == "multi_part"
+    assert notion.file_uploads.created[0]["number_of_parts"] == 3
+    assert [_part_number(r) for r in notion.sends] == [1, 2, 3]
+    parts = [_file_field(r) for r in notion.sends]
+    assert [len(p) for p in parts] == [400, 400, len(PNG) - 800]
+    assert b"".join(parts) == PNG
+    for request in notion.sends:
+        assert request.headers["content-length"] == str(len(request.content))
+    assert notion.file_uploads.completed == ["fu-1"]
+
+
+class TruncatedStream(httpx.AsyncByteStream):
+    """发送一部分数据后连接中断"""
+
+    async def __aiter__(self):
+        yield PNG[:100]
+        raise httpx.ReadError("connection reset")
+
+
+def test_truncated_stream_aborts_cache_write(monkeypatch, fresh_state, tmp_path):
+    notion = FakeNotion()
+    _serve_image(monkeypatch, stream=TruncatedStream())
+    uploader = _uploader(notion)
+
+    with pytest.raises(httpx.ReadError):
+        asyncio.run(uploader._download_and_send())
+
+    assert uploader._streamed_hash is None
+    assert fresh_state.get_path(URL) is None
+    assert list((tmp_path / "images" / "tmp").iterdir()) == []
+
+
+def test_format_is_corrected_from_first_chunk(monkeypatch):
+    notion = FakeNotion()
+    uploader = _uploader(notion, fmt="jpg")
+
+    asyncio.run(uploader._send_image(_ChunkReader(_chunks(PNG, size=4)), None))
+
+    assert uploader.image_name_all == "a_cover.png"
+    created = notion.file_uploads.created[0]
+    assert created["filename"] == "a_cover.png"
+    assert created["content_type"] == "image/png"
+    # 大小未知时使用分块传输编码
+    (request,) = notion.sends
+    assert "content-length" not in request.headers
+    assert request.headers["content-type"].startswith("multipart/form-data")
+    assert _file_field(request) == PNG
+    assert image_upload.get_format_cache().get(URL) == "png"
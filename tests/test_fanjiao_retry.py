@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Fanjiao 客户端重试与熔断单元测试
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.clients import fanjiao
+from app.clients.fanjiao import BaseFanjiaoClient, get_circuit_breaker
+
+BASE_URL = "https://fanjiao.example.com/api/album"
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setenv("FANJIAO_SALT", "salt")
+    monkeypatch.setenv("FANJIAO_BASE_URL", BASE_URL)
+    monkeypatch.setenv("FANJIAO_CV_BASE_URL", BASE_URL + "/cv")
+    monkeypatch.setenv("FANJIAO_AUDIO_BASE_URL", BASE_URL + "/audio")
+    monkeypatch.setenv("FANJIAO_RETRY_ATTEMPTS", "3")
+    monkeypatch.setenv("FANJIAO_RETRY_BACKOFF", "0.001")
+    monkeypatch.setenv("FANJIAO_RETRY_BACKOFF_MAX", "0.01")
+    monkeypatch.setenv("FANJIAO_BREAKER_THRESHOLD", "1")
+    monkeypatch.setenv("FANJIAO_BREAKER_RESET_TIMEOUT", "0")
+    monkeypatch.setenv("FANJIAO_RATE_LIMIT", "0")
+    monkeypatch.setattr(fanjiao, "_breakers", {})
+    monkeypatch.setattr(fanjiao, "_rate_limiters", {})
+
+
+def _use_transport(monkeypatch, handler):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(fanjiao, "_http_client", client)
+
+
+def _responses(*responses):
+    """依次返回预设响应，记录请求次数"""
+    queue = list(responses)
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        item = queue.pop(0)
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    return handler, calls
+
+
+def test_retries_transient_errors_then_succeeds(monkeypatch):
+    handler, calls = _responses(
+        httpx.ConnectError("down"),
+        httpx.Response(503),
+        httpx.Response(200, json={"ok": True}),
+    )
+    _use_transport(monkeypatch, handler)
+
+    result = asyncio.run(BaseFanjiaoClient()._request(BASE_URL, "album_id=1"))
+    assert result == {"ok": True}
+    assert len(calls) == 3
+    assert calls[0].headers["signature"]
+    assert get_circuit_breaker(BASE_URL).state == "closed"
+
+
+def test_client_error_is_not_retried(monkeypatch):
+    handler, calls = _responses(httpx.Response(404))
+    _use_transport(monkeypatch, handler)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(BaseFanjiaoClient()._request(BASE_URL, "album_id=1"))
+    assert len(calls) == 1
+    # 4xx 说明上游可达，不打开熔断器
+    assert get_circuit_breaker(BASE_URL).state == "closed"
+
+
+def test_exhausted_retries_open_breaker(monkeypatch):
+    handler, calls = _responses(*(httpx.Response(500) for _ in range(3)))
+    _use_transport(monkeypatch, handler)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(BaseFanjiaoClient()._request(BASE_URL, "album_id=1"))
+    assert len(calls) == 3
+    assert get_circuit_breaker(BASE_URL).state == "open"
+
+
+def test_retry_after_is_honoured():
+    error = httpx.HTTPStatusError(
+        "429",
+        request=httpx.Request("GET", BASE_URL),
+        response=httpx.Response(429, headers={"Retry-After": "3"}),
+    )
+    assert fanjiao._retry_delay(1, error) == 0.01  # 受 FANJIAO_RETRY_BACKOFF_MAX 限制
+
+
+def test_cancelled_request_does_not_release_running_probe(monkeypatch):
+    breaker = get_circuit_breaker(BASE_URL)
+    started = asyncio.Queue()
+    release = asyncio.Event()
+
+    async def handler(request):
+        started.put_nowait(request.url.params["album_id"])
+        await release.wait()
+        return httpx.Response(200, json={})
+
+    _use_transport(monkeypatch, handler)
+
+    async def scenario():
+        client = BaseFanjiaoClient()
+        # 熔断器关闭时发出的普通请求
+        plain = asyncio.create_task(client._request(BASE_URL, "album_id=1"))
+        await asyncio.wait_for(started.get(), timeout=1)
+
+        # 其他请求失败导致熔断，冷却结束后进入半开并发出探测请求
+        breaker.record_failure()
+        probe = asyncio.create_task(client._request(BASE_URL, "album_id=2"))
+        await asyncio.wait_for(started.get(), timeout=1)
+        assert breaker.state == "half_open"
+
+        # 普通请求被取消时不能释放探测请求占用的名额
+        plain.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await plain
+        with pytest.raises(RuntimeError):
+            await asyncio.wait_for(client._request(BASE_URL, "album_id=3"), 1)
+
+        release.set()
+        return await probe
+
+    assert asyncio.run(scenario()) == {}
+    assert breaker.state == "closed"
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+图片格式识别单元测试
+"""
+
+import pytest
+
+from app.clients.image_upload import detect_image_format
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        (b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR", "png"),
+        (b"\xff\xd8\xff\xe0\x00\x10JFIF\x00", "jpg"),
+        (b"GIF87a\x01\x00\x01\x00", "gif"),
+        (b"GIF89a\x01\x00\x01\x00", "gif"),
+        (b"RIFF\x24\x00\x00\x00WEBPVP8 ", "webp"),
+        (b"\x00\x00\x00\x1cftypavif\x00\x00\x00\x00", "avif"),
+        (b"\x00\x00\x00\x20ftypavis\x00\x00\x00\x00", "avif"),
+    ],
+)
+def test_detect_known_formats(header, expected):
+    assert detect_image_format(header) == expected
+
+
+@pytest.mark.parametrize(
+    "header",
+    [
+        b"",
+        b"<!DOCTYPE html>",
+        b"RIFF\x24\x00\x00\x00WAVEfmt ",
+        b"\x00\x00\x00\x1cftypheic\x00\x00\x00\x00",
+    ],
+)
+def test_detect_unknown_formats(header):
+    assert detect_image_format(header) is None
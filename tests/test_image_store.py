@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+ImageDiskCache 单元测试
+"""
+
+import asyncio
+import hashlib
+import os
+
+from app.utils import image_store
+from app.utils.image_store import ImageDiskCache
+
+
+async def _put(store: ImageDiskCache, url: str, data: bytes) -> str:
+    writer = store.writer(url)
+    assert writer is not None
+    for i in range(0, len(data), 7):
+        await writer.write(data[i : i + 7])
+    return await writer.commit()
+
+
+async def _read(store: ImageDiskCache, url: str) -> bytes:
+    path = store.get_path(url)
+    assert path is not None
+    return b"".join([chunk async for chunk in ImageDiskCache.iter_file(path)])
+
+
+def test_put_and_read_back(tmp_path):
+    async def scenario():
+        store = ImageDiskCache(root=tmp_path, max_bytes=1024)
+        content_hash = await _put(store, "https://x/a.png", b"image-bytes" * 10)
+        return store, content_hash, await _read(store, "https://x/a.png")
+
+    store, content_hash, data = asyncio.run(scenario())
+    assert data == b"image-bytes" * 10
+    assert content_hash == hashlib.sha256(data).hexdigest()
+    assert store.get_hash("https://x/a.png") == content_hash
+    assert store.get_path("https://x/missing.png") is None
+    assert store.stats()["hits"] == 1
+
+
+def test_identical_content_is_stored_once(tmp_path):
+    async def scenario():
+        store = ImageDiskCache(root=tmp_path, max_bytes=1024)
+        await _put(store, "https://x/cover.png", b"same" * 20)
+        await _put(store, "https://x/square.png", b"same" * 20)
+        return store
+
+    store = asyncio.run(scenario())
+    assert store.stats()["files"] == 1
+    assert store.stats()["urls"] == 2
+    assert store.total_bytes == 80
+
+
+def test_concurrent_commits_of_same_content_count_once(tmp_path):
+    async def scenario():
+        store = ImageDiskCache(root=tmp_path, max_bytes=1024)
+        await asyncio.gather(
+            *(_put(store, f"https://x/{i}.png", b"same" * 20) for i in range(5))
+        )
+        return store
+
+    store = asyncio.run(scenario())
+    assert store.stats()["files"] == 1
+    assert store.stats()["urls"] == 5
+    assert store.total_bytes == 80
+    assert list((tmp_path / "tmp").iterdir()) == []
+
+
+def test_lru_eviction_by_size(tmp_path):
+    async def scenario():
+        store = ImageDiskCache(root=tmp_path, max_bytes=250)
+        await _put(store, "https://x/a", b"a" * 100)
+        await _put(store, "https://x/b", b"b" * 100)
+        # 访问 a 后 b 成为最久未使用
+        assert store.get_path("https://x/a") is not None
+        await _put(store, "https://x/c", b"c" * 100)
+        return store
+
+    store = asyncio.run(scenario())
+    assert store.get_hash("https://x/a") is not None
+    assert store.get_hash("https://x/b") is None
+    assert store.get_hash("https://x/c") is not None
+    assert store.total_bytes == 200
+    assert store.evictions == 1
+
+
+def test_index_survives_restart(tmp_path):
+    async def scenario():
+        store = ImageDiskCache(root=tmp_path, max_bytes=1024)
+        await _put(store, "https://x/a", b"persisted")
+        aborted = store.writer("https://x/b")
+        await aborted.write(b"partial")
+        await aborted.abort()
+
+    asyncio.run(scenario())
+    reloaded = ImageDiskCache(root=tmp_path, max_bytes=1024)
+    assert reloaded.get_hash("https://x/a") is not None
+    assert reloaded.get_hash("https://x/b") is None
+    assert reloaded.total_bytes == len(b"persisted")
+    assert asyncio.run(_read(reloaded, "https://x/a")) == b"persisted"
+
+
+def test_disabled_store(tmp_path):
+    store = ImageDiskCache(root=tmp_path, max_bytes=0)
+    assert store.writer("https://x/a") is None
+    assert store.get_path("https://x/a") is None
+
+
+def test_iter_file_reads_in_chunks(tmp_path):
+    path = tmp_path / "big.bin"
+    data = os.urandom(image_store._READ_CHUNK_SIZE * 2 + 10)
+    path.write_bytes(data)
+
+    async def scenario():
+        return [chunk async for chunk in ImageDiskCache.iter_file(path)]
+
+    chunks = asyncio.run(scenario())
+    assert [len(c) for c in chunks] == [image_store._READ_CHUNK_SIZE] * 2 + [10]
+    assert b"".join(chunks) == data
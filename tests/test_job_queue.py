@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+JobQueue 单元测试
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.job_queue import Job, JobQueue, JobQueueFullError
+
+
+def test_jobs_run_in_background_and_record_outcome(monkeypatch):
+    monkeypatch.setenv("JOB_WORKERS", "2")
+
+    async def scenario():
+        queue = JobQueue()
+        queue.start()
+
+        async def ok():
+            await asyncio.sleep(0.01)
+
+        async def boom():
+            raise RuntimeError("upstream failed")
+
+        good = queue.submit("webhook-album", ok, {"album_id": "1"})
+        bad = queue.submit("webhook-album", boom)
+        assert good.status == Job.QUEUED
+        # stop 会等待已接受的任务完成
+        await queue.stop()
+        return queue, good, bad
+
+    queue, good, bad = asyncio.run(scenario())
+    assert good.to_dict()["status"] == Job.SUCCEEDED
+    assert good.to_dict()["params"] == {"album_id": "1"}
+    assert good.to_dict()["run_seconds"] >= 0.01
+    assert bad.status == Job.FAILED
+    assert bad.error == "upstream failed"
+    assert queue.get(good.id) is good
+    assert queue.stats()["succeeded"] == 1
+    assert queue.stats()["failed"] == 1
+
+
+def test_submit_rejects_when_full_or_stopped(monkeypatch):
+    monkeypatch.setenv("JOB_WORKERS", "1")
+    monkeypatch.setenv("JOB_QUEUE_SIZE", "1")
+
+    async def scenario():
+        queue = JobQueue()
+        with pytest.raises(JobQueueFullError):
+            queue.submit("webhook-album", asyncio.sleep)
+
+        queue.start()
+        gate = asyncio.Event()
+        first = queue.submit("webhook-album", gate.wait)
+        await asyncio.sleep(0)  # worker 取走第一个任务
+        queue.submit("webhook-album", gate.wait)
+        with pytest.raises(JobQueueFullError):
+            queue.submit("webhook-album", gate.wait)
+        # 任务始终未完成，等待超时后取消
+        await queue.stop(timeout=0.01)
+        return first
+
+    first = asyncio.run(scenario())
+    assert first.status == Job.FAILED
+    assert first.error in ("Cancelled", "Server shutting down")
+
+
+def test_stop_drains_queued_jobs_and_rejects_new_ones(monkeypatch):
+    monkeypatch.setenv("JOB_WORKERS", "1")
+
+    async def scenario():
+        queue = JobQueue()
+        queue.start()
+        gate = asyncio.Event()
+        running = queue.submit("webhook-album", gate.wait)
+        queued = queue.submit("webhook-album", lambda: asyncio.sleep(0))
+        await asyncio.sleep(0)  # worker 取走第一个任务
+
+        stopping = asyncio.create_task(queue.stop(timeout=5))
+        await asyncio.sleep(0)
+        with pytest.raises(JobQueueFullError):
+            queue.submit("webhook-album", asyncio.sleep)
+        gate.set()
+        await stopping
+        return running, queued
+
+    running, queued = asyncio.run(scenario())
+    assert running.status == Job.SUCCEEDED
+    assert queued.status == Job.SUCCEEDED
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+JournalStore 单元测试
+
+覆盖日志重放、压缩以及崩溃后（日志末尾写了一半）的恢复。
+"""
+
+import json
+
+from app.utils.journal_store import JournalStore
+
+
+def test_replays_journal_on_top_of_snapshot(tmp_path):
+    snapshot = tmp_path / "cache.json"
+    snapshot.write_text(json.dumps({"a": "1", "b": "2"}), encoding="utf-8")
+
+    store = JournalStore(snapshot)
+    store.append([("set", "c", "3"), ("del", "a", None), ("set", "b", "20")])
+
+    assert JournalStore(snapshot).load() == {"b": "20", "c": "3"}
+
+
+def test_compaction_rewrites_snapshot_and_truncates_journal(tmp_path):
+    snapshot = tmp_path / "cache.json"
+    store = JournalStore(snapshot, compact_threshold=2)
+    store.append([("set", "a", "1")])
+    assert not store.needs_compaction
+    store.append([("set", "b", "2")])
+    assert store.needs_compaction
+
+    store.compact({"a": "1", "b": "2"})
+
+    assert store.journal_entries == 0
+    assert store.journal_file.read_text(encoding="utf-8") == ""
+    assert json.loads(snapshot.read_text(encoding="utf-8")) == {"a": "1", "b": "2"}
+    assert JournalStore(snapshot).load() == {"a": "1", "b": "2"}
+
+
+def test_torn_tail_is_dropped_and_later_appends_survive(tmp_path):
+    snapshot = tmp_path / "cache.json"
+    store = JournalStore(snapshot)
+    store.append([("set", "a", "1")])
+    # 模拟写入一半时进程崩溃
+    with open(store.journal_file, "a", encoding="utf-8") as f:
+        f.write('{"op": "set", "k": "b", "v"')
+
+    recovered = JournalStore(snapshot)
+    assert recovered.load() == {"a": "1"}
+
+    recovered.append([("set", "c", "3")])
+    assert JournalStore(snapshot).load() == {"a": "1", "c": "3"}
+
+
+def test_legacy_snapshot_without_journal(tmp_path):
+    snapshot = tmp_path / "cache.json"
+    snapshot.write_text(json.dumps({"url": "id"}), encoding="utf-8")
+
+    store = JournalStore(snapshot)
+    assert store.load() == {"url": "id"}
+    assert store.journal_entries == 0
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Notion 属性差异比较单元测试
+
+读取格式样例按 pages.retrieve 的返回结构构造。
+"""
+
+from app.constants.notion_fields import AlbumField as F
+from app.utils.notion_builder import build_album_properties
+from app.utils.notion_diff import diff_properties
+
+
+def _text(content):
+    return [
+        {
+            "type": "text",
+            "text": {"content": content, "link": None},
+            "plain_text": content,
+            "href": None,
+        }
+    ]
+
+
+def _page_properties(**overrides):
+    """与 _album_data() 写入结果一致的页面属性（读取格式）"""
+    props = {
+        F.NAME: {"id": "title", "type": "title", "title": _text("落音记")},
+        F.DESCRIPTION_MAIN: {"type": "rich_text", "rich_text": _text("简介正文")},
+        F.DESCRIPTION_SEQUEL: {"type": "rich_text", "rich_text": []},
+        F.PUBLISH_DATE: {
+            "type": "date",
+            "date": {
+                "start": "2024-05-01T20:00:00.000+08:00",
+                "end": None,
+                "time_zone": "Asia/Shanghai",
+            },
+        },
+        F.PLAY: {"type": "number", "number": 1200},
+        F.LIKED: {"type": "number", "number": 30},
+        F.PRICE: {"type": "number", "number": 0},
+        F.EPISODE_COUNT: {"type": "number", "number": 12},
+        F.AUTHOR: {
+            "type": "select",
+            "select": {"id": "a", "name": "闻人碎语", "color": "red"},
+        },
+        F.UP_NAME: {"type": "select", "select": None},
+        F.SOURCE: {"type": "select", "select": {"id": "b", "name": "改编"}},
+        F.COMMERCIAL: {"type": "select", "select": {"id": "c", "name": "非商"}},
+        F.UPDATE_FREQ: {"type": "multi_select", "multi_select": []},
+        F.TAGS: {
+            "type": "multi_select",
+            "multi_select": [{"id": "1", "name": "古风"}, {"id": "2", "name": "百合"}],
+        },
+        F.MAIN_CV: {"type": "multi_select", "multi_select": [{"name": "水原"}]},
+        F.MAIN_CV_ROLE: {"type": "multi_select", "multi_select": [{"name": "角色"}]},
+        F.SUPPORTING_CV: {"type": "multi_select", "multi_select": []},
+        F.SUPPORTING_CV_ROLE: {"type": "multi_select", "multi_select": []},
+        F.ALBUM_LINK: {"type": "url", "url": "https://example.com/album/1"},
+        F.PLATFORM: {"type": "multi_select", "multi_select": [{"name": "饭角"}]},
+        F.COVER: {
+            "type": "files",
+            "files": [{"name": "x_cover.png", "type": "file", "file": {}}],
+        },
+    }
+    props.update(overrides)
+    return props
+
+
+def _album_data(**overrides):
+    data = {
+        "name": "落音记",
+        "description": "简介正文",
+        "description_sequel": "",
+        "publish_date": "2024-05-01T12:00:00Z",
+        "play": 1200,
+        "liked": 30,
+        "ori_price": 0,
+        "episode_count": 12,
+        "author_name": "闻人碎语",
+        "up_name": "",
+        "source": "改编",
+        "commercial_drama": "非商",
+        "update_frequency": [],
+        "tags": ["古风", "百合"],
+        "main_cv": ["水原"],
+        "main_cv_role": ["角色"],
+        "supporting_cv": [],
+        "supporting_cv_role": [],
+        "album_link": "https://example.com/album/1",
+    }
+    data.update(overrides)
+    return data
+
+
+def test_unchanged_page_produces_empty_diff():
+    desired = build_album_properties(**_album_data())
+    assert diff_properties(desired, _page_properties()) == {}
+
+
+def test_only_changed_properties_are_kept():
+    desired = build_album_properties(**_album_data(play=1300, tags=["古风"]))
+    assert set(diff_properties(desired, _page_properties())) == {F.PLAY, F.TAGS}
+
+
+def test_files_without_name_are_always_written():
+    desired = build_album_properties(**_album_data(cover="file-upload-id"))
+    assert set(diff_properties(desired, _page_properties())) == {F.COVER}
+
+
+def test_files_compare_by_upload_filename():
+    same = build_album_properties(
+        **_album_data(cover="file-upload-id", cover_filename="x_cover.png")
+    )
+    assert diff_properties(same, _page_properties()) == {}
+
+    changed = build_album_properties(
+        **_album_data(cover="file-upload-id", cover_filename="y_cover.png")
+    )
+    assert set(diff_properties(changed, _page_properties())) == {F.COVER}
+
+
+def test_missing_and_cleared_properties_are_written():
+    page = _page_properties()
+    del page[F.LIKED]
+    page[F.AUTHOR] = {"type": "select", "select": None}
+    desired = build_album_properties(**_album_data())
+    assert set(diff_properties(desired, page)) == {F.LIKED, F.AUTHOR}
+
+
+def test_date_compares_instants_and_time_zone():
+    desired = build_album_properties(**_album_data())
+    moved = _page_properties(
+        **{
+            F.PUBLISH_DATE: {
+                "type": "date",
+                "date": {"start": "2024-05-02T20:00:00.000+08:00", "time_zone": None},
+            }
+        }
+    )
+    assert set(diff_properties(desired, moved)) == {F.PUBLISH_DATE}
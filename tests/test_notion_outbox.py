@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+NotionOutbox 单元测试
+"""
+
+import asyncio
+
+import httpx
+import pytest
+from notion_client import APIResponseError
+
+from app.services import notion_outbox
+from app.services.notion_outbox import NotionOutbox
+
+PAGE_ID = "1a2b3c4d-0000-4000-8000-123456789abc"
+
+
+def _api_error(status: int) -> APIResponseError:
+    return APIResponseError("validation_error", status, "error", httpx.Headers(), "")
+
+
+class FakeNotion:
+    """记录写入，按预设次数失败"""
+
+    def __init__(self, failures=()):
+        self.failures = list(failures)
+        self.writes = []
+
+    async def deliver(self, page_id, properties, emoji, covers):
+        self.covers = covers
+        if self.failures:
+            raise self.failures.pop(0)
+        self.writes.append((page_id, properties, emoji))
+        return True
+
+
+def test_delivers_immediately_and_clears_row(tmp_path):
+    notion = FakeNotion()
+
+    async def scenario():
+        outbox = NotionOutbox(tmp_path / "outbox.db")
+        await outbox.start(notion.deliver)
+        try:
+            assert await outbox.submit(PAGE_ID, {"播放": {"number": 1}}, "🎧")
+            return await outbox.stats()
+        finally:
+            await outbox.stop()
+
+    stats = asyncio.run(scenario())
+    assert notion.writes == [(PAGE_ID, {"播放": {"number": 1}}, "🎧")]
+    assert stats["pending"] == 0
+    assert stats["delivered"] == 1
+
+
+def test_failed_write_is_retried_in_background(tmp_path, monkeypatch):
+    monkeypatch.setenv("NOTION_OUTBOX_RETRY_BASE", "0.01")
+    notion = FakeNotion(failures=[httpx.ConnectError("down")])
+
+    async def scenario():
+        outbox = NotionOutbox(tmp_path / "outbox.db")
+        await outbox.start(notion.deliver)
+        try:
+            # 临时错误不抛出，写入保留在发件箱中
+            assert await outbox.submit(PAGE_ID, {"播放": {"number": 1}}, "🎧")
+            for _ in range(100):
+                stats = await outbox.stats()
+                # 投递成功后才删除行，需等到 pending 清零
+                if notion.writes and stats["pending"] == 0:
+                    break
+                await asyncio.sleep(0.01)
+            return stats
+        finally:
+            await outbox.stop()
+
+    stats = asyncio.run(scenario())
+    assert len(notion.writes) == 1
+    assert stats["retried"] == 1
+    assert stats["pending"] == 0
+
+
+def test_pending_writes_are_merged_and_replayed_on_start(tmp_path):
+    async def enqueue_only():
+        outbox = NotionOutbox(tmp_path / "outbox.db")
+        await asyncio.to_thread(outbox._init_db)
+        outbox._db_enqueue(
+            PAGE_ID, {"播放": {"number": 1}, "标题": {"url": "a"}}, "🎧", {}
+        )
+        outbox._db_enqueue(PAGE_ID, {"播放": {"number": 2}}, "🎵", {})
+
+    asyncio.run(enqueue_only())
+
+    # 模拟重启：新实例启动后投递上次未完成的写入（同一页面后写覆盖）
+    notion = FakeNotion()
+
+    async def restart():
+        outbox = NotionOutbox(tmp_path / "outbox.db")
+        await outbox.start(notion.deliver)
+        try:
+            for _ in range(100):
+                if notion.writes:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await outbox.stop()
+
+    asyncio.run(restart())
+    assert notion.writes == [
+        (PAGE_ID, {"播放": {"number": 2}, "标题": {"url": "a"}}, "🎵")
+    ]
+
+
+def test_permanent_error_raises_and_keeps_row(tmp_path):
+    notion = FakeNotion(failures=[_api_error(400)])
+
+    async def scenario():
+        outbox = NotionOutbox(tmp_path / "outbox.db")
+        await outbox.start(notion.deliver)
+        try:
+            with pytest.raises(APIResponseError):
+                await outbox.submit(PAGE_ID, {"播放": {"number": 1}}, "🎧")
+            return await outbox.stats()
+        finally:
+            await outbox.stop()
+
+    stats = asyncio.run(scenario())
+    assert notion.writes == []
+    assert stats["dead"] == 1
+    assert stats["pending"] == 0
+
+
+def test_cover_sources_are_merged_and_passed_to_delivery(tmp_path):
+    notion = FakeNotion()
+    cover = {"files": [{"type": "file_upload", "file_upload": {"id": "fu-1"}}]}
+
+    async def scenario():
+        outbox = NotionOutbox(tmp_path / "outbox.db")
+        await asyncio.to_thread(outbox._init_db)
+        source = {"url": "https://example.com/a.png", "name": "a"}
+        outbox._db_enqueue(PAGE_ID, {"Cover": cover}, "🎧", {"Cover": source})
+        outbox._db_enqueue(PAGE_ID, {"播放": {"number": 1}}, "🎧", {})
+        await outbox.start(notion.deliver)
+        try:
+            for _ in range(100):
+                if notion.writes:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await outbox.stop()
+        return source
+
+    source = asyncio.run(scenario())
+    assert notion.covers == {"Cover": source}
+    assert notion.writes == [(PAGE_ID, {"Cover": cover, "播放": {"number": 1}}, "🎧")]
+
+
+def test_rejected_property_is_dropped_and_rest_delivered(tmp_path):
+    cover = {"files": [{"type": "file_upload", "file_upload": {"id": "fu-expired"}}]}
+    error = APIResponseError(
+        "validation_error",
+        400,
+        "File upload with ID fu-expired is expired.",
+        httpx.Headers(),
+        "",
+    )
+    notion = FakeNotion(failures=[error])
+
+    async def scenario():
+        outbox = NotionOutbox(tmp_path / "outbox.db")
+        await outbox.start(notion.deliver)
+        try:
+            await outbox.submit(PAGE_ID, {"Cover": cover, "播放": {"number": 1}}, "🎧")
+            for _ in range(100):
+                stats = await outbox.stats()
+                if notion.writes and stats["pending"] == 0:
+                    break
+                await asyncio.sleep(0.01)
+            return stats
+        finally:
+            await outbox.stop()
+
+    stats = asyncio.run(scenario())
+    assert notion.writes == [(PAGE_ID, {"播放": {"number": 1}}, "🎧")]
+    assert stats["dropped_properties"] == 1
+    assert stats["dead"] == 0
+    assert stats["pending"] == 0
+
+
+def test_lease_is_renewed_during_slow_delivery(tmp_path, monkeypatch):
+    monkeypatch.setattr(notion_outbox, "_LEASE_SECONDS", 0.06)
+    calls = []
+
+    async def slow_deliver(page_id, properties, emoji, covers):
+        calls.append(properties)
+        await asyncio.sleep(0.3)
+        return True
+
+    async def scenario():
+        outbox = NotionOutbox(tmp_path / "outbox.db")
+        await outbox.start(slow_deliver)
+        try:
+            submit = asyncio.create_task(
+                outbox.submit(PAGE_ID, {"播放": {"number": 1}}, "🎧")
+            )
+            await asyncio.sleep(0.15)
+            # 租约已超过初始时长，但投递仍在进行，不应被再次认领
+            assert await outbox.drain() == 0
+            await submit
+        finally:
+            await outbox.stop()
+
+    asyncio.run(scenario())
+    assert len(calls) == 1
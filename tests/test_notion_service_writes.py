@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+NotionService 页面写入合并单元测试
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from app.services import notion_service
+from app.services.notion_service import NotionService
+from app.utils.property_ledger import PropertyLedger
+from app.utils.write_coalescer import WriteCoalescer
+
+PAGE_ID = "1a2b3c4d-0000-4000-8000-123456789abc"
+
+
+class FakeNotionClient:
+    """页面当前值固定，记录更新请求"""
+
+    def __init__(self, properties, client=None):
+        self.properties = properties
+        self.updates = []
+        self.reads = 0
+        # 对应 NotionClient.client（共享的 SDK 客户端）
+        self.client = client or SimpleNamespace()
+
+    async def get_page(self, page_id):
+        self.reads += 1
+        return {
+            "properties": self.properties,
+            "icon": {"type": "emoji", "emoji": "🎧"},
+        }
+
+    async def update_page(self, page_id, properties, emoji="🎧"):
+        self.updates.append(properties)
+
+
+def test_merged_writes_are_filtered_once_last_write_wins(monkeypatch):
+    monkeypatch.setenv("NOTION_WRITE_LEDGER", "false")
+    monkeypatch.setenv("NOTION_DIFF_WRITES", "true")
+    monkeypatch.setenv("NOTION_OUTBOX", "false")
+    monkeypatch.setattr(notion_service, "_write_coalescer", WriteCoalescer(0.05))
+    client = FakeNotionClient({"播放": {"type": "number", "number": 0}})
+    service = NotionService(client)
+
+    async def scenario():
+        await asyncio.gather(
+            service._write_page(PAGE_ID, {"播放": {"number": 1}}),
+            service._write_page(PAGE_ID, {"播放": {"number": 0}}),
+        )
+
+    asyncio.run(scenario())
+    # 合并后的最终值与页面一致，不应写入先到达的旧值
+    assert client.updates == []
+
+
+def test_merged_writes_send_union_of_properties(monkeypatch):
+    monkeypatch.setenv("NOTION_WRITE_LEDGER", "false")
+    monkeypatch.setenv("NOTION_DIFF_WRITES", "false")
+    monkeypatch.setenv("NOTION_OUTBOX", "false")
+    monkeypatch.setattr(notion_service, "_write_coalescer", WriteCoalescer(0.05))
+    client = FakeNotionClient({})
+    service = NotionService(client)
+
+    async def scenario():
+        await asyncio.gather(
+            service._write_page(PAGE_ID, {"播放": {"number": 1}}),
+            service._write_page(PAGE_ID, {"收藏": {"number": 2}}),
+        )
+
+    asyncio.run(scenario())
+    assert client.updates == [{"播放": {"number": 1}, "收藏": {"number": 2}}]
+
+
+def test_writes_from_separate_service_instances_are_merged(monkeypatch):
+    monkeypatch.setenv("NOTION_WRITE_LEDGER", "false")
+    monkeypatch.setenv("NOTION_DIFF_WRITES", "false")
+    monkeypatch.setenv("NOTION_OUTBOX", "false")
+    monkeypatch.setattr(notion_service, "_write_coalescer", WriteCoalescer(0.05))
+    sdk_client = SimpleNamespace()
+    updates = []
+
+    def service():
+        # 每个请求各自创建包装客户端，共享同一个 SDK 客户端
+        client = FakeNotionClient({}, client=sdk_client)
+        client.updates = updates
+        return NotionService(client)
+
+    async def scenario():
+        await asyncio.gather(
+            service()._write_page(PAGE_ID, {"播放": {"number": 1}}),
+            service()._write_page(PAGE_ID.replace("-", ""), {"收藏": {"number": 2}}),
+            service()._write_page(PAGE_ID, {"播放": {"number": 3}}),
+        )
+        return notion_service.get_write_coalescer().stats()
+
+    stats = asyncio.run(scenario())
+    assert updates == [{"播放": {"number": 3}, "收藏": {"number": 2}}]
+    assert stats["merged"] == 2
+
+
+def test_ledger_replaces_page_read(monkeypatch, tmp_path):
+    monkeypatch.setenv("NOTION_WRITE_LEDGER", "true")
+    monkeypatch.setenv("NOTION_DIFF_WRITES", "true")
+    ledger = PropertyLedger(tmp_path / "ledger.json")
+    monkeypatch.setattr(notion_service, "get_property_ledger", lambda: ledger)
+    client = FakeNotionClient({})
+    service = NotionService(client)
+
+    async def scenario():
+        first = {"播放": {"number": 1}, "标题": {"url": "a"}}
+        await service.apply_write(PAGE_ID, first)
+        await service.apply_write(PAGE_ID, {**first, "播放": {"number": 2}})
+        return await service.apply_write(PAGE_ID, {**first, "播放": {"number": 2}})
+
+    assert asyncio.run(scenario()) is False
+    # 账本已给出变化的属性，不再读取页面
+    assert client.reads == 0
+    assert client.updates == [
+        {"播放": {"number": 1}, "标题": {"url": "a"}},
+        {"播放": {"number": 2}},
+    ]
+
+
+def test_diff_restores_hand_edited_property(monkeypatch):
+    monkeypatch.setenv("NOTION_WRITE_LEDGER", "false")
+    monkeypatch.setenv("NOTION_DIFF_WRITES", "true")
+    # 页面上的播放数已被手动改为 5
+    client = FakeNotionClient(
+        {
+            "播放": {"type": "number", "number": 5},
+            "收藏": {"type": "number", "number": 2},
+        }
+    )
+    service = NotionService(client)
+
+    written = asyncio.run(
+        service.apply_write(PAGE_ID, {"播放": {"number": 1}, "收藏": {"number": 2}})
+    )
+    assert written
+    assert client.reads == 1
+    assert client.updates == [{"播放": {"number": 1}}]
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+RateLimitedTransport 单元测试
+"""
+
+import asyncio
+import time
+
+import httpx
+
+from app.clients.notion import RateLimitedTransport
+from app.utils.rate_limiter import AsyncTokenBucket
+
+
+class Recorder:
+    """依次返回预设状态码，记录每次收到的请求体"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.bodies = []
+
+    def __call__(self, request):
+        self.bodies.append(request.read())
+        return self.responses.pop(0) if self.responses else httpx.Response(200)
+
+
+def _send(recorder, max_retries=3, **kwargs):
+    limiter = AsyncTokenBucket("notion", rate=0)
+    transport = RateLimitedTransport(
+        httpx.MockTransport(recorder), limiter=limiter, max_retries=max_retries
+    )
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=transport) as client:
+            start = time.monotonic()
+            response = await client.request(
+                "PATCH", "https://api.notion.com/v1/pages/p", **kwargs
+            )
+            return response, time.monotonic() - start
+
+    response, elapsed = asyncio.run(scenario())
+    return response, elapsed, transport
+
+
+def test_429_honours_retry_after_and_replays_body():
+    recorder = Recorder(httpx.Response(429, headers={"Retry-After": "0.1"}))
+    response, elapsed, transport = _send(recorder, json={"a": 1})
+
+    assert response.status_code == 200
+    assert elapsed >= 0.1
+    assert transport.throttled == 1
+    # 重发的请求体与首次一致
+    assert len(recorder.bodies) == 2
+    assert recorder.bodies[0] == recorder.bodies[1] == b'{"a":1}'
+
+
+def test_gives_up_after_max_retries():
+    recorder = Recorder(
+        *(httpx.Response(429, headers={"Retry-After": "0"}) for _ in range(5))
+    )
+    response, _, transport = _send(recorder, max_retries=2, json={})
+
+    assert response.status_code == 429
+    assert len(recorder.bodies) == 3
+    assert transport.throttled == 2
+
+
+class StreamTransport(httpx.AsyncBaseTransport):
+    """不读取请求体的传输层（MockTransport 会预先读取请求体使其可重发）"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def handle_async_request(self, request):
+        self.calls += 1
+        return httpx.Response(429, headers={"Retry-After": "0"})
+
+
+def test_streamed_body_is_not_replayed():
+    async def body():
+        yield b"chunk"
+
+    inner = StreamTransport()
+    transport = RateLimitedTransport(
+        inner, limiter=AsyncTokenBucket("notion", rate=0), max_retries=3
+    )
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await client.post("https://api.notion.com/v1/x", content=body())
+
+    response = asyncio.run(scenario())
+    assert response.status_code == 429
+    assert inner.calls == 1
+    assert transport.throttled == 0
+
+
+def test_missing_retry_after_uses_backoff():
+    response = httpx.Response(429)
+    assert RateLimitedTransport._retry_after(response, 1) == 1.0
+    assert RateLimitedTransport._retry_after(response, 3) == 4.0
+    assert RateLimitedTransport._retry_after(response, 10) == 30.0
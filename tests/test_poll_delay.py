@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+封面导入首次轮询延迟自适应单元测试
+"""
+
+import asyncio
+from collections import deque
+from types import SimpleNamespace
+
+import pytest
+
+from app.clients import image_upload
+from app.clients.image_upload import CoverUploader, _initial_poll_delay
+
+
+class FakeFileUploads:
+    """第 n 次检查返回 statuses[n]，超出后一直返回 uploaded"""
+
+    def __init__(self, statuses=()):
+        self.statuses = list(statuses)
+
+    async def retrieve(self, file_upload_id):
+        status = self.statuses.pop(0) if self.statuses else "uploaded"
+        return {"id": file_upload_id, "status": status}
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setenv("COVER_POLL_INITIAL_DELAY", "0.04")
+    monkeypatch.setattr(image_upload, "_MIN_POLL_DELAY", 0.005)
+    monkeypatch.setattr(image_upload, "_import_durations", deque(maxlen=50))
+    monkeypatch.setattr(image_upload, "_poll_delay_cap", None)
+
+
+def _wait(statuses=()):
+    client = SimpleNamespace(file_uploads=FakeFileUploads(statuses))
+    uploader = CoverUploader("https://example.com/a.png", "a", client=client)
+    return asyncio.run(uploader._wait_for_upload_completion("fu"))
+
+
+def test_fast_imports_do_not_grow_initial_delay():
+    delays = [_initial_poll_delay()]
+    for _ in range(5):
+        _wait()
+        delays.append(_initial_poll_delay())
+
+    # 首次检查即完成只说明耗时不超过等待时间，延迟应逐步降低而非升高
+    assert all(later <= earlier for earlier, later in zip(delays, delays[1:]))
+    assert delays[-1] < delays[0]
+    assert len(image_upload._import_durations) == 0
+
+
+def test_slow_import_records_bracketed_estimate():
+    _wait(statuses=["pending"])
+
+    # 完成时间位于首次（pending）与第二次检查之间，记录中点估计
+    assert len(image_upload._import_durations) == 1
+    estimate = image_upload._import_durations[0]
+    assert 0.04 <= estimate < 0.04 * 3 + 0.1
+    assert image_upload._poll_delay_cap is None
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+PriorityLimiter 单元测试
+"""
+
+import asyncio
+
+import pytest
+
+from app.utils.priority_limiter import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    PriorityLimiter,
+)
+
+
+def test_concurrency_is_bounded():
+    async def scenario():
+        limiter = PriorityLimiter("test", concurrency=2)
+        running = peak = 0
+
+        async def job():
+            nonlocal running, peak
+            async with limiter.slot():
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        await asyncio.gather(*(job() for _ in range(6)))
+        return limiter, peak
+
+    limiter, peak = asyncio.run(scenario())
+    assert peak == 2
+    assert limiter.active == 0
+    assert limiter.stats()["priorities"]["interactive"]["acquired"] == 6
+
+
+def test_interactive_jumps_ahead_of_queued_background():
+    async def scenario():
+        limiter = PriorityLimiter("test", concurrency=1)
+        order = []
+        gate = asyncio.Event()
+
+        async def job(name, priority):
+            async with limiter.slot(priority):
+                order.append(name)
+                await gate.wait()
+
+        tasks = [asyncio.create_task(job("first", PRIORITY_BACKGROUND))]
+        await asyncio.sleep(0)
+        for i in range(3):
+            tasks.append(asyncio.create_task(job(f"bg{i}", PRIORITY_BACKGROUND)))
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(job("webhook", PRIORITY_INTERACTIVE)))
+        await asyncio.sleep(0)
+        gate.set()
+        await asyncio.gather(*tasks)
+        return limiter, order
+
+    limiter, order = asyncio.run(scenario())
+    assert order == ["first", "webhook", "bg0", "bg1", "bg2"]
+    stats = limiter.stats()
+    assert stats["priorities"]["background"]["queued"] == 3
+    assert stats["priorities"]["interactive"]["queued"] == 1
+
+
+def test_promoted_waiter_keeps_arrival_order():
+    async def scenario():
+        limiter = PriorityLimiter("test", concurrency=1)
+        order = []
+        gate = asyncio.Event()
+
+        async def job(name, priority, key=None):
+            async with limiter.slot(priority, key=key):
+                order.append(name)
+                await gate.wait()
+
+        tasks = [asyncio.create_task(job("first", PRIORITY_BACKGROUND))]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(job("bg", PRIORITY_BACKGROUND, key="k")))
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(job("webhook", PRIORITY_INTERACTIVE)))
+        await asyncio.sleep(0)
+        assert limiter.promote("k", PRIORITY_INTERACTIVE)
+        # 只升不降
+        assert not limiter.promote("k", PRIORITY_BACKGROUND)
+        gate.set()
+        await asyncio.gather(*tasks)
+        return order
+
+    # 提升后与 webhook 同优先级，按到达顺序先于 webhook
+    assert asyncio.run(scenario()) == ["first", "bg", "webhook"]
+
+
+def test_cancelled_waiter_does_not_leak_slot():
+    async def scenario():
+        limiter = PriorityLimiter("test", concurrency=1)
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert limiter.waiting == 0
+        limiter.release()
+        assert limiter.active == 0
+        # 名额已归还，新的请求无需排队
+        assert await limiter.acquire() < 0.001
+        return limiter
+
+    limiter = asyncio.run(scenario())
+    assert limiter.active == 1
+
+
+def test_unbounded_when_concurrency_disabled():
+    async def scenario():
+        limiter = PriorityLimiter("test", concurrency=0)
+        for _ in range(10):
+            await limiter.acquire()
+        return limiter
+
+    limiter = asyncio.run(scenario())
+    assert limiter.active == 10
+    assert limiter.waiting == 0
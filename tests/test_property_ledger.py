@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+PropertyLedger 单元测试
+"""
+
+import asyncio
+
+from app.utils.property_ledger import PropertyLedger, property_hash
+
+PAGE_ID = "1a2b3c4d-0000-4000-8000-123456789abc"
+
+
+def test_hash_is_stable_across_key_order():
+    assert property_hash({"date": {"start": "x", "time_zone": "y"}}) == property_hash(
+        {"date": {"time_zone": "y", "start": "x"}}
+    )
+    assert property_hash({"number": 1}) != property_hash({"number": 2})
+
+
+def test_filters_properties_written_before(tmp_path):
+    ledger = PropertyLedger(tmp_path / "ledger.json")
+    props = {"播放": {"number": 1}, "Tags": {"multi_select": [{"name": "古风"}]}}
+    assert ledger.filter_changed(PAGE_ID, props) == props
+
+    asyncio.run(ledger.record(PAGE_ID, props))
+    assert ledger.filter_changed(PAGE_ID, props) == {}
+
+    updated = {**props, "播放": {"number": 2}}
+    assert ledger.filter_changed(PAGE_ID, updated) == {"播放": {"number": 2}}
+    # 页面 ID 的连字符与大小写不影响查找
+    compact_id = PAGE_ID.replace("-", "").upper()
+    assert ledger.filter_changed(compact_id, props) == {}
+
+
+def test_persists_and_invalidates(tmp_path):
+    props = {"播放": {"number": 1}}
+    ledger = PropertyLedger(tmp_path / "ledger.json")
+    asyncio.run(ledger.record(PAGE_ID, props))
+    asyncio.run(ledger.record("other-page", props))
+
+    reloaded = PropertyLedger(tmp_path / "ledger.json")
+    assert reloaded.filter_changed(PAGE_ID, props) == {}
+
+    assert asyncio.run(reloaded.invalidate(PAGE_ID)) == 1
+    assert asyncio.run(reloaded.invalidate(PAGE_ID)) == 0
+    assert reloaded.filter_changed(PAGE_ID, props) == props
+    assert reloaded.filter_changed("other-page", props) == {}
+
+    assert asyncio.run(reloaded.invalidate()) == 1
+    assert PropertyLedger(tmp_path / "ledger.json").stats()["pages"] == 0
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AsyncTokenBucket 单元测试
+"""
+
+import asyncio
+import time
+
+from app.utils.rate_limiter import AsyncTokenBucket
+
+
+def test_burst_then_rate_limited():
+    async def scenario():
+        bucket = AsyncTokenBucket("test", rate=20, capacity=2)
+        start = time.monotonic()
+        for _ in range(4):
+            await bucket.acquire()
+        return bucket, time.monotonic() - start
+
+    bucket, elapsed = asyncio.run(scenario())
+    # 前两个令牌来自突发容量，之后每个令牌需等待约 1/20 秒
+    assert 0.08 <= elapsed < 0.5
+    assert bucket.stats()["acquired"] == 4
+    assert bucket.stats()["delayed"] == 2
+
+
+def test_unlimited_rate_does_not_wait():
+    async def scenario():
+        bucket = AsyncTokenBucket("test", rate=0)
+        return [await bucket.acquire() for _ in range(50)]
+
+    assert all(waited == 0.0 for waited in asyncio.run(scenario()))
+
+
+def test_pause_blocks_all_waiters_even_without_rate():
+    async def scenario():
+        bucket = AsyncTokenBucket("test", rate=0)
+        bucket.pause(0.1)
+        # 较短的暂停不会覆盖已有的较长暂停
+        bucket.pause(0.01)
+        return await asyncio.gather(*(bucket.acquire() for _ in range(3)))
+
+    waits = asyncio.run(scenario())
+    assert all(0.08 <= waited < 0.5 for waited in waits)
+
+
+def test_pause_extended_while_waiting():
+    async def scenario():
+        bucket = AsyncTokenBucket("test", rate=100, capacity=1)
+        bucket.pause(0.05)
+        waiter = asyncio.create_task(bucket.acquire())
+        await asyncio.sleep(0.02)
+        bucket.pause(0.1)
+        return await waiter
+
+    # 等待期间再次暂停，按更晚的截止时间放行
+    assert 0.1 <= asyncio.run(scenario()) < 0.5
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+SingleFlight 单元测试
+"""
+
+import asyncio
+
+import pytest
+
+from app.utils.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    async def scenario():
+        flight: SingleFlight[str, dict] = SingleFlight()
+        executions = 0
+
+        async def fetch() -> dict:
+            nonlocal executions
+            executions += 1
+            await asyncio.sleep(0.01)
+            return {"ok": True}
+
+        results = await asyncio.gather(*(flight.do("k", fetch) for _ in range(5)))
+        return flight, executions, results
+
+    flight, executions, results = asyncio.run(scenario())
+    assert executions == 1
+    assert all(r is results[0] for r in results)
+    assert flight.stats() == {"calls": 5, "shared": 4, "inflight": 0}
+
+
+def test_exception_propagates_to_all_waiters():
+    async def scenario():
+        flight: SingleFlight[str, int] = SingleFlight()
+
+        async def boom() -> int:
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream down")
+
+        return await asyncio.gather(
+            flight.do("k", boom), flight.do("k", boom), return_exceptions=True
+        )
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    async def scenario():
+        flight: SingleFlight[str, int] = SingleFlight()
+
+        async def slow() -> int:
+            await asyncio.sleep(0.02)
+            return 42
+
+        leader = asyncio.create_task(flight.do("k", slow))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("k", slow))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(scenario()) == 42
+
+
+def test_sequential_calls_execute_again():
+    async def scenario():
+        flight: SingleFlight[str, int] = SingleFlight()
+        counter = 0
+
+        async def fetch() -> int:
+            nonlocal counter
+            counter += 1
+            return counter
+
+        first = await flight.do("k", fetch)
+        second = await flight.do("k", fetch)
+        return first, second
+
+    assert asyncio.run(scenario()) == (1, 2)
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+TTLCache 单元测试
+"""
+
+from app.utils import ttl_cache
+from app.utils.ttl_cache import TTLCache
+
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _patch_clock(monkeypatch) -> _FakeClock:
+    clock = _FakeClock()
+    monkeypatch.setattr(ttl_cache.time, "monotonic", clock)
+    return clock
+
+
+def test_hit_and_miss_counters():
+    cache: TTLCache[str, int] = TTLCache(maxsize=4, ttl=60)
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_entry_expires_after_ttl(monkeypatch):
+    clock = _patch_clock(monkeypatch)
+    cache: TTLCache[str, int] = TTLCache(maxsize=4, ttl=10)
+    cache.set("a", 1)
+    clock.now += 9.9
+    assert cache.get("a") == 1
+    clock.now += 0.2
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_lru_eviction_keeps_recently_used():
+    cache: TTLCache[str, int] = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    # 访问 a 后 b 成为最久未使用
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_disabled_cache_never_stores():
+    cache: TTLCache[str, int] = TTLCache(maxsize=4, ttl=0)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_pop_removes_entry():
+    cache: TTLCache[str, int] = TTLCache(maxsize=4, ttl=60)
+    cache.set("a", 1)
+    assert cache.pop("a") == 1
+    assert cache.pop("a") is None
+    assert cache.get("a") is None
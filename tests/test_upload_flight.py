@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+封面上传合并与优先级提升单元测试
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from app.clients import image_upload
+from app.clients.image_upload import CoverUploader, upload_cover
+from app.utils.priority_limiter import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    PriorityLimiter,
+)
+from app.utils.singleflight import SingleFlight
+
+
+def test_interactive_caller_promotes_background_flight(monkeypatch):
+    order = []
+
+    async def fake_lookup(self):
+        order.append(self.image_url)
+        return f"fu-{len(order)}"
+
+    monkeypatch.setattr(CoverUploader, "_lookup_or_upload", fake_lookup)
+    monkeypatch.setattr(
+        image_upload,
+        "cover_cache",
+        SimpleNamespace(get_entry=lambda url: None, touch=lambda url: None),
+    )
+    monkeypatch.setattr(image_upload, "_upload_flight", SingleFlight())
+    monkeypatch.setattr(image_upload, "_flight_uploaders", {})
+    client = SimpleNamespace()
+
+    async def scenario():
+        scheduler = PriorityLimiter("cover_upload", concurrency=1)
+        monkeypatch.setattr(image_upload, "_upload_scheduler", scheduler)
+        await scheduler.acquire()
+
+        sweep = asyncio.create_task(
+            upload_cover(
+                "https://x/a.png", "a", client=client, priority=PRIORITY_BACKGROUND
+            )
+        )
+        await asyncio.sleep(0.01)
+        other = asyncio.create_task(upload_cover("https://x/b.png", "b", client=client))
+        await asyncio.sleep(0.01)
+        # webhook 加入后台任务发起的上传，该上传应提升为 interactive
+        joined = asyncio.create_task(
+            upload_cover("https://x/a.png", "a", client=client)
+        )
+        await asyncio.sleep(0.01)
+        assert image_upload._flight_uploaders["https://x/a.png"].priority == (
+            PRIORITY_INTERACTIVE
+        )
+
+        scheduler.release()
+        return await asyncio.gather(sweep, other, joined)
+
+    sweep_id, other_id, joined_id = asyncio.run(scenario())
+    # 提升后按到达顺序先于后到的 interactive 上传
+    assert order == ["https://x/a.png", "https://x/b.png"]
+    assert sweep_id == joined_id == "fu-1"
+    assert other_id == "fu-2"
+    assert image_upload._flight_uploaders == {}
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+NotionUploadIndex 单元测试
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+from app.utils.upload_index import NotionUploadIndex
+
+FUTURE = "2099-01-01T00:00:00+00:00"
+PAST = "2000-01-01T00:00:00+00:00"
+
+
+def _upload(fid, filename, created_time, status="uploaded", expiry_time=FUTURE):
+    return {
+        "id": fid,
+        "filename": filename,
+        "created_time": created_time,
+        "status": status,
+        "expiry_time": expiry_time,
+    }
+
+
+class FakeFileUploads:
+    """按创建时间倒序返回全部上传（单页）"""
+
+    def __init__(self, uploads):
+        self.uploads = uploads
+        self.calls = []
+
+    async def list(self, **kwargs):
+        self.calls.append(kwargs)
+        results = sorted(self.uploads, key=lambda u: u["created_time"], reverse=True)
+        return {"results": results, "has_more": False, "next_cursor": None}
+
+
+def _client(uploads):
+    return SimpleNamespace(file_uploads=FakeFileUploads(uploads))
+
+
+def test_indexes_only_uploaded_and_evicts_expired(tmp_path):
+    index = NotionUploadIndex(tmp_path / "index.json")
+    client = _client(
+        [
+            _upload("fu-1", "a.png", "2025-01-01T00:00:01Z"),
+            _upload("fu-2", "b.png", "2025-01-01T00:00:02Z", status="failed"),
+            _upload("fu-3", "c.png", "2025-01-01T00:00:03Z", expiry_time=PAST),
+        ]
+    )
+    asyncio.run(index.sync(client))
+
+    assert index.get("a.png") == "fu-1"
+    assert index.get("b.png") is None
+    # 已过期的条目在查找时淘汰
+    assert index.get("c.png") is None
+    assert index.stats()["expired"] == 1
+
+
+def test_pending_upload_is_rescanned(tmp_path):
+    index = NotionUploadIndex(tmp_path / "index.json")
+    pending = _upload("fu-2", "b.png", "2025-01-01T00:00:02Z", status="pending")
+    uploads = [
+        _upload("fu-1", "a.png", "2025-01-01T00:00:01Z"),
+        pending,
+        _upload("fu-3", "c.png", "2025-01-01T00:00:03Z"),
+    ]
+    client = _client(uploads)
+    asyncio.run(index.sync(client))
+    assert index.get("b.png") is None
+    # 高水位停在 pending 之前
+    assert index.stats()["high_water"] == "2025-01-01T00:00:01Z"
+
+    pending["status"] = "uploaded"
+    asyncio.run(index.sync(client))
+    assert index.get("b.png") == "fu-2"
+    assert index.stats()["high_water"] == "2025-01-01T00:00:03Z"
+
+
+def test_empty_workspace_is_ready_without_high_water(tmp_path):
+    index_file = tmp_path / "index.json"
+    index = NotionUploadIndex(index_file)
+    asyncio.run(index.sync(_client([])))
+
+    assert index.ready
+    assert json.loads(index_file.read_text())["high_water"] is None
+    assert NotionUploadIndex(index_file).ready
+
+
+def test_loads_legacy_snapshot(tmp_path):
+    index_file = tmp_path / "index.json"
+    index_file.write_text(json.dumps({"high_water": "", "files": {"a.png": "fu-1"}}))
+    index = NotionUploadIndex(index_file)
+
+    assert index.ready
+    assert index.stats()["high_water"] is None
+    assert index.get("a.png") == "fu-1"
+
+
+def test_get_entry_returns_expiry(tmp_path):
+    index = NotionUploadIndex(tmp_path / "index.json")
+    asyncio.run(index.sync(_client([_upload("fu-1", "a.png", "2025-01-01T00:00:01Z")])))
+
+    entry = index.get_entry("a.png")
+    assert entry["id"] == "fu-1"
+    assert entry["expires_at"] == 4070908800.0
+    assert index.get_entry("b.png") is None
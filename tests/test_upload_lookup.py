@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+封面上传文件名索引查找单元测试
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+from app.clients import image_upload
+from app.clients.image_upload import CoverUploader
+
+
+class FakeIndex:
+    ready = True
+
+    def __init__(self, ids, expires_at=None):
+        self.ids = dict(ids)
+        self.expires_at = expires_at
+        self.discarded = []
+
+    def get_entry(self, name):
+        if name not in self.ids:
+            return None
+        return {"id": self.ids[name], "expires_at": self.expires_at}
+
+    async def discard_id(self, file_upload_id):
+        self.discarded.append(file_upload_id)
+
+
+class FakeFileUploads:
+    def __init__(self, uploads):
+        self.uploads = uploads
+        self.retrieved = []
+
+    async def retrieve(self, file_upload_id):
+        self.retrieved.append(file_upload_id)
+        return self.uploads[file_upload_id]
+
+
+def _uploader(uploads):
+    client = SimpleNamespace(file_uploads=FakeFileUploads(uploads))
+    uploader = CoverUploader("https://example.com/a.png", "a", client=client)
+    uploader.image_name_all = "a.png"
+    return uploader
+
+
+def test_indexed_id_is_validated_before_use(monkeypatch):
+    index = FakeIndex({"a.png": "fu-1"})
+    monkeypatch.setattr(image_upload, "get_upload_index", lambda: index)
+    uploader = _uploader(
+        {
+            "fu-1": {
+                "id": "fu-1",
+                "status": "uploaded",
+                "expiry_time": "2030-01-01T00:00:00+00:00",
+            }
+        }
+    )
+
+    file_upload_id, expires_at = asyncio.run(uploader._find_in_notion_uploads())
+    assert file_upload_id == "fu-1"
+    assert expires_at is not None
+    assert index.discarded == []
+
+
+def test_expired_indexed_id_is_discarded(monkeypatch):
+    index = FakeIndex({"a.png": "fu-1"})
+    monkeypatch.setattr(image_upload, "get_upload_index", lambda: index)
+    uploader = _uploader({"fu-1": {"id": "fu-1", "status": "expired"}})
+
+    assert asyncio.run(uploader._find_in_notion_uploads()) is None
+    assert index.discarded == ["fu-1"]
+
+
+def test_indexed_id_with_known_expiry_is_trusted(monkeypatch):
+    expires_at = time.time() + 86400
+    index = FakeIndex({"a.png": "fu-1"}, expires_at=expires_at)
+    monkeypatch.setattr(image_upload, "get_upload_index", lambda: index)
+    uploader = _uploader({})
+
+    found = asyncio.run(uploader._find_in_notion_uploads())
+    assert found == ("fu-1", expires_at)
+    # 过期时间已知且不在余量内，无需向 Notion 校验
+    assert uploader.client.file_uploads.retrieved == []
+
+
+def test_cover_filename_changes_with_image_url(monkeypatch):
+    entries = {
+        "https://example.com/a.png": {"id": "fu-1", "filename": "x_cover.png"},
+        "https://example.com/b.png": {"id": "fu-2", "filename": "x_cover.png"},
+    }
+    monkeypatch.setattr(
+        image_upload, "cover_cache", SimpleNamespace(get_entry=entries.get)
+    )
+
+    first = image_upload.get_cover_filename("http://example.com/a.png?w=1")
+    second = image_upload.get_cover_filename("https://example.com/b.png")
+    assert first.startswith("x_cover_") and first.endswith(".png")
+    # 同名封面更换图片后文件名不同，差异比较会写入新封面
+    assert first != second
+    assert image_upload.get_cover_filename("https://example.com/c.png") is None
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+webhook 异步模式路由测试
+"""
+
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import routes
+from app.services.job_queue import job_queue
+
+ALBUM_REQUEST = {
+    "data": {"id": "page-1", "properties": {"FanjiaoAlbumID": {"number": 123}}}
+}
+
+
+@pytest.fixture
+def gate(monkeypatch):
+    """替换专辑处理流程：阻塞直到 gate 被设置"""
+    monkeypatch.setenv("WEBHOOK_ASYNC", "true")
+    monkeypatch.setenv("API_KEY", "")
+    monkeypatch.setenv("JOB_WORKERS", "1")
+    monkeypatch.setenv("JOB_QUEUE_SIZE", "1")
+    event = threading.Event()
+
+    async def process_album(album_id, page_id):
+        await asyncio.to_thread(event.wait, 5)
+
+    monkeypatch.setattr(routes, "_process_album", process_album)
+    yield event
+    event.set()
+
+
+@pytest.fixture
+def client(gate):
+    @asynccontextmanager
+    async def lifespan(app):
+        job_queue.start()
+        yield
+        await job_queue.stop(timeout=5)
+
+    app = FastAPI(lifespan=lifespan)
+    app.include_router(routes.router)
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def _wait_for_status(client, status_url, status):
+    for _ in range(200):
+        job = client.get(status_url).json()
+        if job["status"] == status:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job did not reach {status}: {job}")
+
+
+def test_webhook_returns_202_and_job_status(client, gate):
+    response = client.post("/webhook-album", json=ALBUM_REQUEST)
+    assert response.status_code == 202
+    body = response.json()
+    assert body["status"] == "accepted"
+    job_id = body["data"]["job_id"]
+    status_url = body["data"]["status_url"]
+    assert status_url == f"/jobs/{job_id}"
+
+    job = _wait_for_status(client, status_url, "running")
+    assert job["params"] == {"album_id": "123", "page_id": "page-1"}
+
+    gate.set()
+    job = _wait_for_status(client, status_url, "succeeded")
+    assert job["run_seconds"] is not None
+
+
+def test_webhook_returns_503_when_queue_full(client, gate):
+    first = client.post("/webhook-album", json=ALBUM_REQUEST).json()
+    _wait_for_status(client, first["data"]["status_url"], "running")
+
+    # worker 忙碌，队列容量为 1
+    assert client.post("/webhook-album", json=ALBUM_REQUEST).status_code == 202
+    response = client.post("/webhook-album", json=ALBUM_REQUEST)
+    assert response.status_code == 503
+    gate.set()
+
+
+def test_unknown_job_returns_404(client):
+    assert client.get("/jobs/does-not-exist").status_code == 404
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+WriteCoalescer 单元测试
+"""
+
+import asyncio
+
+from app.utils.write_coalescer import WriteCoalescer
+
+
+class Recorder:
+    """记录每次发送的内容"""
+
+    def __init__(self, fail: bool = False):
+        self.sent = []
+        self.fail = fail
+
+    def flush(self, tag):
+        async def send(values):
+            self.sent.append((tag, dict(values)))
+            if self.fail:
+                raise RuntimeError("boom")
+            return len(self.sent)
+
+        return send
+
+
+def test_merges_writes_last_write_wins():
+    recorder = Recorder()
+
+    async def scenario():
+        coalescer = WriteCoalescer(window=0.05)
+        results = await asyncio.gather(
+            coalescer.submit("p", {"a": 1, "b": 1}, recorder.flush("first")),
+            coalescer.submit("p", {"b": 2}, recorder.flush("second")),
+            coalescer.submit("q", {"a": 9}, recorder.flush("other")),
+        )
+        return results, coalescer.stats()
+
+    results, stats = asyncio.run(scenario())
+    # 同一页面只发送一次，使用最后一个调用者的发送函数
+    assert ("second", {"a": 1, "b": 2}) in recorder.sent
+    assert ("other", {"a": 9}) in recorder.sent
+    assert len(recorder.sent) == 2
+    assert results[0] == results[1]
+    assert stats["flushes"] == 2
+    assert stats["merged"] == 1
+
+
+def test_batches_for_same_key_are_sent_in_order():
+    order = []
+
+    async def scenario():
+        coalescer = WriteCoalescer(window=0.01)
+
+        async def slow(values):
+            await asyncio.sleep(0.05)
+            order.append(values)
+
+        async def fast(values):
+            order.append(values)
+
+        first = asyncio.create_task(coalescer.submit("p", {"n": 1}, slow))
+        await asyncio.sleep(0.02)  # 第一批已开始发送
+        await coalescer.submit("p", {"n": 2}, fast)
+        await first
+
+    asyncio.run(scenario())
+    assert order == [{"n": 1}, {"n": 2}]
+
+
+def test_errors_propagate_to_all_callers():
+    recorder = Recorder(fail=True)
+
+    async def scenario():
+        coalescer = WriteCoalescer(window=0.01)
+        return await asyncio.gather(
+            coalescer.submit("p", {"a": 1}, recorder.flush("x")),
+            coalescer.submit("p", {"b": 1}, recorder.flush("y")),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert len(recorder.sent) == 1
+
+
+def test_flush_all_sends_pending_batches_immediately():
+    recorder = Recorder()
+
+    async def scenario():
+        coalescer = WriteCoalescer(window=60)
+        task = asyncio.create_task(coalescer.submit("p", {"a": 1}, recorder.flush("x")))
+        await asyncio.sleep(0)
+        await asyncio.wait_for(coalescer.flush_all(), timeout=1)
+        return await task
+
+    assert asyncio.run(scenario()) == 1
+    assert recorder.sent == [("x", {"a": 1})]
+
+
+def test_without_window_first_write_is_sent_immediately():
+    order = []
+
+    async def scenario():
+        coalescer = WriteCoalescer()
+        release = asyncio.Event()
+
+        async def slow(values):
+            order.append(values)
+            await release.wait()
+
+        async def fast(values):
+            order.append(values)
+
+        first = asyncio.create_task(coalescer.submit("p", {"n": 1}, slow))
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        # 第一次写入未等待任何窗口即已发出
+        assert order == [{"n": 1}]
+
+        # 发送期间到达的写入合并为下一次请求
+        second = asyncio.create_task(coalescer.submit("p", {"n": 2, "a": 1}, fast))
+        third = asyncio.create_task(coalescer.submit("p", {"n": 3}, fast))
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(first, second, third)
+        return coalescer.stats()
+
+    stats = asyncio.run(scenario())
+    assert order == [{"n": 1}, {"n": 3, "a": 1}]
+    assert stats["flushes"] == 2
+    assert stats["merged"] == 1